@@ -2,29 +2,42 @@
 ZenLend Commitment System
 
 Private BTC lending with Pedersen commitments and zero-knowledge proofs
+
+Exports are loaded on first attribute access, so `import commitments`
+(or importing one submodule) does not pay for the rest of the package.
 """
 
-from .pedersen import (
-    PedersenCommitmentSystem,
-    Commitment,
-    pedersen_commit,
-    btc_to_satoshis,
-    satoshis_to_btc
-)
-from .integration import (
-    ZenLendIntegration, 
-    format_cairo_calldata,
-    parse_cairo_event
-)
+import importlib
 
 __version__ = "0.1.0"
-__all__ = [
-    "PedersenCommitmentSystem",
-    "Commitment", 
-    "pedersen_commit",
-    "btc_to_satoshis",
-    "satoshis_to_btc",
-    "ZenLendIntegration",
-    "format_cairo_calldata",
-    "parse_cairo_event"
-]
\ No newline at end of file
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    "PedersenCommitmentSystem": "pedersen",
+    "Commitment": "pedersen",
+    "pedersen_commit": "pedersen",
+    "set_commitment_mode": "pedersen",
+    "get_commitment_mode": "pedersen",
+    "set_hash_encoding": "pedersen",
+    "get_hash_encoding": "pedersen",
+    "btc_to_satoshis": "pedersen",
+    "satoshis_to_btc": "pedersen",
+    "ZenLendIntegration": "integration",
+    "format_cairo_calldata": "integration",
+    "parse_cairo_event": "integration"
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,239 @@
+"""
+Admission Control for the Commitment Endpoints
+
+Commitment and verification work is CPU-bound Python, so on one core
+admitting more concurrent requests only stretches every request's
+latency: they take turns on the GIL. AdmissionController caps the
+requests in progress. Requests over the cap wait in a bounded FIFO queue
+for up to queue_timeout. Beyond that they are rejected at once with
+AdmissionRejected, which the servers turn into 503 with Retry-After.
+
+The cap adapts to observed latency, after the gradient limiter used by
+Netflix's concurrency-limits. Each admitted request reports its service
+time. The limit is scaled by the ratio of the baseline (minimum recent)
+service time to a smoothed current one, with `tolerance` allowing that
+much inflation before it shrinks. sqrt(limit) of headroom is then added
+so the limit can grow again when latency recovers, but only while at
+least half the limit is in use. The baseline is
+re-probed every probe_interval samples so a slower steady state is
+accepted.
+
+Routes outside the controller (/health, /api/info, /metrics) form the
+priority lane: they never wait behind commitment work.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional
+
+try:
+    from .metrics import ADMISSION_LIMIT, ADMISSION_QUEUE, ADMISSION_REJECTED
+except ImportError:
+    from metrics import ADMISSION_LIMIT, ADMISSION_QUEUE, ADMISSION_REJECTED
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a request is shed; retry_after is a suggested delay in whole seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    """A queued request; granted is set, under the lock, once it holds a slot"""
+    __slots__ = ("granted", "wake")
+
+    def __init__(self, wake):
+        self.granted = False
+        self.wake = wake
+
+
+class Ticket:
+    """An admitted request; release it when the response is done"""
+    __slots__ = ("_controller", "_start", "_released")
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._start = time.perf_counter()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(time.perf_counter() - self._start)
+
+    def __enter__(self) -> "Ticket":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.release()
+        return False
+
+
+class AdmissionController:
+    """
+    Adaptive concurrency limit with a bounded wait queue
+
+    Args:
+        initial_limit: Concurrent requests admitted before any samples
+        min_limit: Floor of the adaptive limit
+        max_limit: Ceiling of the adaptive limit
+        queue_size: Requests allowed to wait for a slot
+        queue_timeout: Seconds a request waits before it is shed
+        adaptive: Adjust the limit from latency; otherwise it stays at initial_limit
+        tolerance: Latency inflation over the baseline accepted before shrinking
+        smoothing: Weight of each new limit estimate
+        probe_interval: Samples between resets of the baseline latency
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        queue_size: int = 32,
+        queue_timeout: float = 1.0,
+        adaptive: bool = True,
+        tolerance: float = 2.0,
+        smoothing: float = 0.2,
+        probe_interval: int = 500
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if queue_size < 0 or queue_timeout < 0:
+            raise ValueError("Queue size and timeout must not be negative")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.adaptive = adaptive
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.probe_interval = probe_interval
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+        self._baseline: Optional[float] = None
+        self._latency: Optional[float] = None
+        self._samples = 0
+        self.admitted = 0
+        self.rejected = 0
+        ADMISSION_LIMIT.labels().set(initial_limit)
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def acquire(self) -> Ticket:
+        """
+        Admit the calling thread, waiting in the queue if needed
+
+        Raises:
+            AdmissionRejected: The queue is full or the wait timed out
+        """
+        event = threading.Event()
+        waiter = self._enter(event.set)
+        if waiter is None:
+            return Ticket(self)
+        event.wait(self.queue_timeout)
+        return self._finish_wait(waiter)
+
+    async def acquire_async(self) -> Ticket:
+        """Awaitable acquire for asyncio servers"""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def notify():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = self._enter(notify)
+        if waiter is None:
+            return Ticket(self)
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._finish_wait(waiter)
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead of a new request has likely drained"""
+        latency = self._latency or 1.0
+        backlog = self._in_flight + len(self._waiters)
+        return max(1, math.ceil(backlog * latency / max(1, self.limit)))
+
+    def _enter(self, notify) -> Optional[_Waiter]:
+        """Take a slot (returns None) or join the queue (returns the waiter)"""
+        with self._lock:
+            if self._in_flight < self.limit and not self._waiters:
+                self._in_flight += 1
+                self.admitted += 1
+                return None
+            if len(self._waiters) >= self.queue_size or self.queue_timeout == 0:
+                self.rejected += 1
+                reason = "queue_full"
+            else:
+                waiter = _Waiter(notify)
+                self._waiters.append(waiter)
+                ADMISSION_QUEUE.inc()
+                return waiter
+        ADMISSION_REJECTED.labels(reason).inc()
+        raise AdmissionRejected("Admission queue is full", self.retry_after())
+
+    def _finish_wait(self, waiter: _Waiter) -> Ticket:
+        with self._lock:
+            if waiter.granted:
+                return Ticket(self)
+            self._waiters.remove(waiter)
+            self.rejected += 1
+        ADMISSION_QUEUE.dec()
+        ADMISSION_REJECTED.labels("timeout").inc()
+        raise AdmissionRejected("Timed out waiting for admission", self.retry_after())
+
+    def _release(self, latency: float) -> None:
+        granted = []
+        with self._lock:
+            self._in_flight -= 1
+            if self.adaptive:
+                self._update_limit(latency)
+            # Hand freed slots straight to the oldest waiters
+            while self._waiters and self._in_flight < self.limit:
+                waiter = self._waiters.popleft()
+                self._in_flight += 1
+                self.admitted += 1
+                waiter.granted = True
+                granted.append(waiter)
+        for waiter in granted:
+            ADMISSION_QUEUE.dec()
+            waiter.wake()
+
+    def _update_limit(self, latency: float) -> None:
+        # Called with the lock held, after this request left _in_flight
+        self._samples += 1
+        if self._baseline is None or self._samples % self.probe_interval == 0:
+            self._baseline = latency
+        self._baseline = min(self._baseline, latency)
+        self._latency = latency if self._latency is None else 0.9 * self._latency + 0.1 * latency
+
+        gradient = max(0.5, min(1.0, self.tolerance * self._baseline / self._latency))
+        # Only grow a limit that is actually being used
+        busy = self._in_flight + 1 >= self._limit / 2
+        estimate = self._limit * gradient + (math.sqrt(self._limit) if busy else 0.0)
+        limit = (1 - self.smoothing) * self._limit + self.smoothing * estimate
+        self._limit = min(float(self.max_limit), max(float(self.min_limit), limit))
+        ADMISSION_LIMIT.labels().set(self.limit)
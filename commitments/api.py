@@ -0,0 +1,228 @@
+"""
+Framework-independent pieces of the commitment API
+
+Shared by the Flask app (app.py) and the ASGI app (asgi.py) so both
+serve identical validation rules and response bodies.
+"""
+
+import hmac
+import math
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from .admission import AdmissionController
+    from .cache import CommitmentCache
+    from .capture import RequestCapture
+    from .executor import CommitmentExecutor
+    from .pedersen import PedersenCommitmentSystem
+    from .profiler import install_signal_handler
+except ImportError:
+    from admission import AdmissionController
+    from cache import CommitmentCache
+    from capture import RequestCapture
+    from executor import CommitmentExecutor
+    from pedersen import PedersenCommitmentSystem
+    from profiler import install_signal_handler
+
+# Upper bound on items accepted by /generate-commitments in a single request
+MAX_BATCH_SIZE = int(os.environ.get('ZENLEND_MAX_BATCH_SIZE', '50000'))
+
+# Largest amount accepted, in BTC: the total bitcoin supply
+MAX_AMOUNT = 21_000_000
+
+# Bearer token guarding /admin/* endpoints; they answer 404 when unset
+ADMIN_TOKEN = os.environ.get('ZENLEND_ADMIN_TOKEN', '')
+
+VERIFY_PROOF_FIELDS = ['commitment', 'proof', 'amount']
+
+# Routes behind admission control; every other route is the priority lane
+ADMISSION_ROUTES = {'/generate-commitment', '/generate-commitments', '/verify-proof'}
+
+BUSY_RESPONSE = {"error": "Service busy, try again later"}
+
+HEALTH_RESPONSE = {"status": "healthy", "service": "ZenLend Commitment API"}
+
+API_INFO = {
+    "name": "ZenLend Commitment API",
+    "version": "1.0.0",
+    "description": "Private Bitcoin lending commitment generation service",
+    "endpoints": {
+        "/health": "Health check",
+        "/generate-commitment": "Generate Pedersen commitment and proof",
+        "/generate-commitments": "Generate Pedersen commitments and proofs for a batch of amounts",
+        "/verify-proof": "Verify commitment proof",
+        "/metrics": "Prometheus metrics",
+        "/api/info": "API information"
+    }
+}
+
+
+def create_commitment_system() -> PedersenCommitmentSystem:
+    """
+    Build the commitment system from the environment
+
+    ZENLEND_CACHE_SIZE > 0 enables the result cache for
+    generate_commitment_with_proof, with entries expiring after
+    ZENLEND_CACHE_TTL seconds.
+    """
+    cache_size = int(os.environ.get('ZENLEND_CACHE_SIZE', '0'))
+    cache = None
+    if cache_size > 0:
+        cache = CommitmentCache(cache_size, float(os.environ.get('ZENLEND_CACHE_TTL', '300')))
+    return PedersenCommitmentSystem(cache=cache)
+
+
+def apply_switch_interval() -> None:
+    """
+    Set the interpreter's thread switch interval for a threaded server
+
+    ZENLEND_SWITCH_INTERVAL seconds, default 1ms (CPython's own is 5ms;
+    0 leaves it alone). Admitted requests hold the GIL in long compute
+    stretches; at 5ms per handoff the threads accepting and parsing new
+    requests fall so far behind that requests queue in the socket
+    backlog, where admission control cannot see or shed them. The
+    setting is process-wide, so only server entry points call this,
+    never code that runs on import.
+    """
+    interval = float(os.environ.get('ZENLEND_SWITCH_INTERVAL', '0.001'))
+    if interval > 0:
+        sys.setswitchinterval(interval)
+
+
+def create_admission_controller() -> Optional[AdmissionController]:
+    """
+    Build the admission controller for ADMISSION_ROUTES from the environment
+
+    ZENLEND_ADMISSION_LIMIT is the initial concurrency limit (0 disables
+    admission control); it adapts between 1 and ZENLEND_ADMISSION_MAX_LIMIT
+    unless ZENLEND_ADMISSION_ADAPTIVE=0. Up to ZENLEND_ADMISSION_QUEUE
+    requests wait at most ZENLEND_ADMISSION_TIMEOUT seconds for a slot.
+    Threaded servers also need apply_switch_interval() for it to shed load.
+    """
+    limit = int(os.environ.get('ZENLEND_ADMISSION_LIMIT', '4'))
+    if limit <= 0:
+        return None
+    return AdmissionController(
+        initial_limit=limit,
+        max_limit=max(limit, int(os.environ.get('ZENLEND_ADMISSION_MAX_LIMIT', '64'))),
+        queue_size=int(os.environ.get('ZENLEND_ADMISSION_QUEUE', '32')),
+        queue_timeout=float(os.environ.get('ZENLEND_ADMISSION_TIMEOUT', '1')),
+        adaptive=os.environ.get('ZENLEND_ADMISSION_ADAPTIVE', '1') != '0'
+    )
+
+
+def create_request_capture() -> Optional[RequestCapture]:
+    """
+    Request capture for traffic replay, if ZENLEND_CAPTURE_PATH is set
+
+    ZENLEND_CAPTURE_SAMPLE is the fraction of requests recorded (default 1).
+    """
+    path = os.environ.get('ZENLEND_CAPTURE_PATH')
+    if not path:
+        return None
+    return RequestCapture(path, float(os.environ.get('ZENLEND_CAPTURE_SAMPLE', '1')))
+
+
+def create_executor(system: PedersenCommitmentSystem) -> CommitmentExecutor:
+    """
+    Build the commitment executor from the environment
+
+    ZENLEND_WORKERS=0 (the default) keeps the work in the serving process.
+    """
+    return CommitmentExecutor(
+        system,
+        workers=int(os.environ.get('ZENLEND_WORKERS', '0')),
+        max_pending=int(os.environ.get('ZENLEND_MAX_PENDING', '64')),
+        timeout=float(os.environ.get('ZENLEND_REQUEST_TIMEOUT', '10'))
+    )
+
+
+def install_profiler_signal() -> None:
+    """Profile to ZENLEND_PROFILE_DIR on SIGUSR2, if that directory is configured"""
+    output_dir = os.environ.get('ZENLEND_PROFILE_DIR')
+    if output_dir:
+        install_signal_handler(output_dir)
+
+
+def busy_retry_after(admission: Optional[AdmissionController]) -> int:
+    """
+    Retry-After seconds for a 503 caused by a saturated executor
+
+    The admission controller's estimate when there is one, so both
+    kinds of 503 advise the same delay; otherwise one second.
+    """
+    return admission.retry_after() if admission is not None else 1
+
+
+def admin_status(authorization: Optional[str]) -> Optional[int]:
+    """Error status for an /admin/* request, or None if it is authorized"""
+    if not ADMIN_TOKEN:
+        return 404
+    scheme, _, token = (authorization or '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return 401
+    return None
+
+
+def validate_commitment_request(amount: Any, private_key: Any) -> Optional[str]:
+    """Return an error message for invalid commitment inputs, or None if valid"""
+    if not isinstance(amount, (int, float)) or isinstance(amount, bool) or amount <= 0:
+        return "Amount must be a positive number"
+    if not math.isfinite(amount):
+        return "Amount must be a finite number"
+    if amount > MAX_AMOUNT:
+        return f"Amount must not exceed {MAX_AMOUNT} BTC"
+
+    if not isinstance(private_key, str) or len(private_key) < 8:
+        return "Private key must be at least 8 characters"
+
+    return None
+
+
+def split_batch_items(
+    items: List[Any]
+) -> Tuple[List[Optional[Dict[str, Any]]], List[int], List[float], List[str]]:
+    """
+    Validate /generate-commitments items
+
+    Returns:
+        Tuple of (results with per-item errors filled in, indices of the
+        valid items, their amounts, their private keys)
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    indices, amounts, private_keys = [], [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or 'amount' not in item or 'private_key' not in item:
+            results[index] = {"index": index, "error": "Missing required fields: amount, private_key"}
+            continue
+
+        error = validate_commitment_request(item['amount'], item['private_key'])
+        if error:
+            results[index] = {"index": index, "error": error}
+            continue
+
+        indices.append(index)
+        amounts.append(item['amount'])
+        private_keys.append(item['private_key'])
+
+    return results, indices, amounts, private_keys
+
+
+def batch_response(
+    results: List[Optional[Dict[str, Any]]],
+    indices: List[int],
+    batch: List[Tuple[str, Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """Merge commit_many output into the per-item results"""
+    for index, (commitment, proof) in zip(indices, batch):
+        results[index] = {"index": index, "commitment": commitment, "proof": proof}
+
+    return {
+        "results": results,
+        "count": len(results),
+        "succeeded": len(batch),
+        "failed": len(results) - len(batch),
+        "success": True
+    }
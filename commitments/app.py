@@ -1,15 +1,63 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from pedersen import PedersenCommitmentSystem
+from flask import Flask, g, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+from admission import AdmissionRejected
+from coalesce import SingleFlight, request_digest
+from executor import ExecutorSaturatedError, ExecutorTimeoutError
+from metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    IN_FLIGHT,
+    PHASE_DURATION,
+    REQUEST_DURATION,
+    REQUEST_ERRORS,
+    REQUESTS,
+    render as render_metrics
+)
+from pedersen import copy_commitment_result
+from profiler import ProfilerBusyError, parse_profile_params, profile
+from wire import CBOR_MEDIA_TYPE, encode_response, prefers_cbor
+from api import (
+    ADMISSION_ROUTES,
+    API_INFO,
+    BUSY_RESPONSE,
+    HEALTH_RESPONSE,
+    MAX_BATCH_SIZE,
+    VERIFY_PROOF_FIELDS,
+    admin_status,
+    apply_switch_interval,
+    batch_response,
+    busy_retry_after,
+    create_admission_controller,
+    create_commitment_system,
+    create_executor,
+    create_request_capture,
+    install_profiler_signal,
+    split_batch_items,
+    validate_commitment_request
+)
 import json
 import logging
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider recording request parsing and response serialization time"""
+    
+    _parse = PHASE_DURATION.labels("parse_json")
+    _serialize = PHASE_DURATION.labels("serialize_json")
+    
+    def loads(self, s, **kwargs):
+        with self._parse.timer():
+            return super().loads(s, **kwargs)
+    
+    def dumps(self, obj, **kwargs):
+        with self._serialize.timer():
+            return super().dumps(obj, **kwargs)
+
 app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=False)
+app.json = TimedJSONProvider(app)
 
 @app.after_request
 def add_cors_headers(response):
@@ -18,18 +66,98 @@ def add_cors_headers(response):
     response.headers['Access-Control-Allow-Methods'] = 'GET,POST,OPTIONS'
     return response
 
+def _metrics_route():
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_route = _metrics_route()
+    g.metrics_start = time.perf_counter()
+    IN_FLIGHT.labels(g.metrics_route).inc()
+
+@app.after_request
+def record_request_metrics(response):
+    route = g.get('metrics_route')
+    if route is not None:
+        REQUEST_DURATION.labels(route, request.method).observe(time.perf_counter() - g.metrics_start)
+        REQUESTS.labels(route, request.method, response.status_code).inc()
+        if response.status_code >= 500:
+            REQUEST_ERRORS.labels(route, request.method).inc()
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    route = g.pop('metrics_route', None)
+    if route is not None:
+        IN_FLIGHT.labels(route).dec()
+
+# Opt-in request log for loadtest replay (ZENLEND_CAPTURE_PATH)
+capture = create_request_capture()
+
+@app.before_request
+def capture_request():
+    if capture is not None and request.method != 'OPTIONS':
+        capture.record(request.method, request.full_path.rstrip('?'), request.get_data(cache=True),
+                       request.headers.get('Content-Type'), request.headers.get('Accept'))
+
+# Concurrency limit for the commitment routes (ZENLEND_ADMISSION_LIMIT=0 disables it)
+admission = create_admission_controller()
+
+@app.before_request
+def admit_request():
+    if admission is None or request.method != 'POST' or g.metrics_route not in ADMISSION_ROUTES:
+        return None
+    try:
+        g.admission_ticket = admission.acquire()
+    except AdmissionRejected as e:
+        return busy_response(e.retry_after)
+    return None
+
+def busy_response(retry_after: int):
+    """503 with Retry-After, for shed requests and a saturated executor"""
+    response = jsonify(BUSY_RESPONSE)
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+@app.teardown_request
+def release_admission(exc):
+    ticket = g.pop('admission_ticket', None)
+    if ticket is not None:
+        ticket.release()
+
 @app.route('/', defaults={'path': ''}, methods=['OPTIONS'])
 @app.route('/<path:path>', methods=['OPTIONS'])
 def options_handler(path=''):
     return '', 204
 
 # Initialize commitment system
-commitment_system = PedersenCommitmentSystem()
+commitment_system = create_commitment_system()
+
+# Offload of the commitment and verification routes to worker processes
+# (ZENLEND_WORKERS=0 keeps the work on the request thread)
+executor = create_executor(commitment_system)
+
+# Identical concurrent requests share one computation
+commitment_flights = SingleFlight('/generate-commitment', copy_commitment_result)
+verify_flights = SingleFlight('/verify-proof')
+
+# Collapsed-stack profile on SIGUSR2 when ZENLEND_PROFILE_DIR is set
+install_profiler_signal()
+
+def negotiated_response(payload):
+    """JSON response, or compact CBOR when the client's Accept header prefers it"""
+    if prefers_cbor(request.headers.get('Accept')):
+        response = app.response_class(encode_response(payload), content_type=CBOR_MEDIA_TYPE)
+    else:
+        response = jsonify(payload)
+    response.vary.add('Accept')
+    return response
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({"status": "healthy", "service": "ZenLend Commitment API"})
+    return jsonify(HEALTH_RESPONSE)
 
 @app.route('/generate-commitment', methods=['POST'])
 def generate_commitment():
@@ -44,75 +172,136 @@ def generate_commitment():
         private_key = data['private_key']
         
         # Validate inputs
-        if not isinstance(amount, (int, float)) or amount <= 0:
-            return jsonify({"error": "Amount must be a positive number"}), 400
-        
-        if not isinstance(private_key, str) or len(private_key) < 8:
-            return jsonify({"error": "Private key must be at least 8 characters"}), 400
+        error = validate_commitment_request(amount, private_key)
+        if error:
+            return jsonify({"error": error}), 400
         
         # Generate commitment and proof
-        commitment, proof = commitment_system.generate_commitment_with_proof(amount, private_key)
+        commitment, proof = commitment_flights.do(
+            request_digest('/generate-commitment', amount, private_key),
+            lambda: executor.call('generate_commitment_with_proof', amount, private_key)
+        )[0]
         
         logger.info(f"Generated commitment for amount: {amount}")
         
-        return jsonify({
+        return negotiated_response({
             "commitment": commitment,
             "proof": proof,
             "success": True
         })
         
+    except ExecutorSaturatedError:
+        return busy_response(busy_retry_after(admission))
+    except ExecutorTimeoutError:
+        logger.error("Timed out generating commitment")
+        return jsonify({"error": "Commitment generation timed out"}), 504
     except Exception as e:
         logger.error(f"Error generating commitment: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route('/generate-commitments', methods=['POST'])
+def generate_commitments():
+    """Generate Pedersen commitments and proofs for a batch of amounts"""
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('items'), list):
+            return jsonify({"error": "Missing required field: items"}), 400
+        
+        items = data['items']
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch too large: at most {MAX_BATCH_SIZE} items allowed"}), 400
+        
+        # Validate every item up front, then commit the valid ones in one pass
+        results, indices, amounts, private_keys = split_batch_items(items)
+        batch = executor.call('commit_many', amounts, private_keys)
+        
+        logger.info(f"Generated {len(batch)} commitments ({len(items) - len(batch)} rejected)")
+        
+        return negotiated_response(batch_response(results, indices, batch))
+        
+    except ExecutorSaturatedError:
+        return busy_response(busy_retry_after(admission))
+    except ExecutorTimeoutError:
+        logger.error("Timed out generating commitments")
+        return jsonify({"error": "Commitment generation timed out"}), 504
+    except Exception as e:
+        logger.error(f"Error generating commitments: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
 @app.route('/verify-proof', methods=['POST'])
 def verify_proof():
     """Verify commitment proof"""
     try:
         data = request.get_json()
         
-        required_fields = ['commitment', 'proof', 'amount']
-        if not data or not all(field in data for field in required_fields):
-            return jsonify({"error": f"Missing required fields: {required_fields}"}), 400
+        if not data or not all(field in data for field in VERIFY_PROOF_FIELDS):
+            return jsonify({"error": f"Missing required fields: {VERIFY_PROOF_FIELDS}"}), 400
         
         commitment = data['commitment']
         proof = data['proof']
         amount = data['amount']
         
         # Verify the proof
-        is_valid = commitment_system.verify_proof(commitment, proof, amount)
+        is_valid = verify_flights.do(
+            request_digest('/verify-proof', commitment, proof, amount),
+            lambda: executor.call('verify_proof', commitment, proof, amount)
+        )[0]
         
         logger.info(f"Proof verification result: {is_valid}")
         
-        return jsonify({
+        return negotiated_response({
             "valid": is_valid,
             "success": True
         })
         
+    except ExecutorSaturatedError:
+        return busy_response(busy_retry_after(admission))
+    except ExecutorTimeoutError:
+        logger.error("Timed out verifying proof")
+        return jsonify({"error": "Proof verification timed out"}), 504
     except Exception as e:
         logger.error(f"Error verifying proof: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics endpoint"""
+    return app.response_class(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/admin/profile', methods=['GET'])
+def admin_profile():
+    """Sample every thread for ?seconds=N and return collapsed stacks"""
+    status = admin_status(request.headers.get('Authorization'))
+    if status is not None:
+        return jsonify({"error": "Not found" if status == 404 else "Unauthorized"}), status
+    
+    params = parse_profile_params(request.args.get('seconds'), request.args.get('interval'))
+    if params is None:
+        return jsonify({"error": "Invalid seconds or interval"}), 400
+    
+    try:
+        collapsed = profile(*params)
+    except ProfilerBusyError:
+        return jsonify({"error": "A profile is already running"}), 409
+    
+    return app.response_class(collapsed, content_type='text/plain; charset=utf-8')
+
 @app.route('/api/info', methods=['GET'])
 def api_info():
     """API information endpoint"""
-    return jsonify({
-        "name": "ZenLend Commitment API",
-        "version": "1.0.0",
-        "description": "Private Bitcoin lending commitment generation service",
-        "endpoints": {
-            "/health": "Health check",
-            "/generate-commitment": "Generate Pedersen commitment and proof",
-            "/verify-proof": "Verify commitment proof",
-            "/api/info": "API information"
-        }
-    })
+    return jsonify(API_INFO)
 
 if __name__ == '__main__':
     print("🚀 Starting ZenLend Commitment API...")
     print("📡 Serving on http://localhost:5000")
     print("📚 API docs available at http://localhost:5000/api/info")
     
+    if executor.workers:
+        print(f"⚙️  Warming up {executor.workers} commitment workers...")
+        executor.start()
+    
+    apply_switch_interval()
     app.run(
         host='0.0.0.0',
         port=5000,
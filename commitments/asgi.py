@@ -0,0 +1,432 @@
+"""
+ASGI entry point for the ZenLend Commitment API
+
+asyncio-native counterpart of app.py with the same routes and response
+bodies. Connections are handled on the event loop, so idle keep-alive
+clients cost no threads; commitment and verification work is handed to
+the CommitmentExecutor and awaited.
+
+Run with any ASGI server, e.g.:
+    uvicorn asgi:app --port 5000
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+try:
+    from .api import (
+        ADMISSION_ROUTES,
+        API_INFO,
+        BUSY_RESPONSE,
+        HEALTH_RESPONSE,
+        MAX_BATCH_SIZE,
+        VERIFY_PROOF_FIELDS,
+        admin_status,
+        batch_response,
+        busy_retry_after,
+        create_admission_controller,
+        create_commitment_system,
+        create_executor,
+        create_request_capture,
+        install_profiler_signal,
+        split_batch_items,
+        validate_commitment_request
+    )
+    from .admission import AdmissionRejected
+    from .coalesce import SingleFlight, request_digest
+    from .executor import ExecutorSaturatedError, ExecutorTimeoutError
+    from .pedersen import copy_commitment_result
+    from .profiler import ProfilerBusyError, parse_profile_params, profile
+    from .wire import CBOR_MEDIA_TYPE, encode_response, prefers_cbor
+    from .metrics import (
+        CONTENT_TYPE as METRICS_CONTENT_TYPE,
+        IN_FLIGHT,
+        PHASE_DURATION,
+        REQUEST_DURATION,
+        REQUEST_ERRORS,
+        REQUESTS,
+        render as render_metrics
+    )
+except ImportError:
+    from api import (
+        ADMISSION_ROUTES,
+        API_INFO,
+        BUSY_RESPONSE,
+        HEALTH_RESPONSE,
+        MAX_BATCH_SIZE,
+        VERIFY_PROOF_FIELDS,
+        admin_status,
+        batch_response,
+        busy_retry_after,
+        create_admission_controller,
+        create_commitment_system,
+        create_executor,
+        create_request_capture,
+        install_profiler_signal,
+        split_batch_items,
+        validate_commitment_request
+    )
+    from admission import AdmissionRejected
+    from coalesce import SingleFlight, request_digest
+    from executor import ExecutorSaturatedError, ExecutorTimeoutError
+    from pedersen import copy_commitment_result
+    from profiler import ProfilerBusyError, parse_profile_params, profile
+    from wire import CBOR_MEDIA_TYPE, encode_response, prefers_cbor
+    from metrics import (
+        CONTENT_TYPE as METRICS_CONTENT_TYPE,
+        IN_FLIGHT,
+        PHASE_DURATION,
+        REQUEST_DURATION,
+        REQUEST_ERRORS,
+        REQUESTS,
+        render as render_metrics
+    )
+
+
+logger = logging.getLogger(__name__)
+
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-headers", b"Content-Type,Authorization"),
+    (b"access-control-allow-methods", b"GET,POST,OPTIONS"),
+]
+
+# Initialize commitment system
+commitment_system = create_commitment_system()
+executor = create_executor(commitment_system)
+
+# Opt-in request log for loadtest replay (ZENLEND_CAPTURE_PATH)
+capture = create_request_capture()
+
+# Concurrency limit for the commitment routes (ZENLEND_ADMISSION_LIMIT=0 disables it)
+admission = create_admission_controller()
+
+# Identical concurrent requests share one computation
+commitment_flights = SingleFlight('/generate-commitment', copy_commitment_result)
+verify_flights = SingleFlight('/verify-proof')
+
+# Collapsed-stack profile on SIGUSR2 when ZENLEND_PROFILE_DIR is set
+install_profiler_signal()
+
+Response = Tuple[Any, int]
+
+_parse_timer = PHASE_DURATION.labels("parse_json")
+_serialize_timer = PHASE_DURATION.labels("serialize_json")
+
+
+@_serialize_timer.time
+def _encode(payload: Any) -> bytes:
+    """Serialize a response body the way Flask's jsonify does"""
+    return (json.dumps(payload, separators=(",", ":"), sort_keys=True) + "\n").encode()
+
+
+async def health_check(data: Any) -> Response:
+    """Health check endpoint"""
+    return HEALTH_RESPONSE, 200
+
+
+async def generate_commitment(data: Any) -> Response:
+    """Generate Pedersen commitment and proof"""
+    try:
+        if not data or 'amount' not in data or 'private_key' not in data:
+            return {"error": "Missing required fields: amount, private_key"}, 400
+
+        amount = data['amount']
+        private_key = data['private_key']
+
+        # Validate inputs
+        error = validate_commitment_request(amount, private_key)
+        if error:
+            return {"error": error}, 400
+
+        # Generate commitment and proof
+        commitment, proof = (await commitment_flights.do_async(
+            request_digest('/generate-commitment', amount, private_key),
+            lambda: executor.call_async('generate_commitment_with_proof', amount, private_key)
+        ))[0]
+
+        logger.info(f"Generated commitment for amount: {amount}")
+
+        return {
+            "commitment": commitment,
+            "proof": proof,
+            "success": True
+        }, 200
+
+    except ExecutorSaturatedError:
+        return BUSY_RESPONSE, 503
+    except ExecutorTimeoutError:
+        logger.error("Timed out generating commitment")
+        return {"error": "Commitment generation timed out"}, 504
+    except Exception as e:
+        logger.error(f"Error generating commitment: {str(e)}")
+        return {"error": "Internal server error"}, 500
+
+
+async def generate_commitments(data: Any) -> Response:
+    """Generate Pedersen commitments and proofs for a batch of amounts"""
+    try:
+        if not data or not isinstance(data.get('items'), list):
+            return {"error": "Missing required field: items"}, 400
+
+        items = data['items']
+        if len(items) > MAX_BATCH_SIZE:
+            return {"error": f"Batch too large: at most {MAX_BATCH_SIZE} items allowed"}, 400
+
+        # Validate every item up front, then commit the valid ones in one pass
+        results, indices, amounts, private_keys = split_batch_items(items)
+        batch = await executor.call_async('commit_many', amounts, private_keys)
+
+        logger.info(f"Generated {len(batch)} commitments ({len(items) - len(batch)} rejected)")
+
+        return batch_response(results, indices, batch), 200
+
+    except ExecutorSaturatedError:
+        return BUSY_RESPONSE, 503
+    except ExecutorTimeoutError:
+        logger.error("Timed out generating commitments")
+        return {"error": "Commitment generation timed out"}, 504
+    except Exception as e:
+        logger.error(f"Error generating commitments: {str(e)}")
+        return {"error": "Internal server error"}, 500
+
+
+async def verify_proof(data: Any) -> Response:
+    """Verify commitment proof"""
+    try:
+        if not data or not all(field in data for field in VERIFY_PROOF_FIELDS):
+            return {"error": f"Missing required fields: {VERIFY_PROOF_FIELDS}"}, 400
+
+        commitment = data['commitment']
+        proof = data['proof']
+        amount = data['amount']
+
+        # Verify the proof
+        is_valid = (await verify_flights.do_async(
+            request_digest('/verify-proof', commitment, proof, amount),
+            lambda: executor.call_async('verify_proof', commitment, proof, amount)
+        ))[0]
+
+        logger.info(f"Proof verification result: {is_valid}")
+
+        return {
+            "valid": is_valid,
+            "success": True
+        }, 200
+
+    except ExecutorSaturatedError:
+        return BUSY_RESPONSE, 503
+    except ExecutorTimeoutError:
+        logger.error("Timed out verifying proof")
+        return {"error": "Proof verification timed out"}, 504
+    except Exception as e:
+        logger.error(f"Error verifying proof: {str(e)}")
+        return {"error": "Internal server error"}, 500
+
+
+async def metrics(data: Any) -> Response:
+    """Prometheus metrics endpoint (plain text, not JSON)"""
+    return render_metrics(), 200
+
+
+async def api_info(data: Any) -> Response:
+    """API information endpoint"""
+    return API_INFO, 200
+
+
+ROUTES: Dict[str, Tuple[str, Callable[[Any], Awaitable[Response]]]] = {
+    '/health': ('GET', health_check),
+    '/generate-commitment': ('POST', generate_commitment),
+    '/generate-commitments': ('POST', generate_commitments),
+    '/verify-proof': ('POST', verify_proof),
+    '/metrics': ('GET', metrics),
+    '/api/info': ('GET', api_info),
+}
+
+# Routes whose successful responses are content-negotiated (JSON or CBOR)
+NEGOTIATED_ROUTES = {'/generate-commitment', '/generate-commitments', '/verify-proof'}
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    """Value of a request header (name in lower case), or None if absent"""
+    for header, value in scope.get("headers", ()):
+        if header == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def admin_profile(scope, send) -> int:
+    """Sample every thread for ?seconds=N and return collapsed stacks"""
+    status = admin_status(_header(scope, b"authorization"))
+    if status is not None:
+        await _send(send, status, _encode({"error": "Not found" if status == 404 else "Unauthorized"}))
+        return status
+
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    params = parse_profile_params(query.get('seconds', [None])[0], query.get('interval', [None])[0])
+    if params is None:
+        await _send(send, 400, _encode({"error": "Invalid seconds or interval"}))
+        return 400
+
+    # Sampling sleeps between samples; keep the event loop serving meanwhile
+    try:
+        collapsed = await asyncio.get_running_loop().run_in_executor(None, profile, *params)
+    except ProfilerBusyError:
+        await _send(send, 409, _encode({"error": "A profile is already running"}))
+        return 409
+
+    await _send(send, 200, collapsed.encode(), b"text/plain; charset=utf-8")
+    return 200
+
+
+# Routes that read the request themselves and write a non-JSON response
+ADMIN_ROUTES: Dict[str, Callable[[Any, Any], Awaitable[int]]] = {
+    '/admin/profile': admin_profile,
+}
+
+
+async def _read_body(receive) -> bytes:
+    """Collect the full request body"""
+    chunks = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    return b"".join(chunks)
+
+
+async def _send(
+    send,
+    status: int,
+    body: bytes = b"",
+    content_type: bytes = b"application/json",
+    extra_headers: Tuple[Tuple[bytes, bytes], ...] = ()
+) -> None:
+    """Send a complete response with the CORS headers attached"""
+    headers = list(CORS_HEADERS)
+    headers.extend(extra_headers)
+    if body:
+        headers.append((b"content-type", content_type))
+    headers.append((b"content-length", str(len(body)).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send) -> None:
+    """Warm up workers on startup and stop them on shutdown"""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            if executor.workers:
+                await asyncio.get_running_loop().run_in_executor(None, executor.start)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            executor.shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def _capture(scope, method: str, body: bytes) -> None:
+    """Record a request the way app.py's before_request hook does"""
+    path = scope["path"]
+    query = scope.get("query_string", b"")
+    if query:
+        path = f"{path}?{query.decode('latin-1')}"
+    capture.record(method, path, body, _header(scope, b"content-type"), _header(scope, b"accept"))
+
+
+async def _dispatch(scope, receive, send, method: str) -> int:
+    """Serve one HTTP request and return its status"""
+    if method == "OPTIONS":
+        await _send(send, 204)
+        return 204
+
+    # Read before routing and admission so shed and unknown requests are captured too
+    body = await _read_body(receive) if method == "POST" else b""
+    if capture is not None:
+        _capture(scope, method, body)
+
+    admin_route = ADMIN_ROUTES.get(scope["path"])
+    if admin_route is not None:
+        if method != "GET":
+            await _send(send, 405, _encode({"error": "Method not allowed"}))
+            return 405
+        return await admin_route(scope, send)
+
+    route = ROUTES.get(scope["path"])
+    if route is None:
+        await _send(send, 404, _encode({"error": "Not found"}))
+        return 404
+    if method != route[0]:
+        await _send(send, 405, _encode({"error": "Method not allowed"}))
+        return 405
+
+    if admission is None or scope["path"] not in ADMISSION_ROUTES:
+        return await _serve(scope, body, send, method, route[1])
+    try:
+        ticket = await admission.acquire_async()
+    except AdmissionRejected as e:
+        await _send(send, 503, _encode(BUSY_RESPONSE), extra_headers=((b"retry-after", str(e.retry_after).encode()),))
+        return 503
+    with ticket:
+        return await _serve(scope, body, send, method, route[1])
+
+
+async def _serve(scope, body: bytes, send, method: str, handler: Callable[[Any], Awaitable[Response]]) -> int:
+    """Parse the body, run the route handler and send its response"""
+    data = None
+    if method == "POST":
+        try:
+            with _parse_timer.timer():
+                data = json.loads(body)
+        except ValueError:
+            # Flask's get_json raises inside the handler's try block
+            await _send(send, 500, _encode({"error": "Internal server error"}))
+            return 500
+
+    payload, status = await handler(data)
+    if isinstance(payload, str):
+        await _send(send, status, payload.encode(), METRICS_CONTENT_TYPE.encode())
+    elif status == 200 and scope["path"] in NEGOTIATED_ROUTES:
+        if prefers_cbor(_header(scope, b"accept")):
+            body, content_type = encode_response(payload), CBOR_MEDIA_TYPE.encode()
+        else:
+            body, content_type = _encode(payload), b"application/json"
+        await _send(send, status, body, content_type, ((b"vary", b"Accept"),))
+    elif status == 503:
+        # Handlers answer 503 only for a saturated executor
+        retry_after = str(busy_retry_after(admission)).encode()
+        await _send(send, status, _encode(payload), extra_headers=((b"retry-after", retry_after),))
+    else:
+        await _send(send, status, _encode(payload))
+    return status
+
+
+async def app(scope, receive, send) -> None:
+    """ASGI application"""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    method = scope["method"]
+    path = scope["path"]
+    route = path if path in ROUTES or path in ADMIN_ROUTES else "unmatched"
+    in_flight = IN_FLIGHT.labels(route)
+    in_flight.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        status = await _dispatch(scope, receive, send, method)
+    finally:
+        in_flight.dec()
+        REQUEST_DURATION.labels(route, method).observe(time.perf_counter() - start)
+        REQUESTS.labels(route, method, status).inc()
+        if status >= 500:
+            REQUEST_ERRORS.labels(route, method).inc()
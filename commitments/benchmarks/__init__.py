@@ -0,0 +1,5 @@
+"""
+Benchmarks for the ZenLend commitment system
+
+Run from the repository root, e.g. python -m commitments.benchmarks.curve_bench
+"""
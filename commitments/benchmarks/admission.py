@@ -0,0 +1,153 @@
+"""
+Overload behaviour of the Flask app with and without admission control
+
+Each request is a /generate-commitments batch of --items commitments,
+so commitment work rather than HTTP handling dominates the request, as
+it does for the heavy requests admission control protects against.
+Measures the server's capacity with one closed-loop client, then offers
+--overload times that rate open-loop (new connection per request, sent
+on schedule whatever the server does) for --duration seconds, while a
+/health probe runs every 50ms on the priority lane. Run once with
+ZENLEND_ADMISSION_LIMIT=0 and once with admission control on.
+
+Without admission control the queue, and with it latency, grows for as
+long as the overload lasts. With it, excess requests get 503 with
+Retry-After and admitted requests wait at most the queue timeout. The
+run exits with status 1 if the admitted p99 exceeds --p99-budget-ms.
+
+Usage:
+    python -m commitments.benchmarks.admission [--items N] [--overload X] [--duration S] [--queue-timeout S]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from commitments.benchmarks.asgi_load import COMMITMENTS_DIR, SERVERS, _free_port, _request, _wait_for_port, percentile
+
+PATH = "/generate-commitments"
+
+
+def batch_body(items: int) -> bytes:
+    return json.dumps({"items": [
+        {"amount": 1.5 + i, "private_key": f"admission-benchmark-key-{i}"} for i in range(items)
+    ]}).encode()
+
+
+async def _once(port: int, method: str, path: str, body: bytes = b"") -> Tuple[int, float]:
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        status, _ = await _request(reader, writer, method, path, body)
+    finally:
+        writer.close()
+    return status, time.perf_counter() - start
+
+
+async def _capacity(port: int, body: bytes, seconds: float = 2.0) -> float:
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() < start + seconds:
+        await _once(port, "POST", PATH, body)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+async def _overload(port: int, body: bytes, rate: float, duration: float) -> Dict[str, List]:
+    results: Dict[str, List] = {"commit": [], "health": []}
+
+    async def record(kind: str, method: str, path: str, body: bytes = b"") -> None:
+        try:
+            results[kind].append(await _once(port, method, path, body))
+        except (ConnectionError, OSError, asyncio.IncompleteReadError):
+            results[kind].append((0, float("nan")))
+
+    async def health_probe(deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            await record("health", "GET", "/health")
+            await asyncio.sleep(0.05)
+
+    tasks = []
+    start = time.perf_counter()
+    deadline = start + duration
+    probe = asyncio.ensure_future(health_probe(deadline))
+    sent = 0
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        due = int((now - start) * rate) + 1
+        while sent < due:
+            tasks.append(asyncio.ensure_future(record("commit", "POST", PATH, body)))
+            sent += 1
+        await asyncio.sleep(max(0.0, start + sent / rate - time.perf_counter()))
+    await asyncio.gather(probe, *tasks)
+    return results
+
+
+def run(admission: bool, items: int, overload: float, duration: float, queue_timeout: float) -> dict:
+    port = _free_port()
+    command = [part.replace("{port}", str(port)) for part in SERVERS["flask"]]
+    env = dict(os.environ, ZENLEND_COMMITMENT_MODE="ec", ZENLEND_WORKERS="0",
+               ZENLEND_ADMISSION_LIMIT="4" if admission else "0", ZENLEND_ADMISSION_TIMEOUT=str(queue_timeout))
+    process = subprocess.Popen(command, cwd=COMMITMENTS_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_for_port(port)
+        body = batch_body(items)
+        capacity = asyncio.run(_capacity(port, body))
+        results = asyncio.run(_overload(port, body, capacity * overload, duration))
+    finally:
+        process.terminate()
+        process.wait()
+
+    admitted = sorted(latency for status, latency in results["commit"] if status == 200)
+    shed = [latency for status, latency in results["commit"] if status == 503]
+    health = sorted(latency for status, latency in results["health"] if status == 200)
+    return {
+        "capacity": capacity,
+        "offered": len(results["commit"]),
+        "ok": len(admitted),
+        "shed": len(shed),
+        "failed": len(results["commit"]) - len(admitted) - len(shed),
+        "p50": percentile(admitted, 0.50),
+        "p99": percentile(admitted, 0.99),
+        "shed_p99": percentile(sorted(shed), 0.99),
+        "health_p99": percentile(health, 0.99),
+        "health_probes": len(results["health"]),
+        "health_ok": len(health),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100, help="commitments per request")
+    parser.add_argument("--overload", type=float, default=2.0, help="offered load as a multiple of capacity")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--queue-timeout", type=float, default=0.25)
+    parser.add_argument("--p99-budget-ms", type=float, default=1000.0)
+    args = parser.parse_args()
+
+    print(f"offered load {args.overload}x capacity for {args.duration}s, "
+          f"{args.items} ec-mode commitments per request, Flask server\n")
+    print(f"{'admission':<10}{'cap/s':>7}{'sent':>7}{'200':>7}{'503':>7}{'fail':>6}"
+          f"{'p50 ms':>9}{'p99 ms':>9}{'503 p99':>9}{'health p99':>12}")
+    results = {}
+    for admission in (False, True):
+        result = results[admission] = run(admission, args.items, args.overload, args.duration, args.queue_timeout)
+        print(f"{'on' if admission else 'off':<10}{result['capacity']:>7.0f}{result['offered']:>7}{result['ok']:>7}"
+              f"{result['shed']:>7}{result['failed']:>6}{result['p50'] * 1e3:>9.1f}{result['p99'] * 1e3:>9.1f}"
+              f"{result['shed_p99'] * 1e3:>9.1f}{result['health_p99'] * 1e3:>12.1f}")
+
+    if results[True]["p99"] * 1e3 > args.p99_budget_ms:
+        print(f"\nadmitted p99 over budget ({args.p99_budget_ms:.0f}ms)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Concurrent-client latency comparison: Flask (app.py) vs ASGI (asgi.py)
+
+Starts each server in its own subprocess on a local port, drives it with
+concurrent keep-alive clients for a fixed duration, optionally holding
+extra idle keep-alive connections open, and prints throughput and
+latency percentiles side by side.
+
+Usage:
+    python -m commitments.benchmarks.asgi_load [--clients N] [--idle N] [--duration S]
+
+Requires uvicorn for the ASGI server.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+COMMITMENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    "flask": [
+        sys.executable, "-c",
+        "import logging; logging.disable(logging.INFO)\n"
+        "from werkzeug.serving import run_simple\n"
+        "from api import apply_switch_interval\n"
+        "from app import app\n"
+        "apply_switch_interval()\n"
+        "run_simple('127.0.0.1', {port}, app, threaded=True)"
+    ],
+    "asgi": [
+        sys.executable, "-m", "uvicorn", "asgi:app",
+        "--host", "127.0.0.1", "--port", "{port}", "--log-level", "warning"
+    ],
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def _request(reader, writer, method: str, path: str, body: bytes = b"") -> Tuple[int, bool]:
+    """
+    Send one HTTP/1.1 request on a keep-alive connection
+
+    Returns:
+        Tuple of (status, whether the server keeps the connection open)
+    """
+    head = (
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: keep-alive\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    ).encode()
+    writer.write(head + body)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Server closed the connection")
+    status = int(status_line.split()[1])
+    length = 0
+    keep_alive = True
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"connection" and value.strip().lower() == b"close":
+            keep_alive = False
+    if length:
+        await reader.readexactly(length)
+    return status, keep_alive
+
+
+async def _client(port: int, deadline: float, latencies: List[float], errors: List[int], client_id: int) -> None:
+    """Closed-loop client alternating generate and verify requests"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    generate = json.dumps({"amount": 1.5, "private_key": f"load-test-key-{client_id}"}).encode()
+    verify = None
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if verify is None:
+                    status, keep_alive = await _request(reader, writer, "POST", "/generate-commitment", generate)
+                else:
+                    status, keep_alive = await _request(reader, writer, "POST", "/verify-proof", verify)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                errors.append(1)
+                continue
+            latencies.append(time.perf_counter() - start)
+            if not keep_alive:
+                writer.close()
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            if status != 200:
+                errors.append(status)
+            verify = None if verify else b'{"commitment": "0x1", "proof": {"nonce": "0x1", "amount_btc": 1.5}, "amount": 1.5}'
+    finally:
+        writer.close()
+
+
+async def _drive(port: int, clients: int, idle: int, duration: float) -> Dict[str, float]:
+    idle_connections = []
+    for _ in range(idle):
+        idle_connections.append(await asyncio.open_connection("127.0.0.1", port))
+
+    latencies: List[float] = []
+    errors: List[int] = []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(port, deadline, latencies, errors, i) for i in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    for _, writer in idle_connections:
+        writer.close()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+        "max_ms": (latencies[-1] if latencies else float("nan")) * 1e3,
+    }
+
+
+def _wait_for_port(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def run_server_benchmark(name: str, clients: int, idle: int, duration: float) -> Dict[str, float]:
+    """Start one server, drive it and return its latency summary"""
+    port = _free_port()
+    command = [part.replace("{port}", str(port)) for part in SERVERS[name]]
+    process = subprocess.Popen(command, cwd=COMMITMENTS_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_for_port(port)
+        return asyncio.run(_drive(port, clients, idle, duration))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=32, help="concurrent active clients")
+    parser.add_argument("--idle", type=int, default=0, help="extra idle keep-alive connections")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per server")
+    parser.add_argument("--servers", nargs="+", default=list(SERVERS), choices=list(SERVERS))
+    args = parser.parse_args()
+
+    print(f"{args.clients} active clients, {args.idle} idle connections, {args.duration}s per server\n")
+    print(f"{'server':<8}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name in args.servers:
+        result = run_server_benchmark(name, args.clients, args.idle, args.duration)
+        print(f"{name:<8}{result['requests']:>10}{result['errors']:>8}{result['throughput_rps']:>10.0f}"
+              f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['max_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
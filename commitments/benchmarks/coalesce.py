@@ -0,0 +1,99 @@
+"""
+Bursts of identical commitment requests with and without single-flight
+
+Each burst releases --duplicates threads at once, all asking for the
+same commitment, the way a frontend double-fires /generate-commitment.
+Without coalescing every thread computes it; with SingleFlight one does
+and the rest share its result. Reports computations, time per burst
+and that every thread got an equal but independent proof.
+
+Calls go through a CommitmentExecutor with --workers processes, as the
+servers do with ZENLEND_WORKERS. With --workers 0 a commitment is
+computed inline and holds the GIL for less than one thread switch
+interval, so duplicates rarely overlap at all.
+
+Usage:
+    python -m commitments.benchmarks.coalesce [--bursts N] [--duplicates D] [--workers W] [--mode ec|hash]
+"""
+
+import argparse
+import threading
+import time
+
+from commitments.coalesce import SingleFlight, request_digest
+from commitments.executor import CommitmentExecutor
+from commitments.pedersen import (
+    COMMITMENT_MODE_EC,
+    COMMITMENT_MODES,
+    PedersenCommitmentSystem,
+    copy_commitment_result,
+    get_generator_tables,
+    set_commitment_mode
+)
+
+
+def run_bursts(executor: CommitmentExecutor, bursts: int, duplicates: int, coalesce: bool) -> dict:
+    flights = SingleFlight("benchmark", copy_commitment_result)
+    computed = 0
+    count_lock = threading.Lock()
+
+    def compute(amount, private_key):
+        nonlocal computed
+        with count_lock:
+            computed += 1
+        return executor.call('generate_commitment_with_proof', amount, private_key)
+
+    elapsed = 0.0
+    for burst in range(bursts):
+        amount, private_key = 1.5 + burst, f"coalesce-benchmark-key-{burst}"
+        results = [None] * duplicates
+        barrier = threading.Barrier(duplicates + 1)
+
+        def request(slot):
+            barrier.wait()
+            if coalesce:
+                results[slot] = flights.do(request_digest("benchmark", amount, private_key),
+                                           lambda: compute(amount, private_key))[0]
+            else:
+                results[slot] = compute(amount, private_key)
+
+        threads = [threading.Thread(target=request, args=(slot,)) for slot in range(duplicates)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed += time.perf_counter() - start
+
+        assert all(result == results[0] for result in results)
+        assert len({id(proof) for _, proof in results}) == duplicates
+
+    return {"computed": computed, "burst": elapsed / bursts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bursts", type=int, default=50)
+    parser.add_argument("--duplicates", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--mode", choices=COMMITMENT_MODES, default=COMMITMENT_MODE_EC)
+    args = parser.parse_args()
+
+    set_commitment_mode(args.mode)
+    get_generator_tables()
+    executor = CommitmentExecutor(PedersenCommitmentSystem(), workers=args.workers, max_pending=1024)
+    executor.start()
+
+    print(f"{args.bursts} bursts of {args.duplicates} identical requests, mode {args.mode}, {args.workers} workers")
+    baseline = None
+    for label, coalesce in (("independent", False), ("single-flight", True)):
+        result = run_bursts(executor, args.bursts, args.duplicates, coalesce)
+        baseline = baseline or result["burst"]
+        print(f"{label:<14}{result['computed']:6} computed {result['burst'] * 1e3:9.2f}ms per burst"
+              f" ({baseline / result['burst']:.1f}x)")
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Cold-start budget: fresh-process import of app.py plus its first request
+
+Each run starts a new interpreter in commitments/ (as the Vercel build
+does), imports app, and serves one /generate-commitment through the
+Flask test client, so no server or socket is involved. The child
+times the import and the request itself, leaving out interpreter
+startup, and the median over --runs is compared with --budget-ms.
+Exits with status 1 when the budget is exceeded, so CI or a deploy
+script can run it as a check.
+
+--tables first writes a table file with `python -m commitments.tables`
+and points ZENLEND_TABLES_PATH at it; --mode ec makes the first request
+need the generator tables.
+
+Usage:
+    python -m commitments.benchmarks.cold_start [--runs N] [--mode hash|ec] [--tables] [--budget-ms MS]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+COMMITMENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in the child; prints the import and first-request times in seconds
+CHILD = """
+import time
+start = time.perf_counter()
+import logging
+logging.disable(logging.INFO)
+import app
+imported = time.perf_counter()
+response = app.app.test_client().post(
+    "/generate-commitment", json={"amount": 1.5, "private_key": "0x" + "ab" * 32}
+)
+assert response.status_code == 200, response.status_code
+done = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_request": done - imported}))
+"""
+
+
+def run_once(env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", "import json\n" + CHILD],
+        cwd=COMMITMENTS_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--mode", choices=("hash", "ec"), default="hash")
+    parser.add_argument("--tables", action="store_true", help="load generator tables from a table file")
+    parser.add_argument("--budget-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    env = dict(os.environ, ZENLEND_COMMITMENT_MODE=args.mode)
+    env.pop("ZENLEND_TABLES_PATH", None)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.tables:
+            path = os.path.join(tmp, "tables.bin")
+            subprocess.run([sys.executable, "-m", "commitments.tables", path],
+                           cwd=os.path.dirname(COMMITMENTS_DIR), check=True)
+            env["ZENLEND_TABLES_PATH"] = path
+        runs = [run_once(env) for _ in range(args.runs)]
+
+    imports = statistics.median(run["import"] for run in runs)
+    firsts = statistics.median(run["first_request"] for run in runs)
+    total = statistics.median(run["import"] + run["first_request"] for run in runs)
+
+    print(f"mode {args.mode}, tables {'file' if args.tables else 'built'}, median of {args.runs}")
+    print(f"import app:     {imports * 1e3:7.1f}ms")
+    print(f"first request:  {firsts * 1e3:7.1f}ms")
+    print(f"total:          {total * 1e3:7.1f}ms (budget {args.budget_ms:.0f}ms)")
+    if total * 1e3 > args.budget_ms:
+        print("over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Event indexer throughput on synthetic PrivateBTCLending events
+
+Writes --events JSON-RPC emitted events as newline-delimited JSON, then
+indexes the file in memory and into a SQLite checkpoint store, and
+checks that an indexer interrupted midway resumes to the same state.
+
+Usage:
+    python -m commitments.benchmarks.indexer [--events N] [--users U] [--batch B]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from commitments.indexer import (
+    DEPOSITED,
+    EVENT_SELECTORS,
+    LIQUIDATED,
+    MINTED,
+    REPAID,
+    WITHDRAWN,
+    EventIndexer,
+    SQLiteIndexStore,
+    read_event_files
+)
+
+CONTRACT = 0x04c0a5193d58f74fbace4b74dcf65481e734ed1714121bdc571da345540efa05
+
+SELECTORS = {kind: hex(selector) for selector, kind in EVENT_SELECTORS.items()}
+
+
+def write_events(path: str, count: int, users: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    addresses = [hex(rng.getrandbits(251)) for _ in range(users)]
+    block = 100_000
+    with open(path, "w") as f:
+        for i in range(count):
+            if rng.random() < 0.02:
+                block += 1
+            user = rng.choice(addresses)
+            kind = rng.choices((DEPOSITED, MINTED, WITHDRAWN, REPAID, LIQUIDATED), (30, 30, 10, 25, 5))[0]
+            keys = [SELECTORS[kind], user]
+            if kind == LIQUIDATED:
+                keys.append(rng.choice(addresses))
+            value = rng.getrandbits(250) if kind == DEPOSITED else rng.randrange(10**15, 10**19)
+            f.write(json.dumps({
+                "from_address": hex(CONTRACT),
+                "keys": keys,
+                "data": [hex(value), hex(1_700_000_000 + i)],
+                "block_hash": hex(block * 7919),
+                "block_number": block,
+                "transaction_hash": hex(rng.getrandbits(251)),
+            }) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.ndjson")
+        write_events(path, args.events, args.users)
+        print(f"input:   {args.events} events, {os.path.getsize(path) / 1e6:.0f} MB")
+
+        for label, store in (("memory", None), ("sqlite", SQLiteIndexStore(os.path.join(tmp, "full.db")))):
+            indexer = EventIndexer(store, batch_size=args.batch)
+            start = time.perf_counter()
+            indexed = indexer.run(read_event_files([path]))
+            elapsed = time.perf_counter() - start
+            print(f"{label + ':':<9}{indexed / elapsed:,.0f} events/s ({elapsed:.2f}s, {len(indexer.positions)} positions)")
+        expected = indexer.positions
+
+        # Stop partway, then resume over the whole file from the checkpoint
+        with open(path, "rb") as f:
+            head = [line for _, line in zip(range(args.events // 2), f)]
+        resume_path = os.path.join(tmp, "resume.db")
+        EventIndexer(SQLiteIndexStore(resume_path), batch_size=args.batch).run(head[:-1000])
+        resumed = EventIndexer(SQLiteIndexStore(resume_path), batch_size=args.batch)
+        checkpoint = resumed.block_number
+        start = time.perf_counter()
+        resumed.run(read_event_files([path]))
+        assert resumed.positions == expected and resumed.events_applied == args.events
+        print(f"resume:  from block {checkpoint} in {time.perf_counter() - start:.2f}s, state matches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Batch liquidation after a price shock: serial vs streamed in parallel
+
+Opens --positions positions at 1.0 BTC collateral / 0.6 debt, then
+drops the price to 0.5 so every one is liquidatable. Proves them with
+BatchLiquidator inline and with --workers processes, reporting the time
+to the first transaction (when a keeper can start submitting) and to
+the last. --range-proofs adds an "ec"-mode range proof to each
+transaction, which is where worker processes pay off; the hash-only
+rows compare against prepare_liquidation_transaction in a loop. The
+worker pool is started before the clock, as a keeper would keep it.
+
+Usage:
+    python -m commitments.benchmarks.liquidation [--positions N] [--workers W] [--range-proofs]
+"""
+
+import argparse
+import os
+import time
+
+from commitments.integration import ZenLendIntegration
+from commitments.liquidation import BatchLiquidator
+from commitments.pedersen import COMMITMENT_MODE_EC, get_generator_tables, set_commitment_mode
+
+SHOCK_PRICE = 0.5
+
+
+def open_positions(count: int) -> ZenLendIntegration:
+    integration = ZenLendIntegration()
+    for i in range(count):
+        address = f"0x{i + 1:064x}"
+        integration.prepare_deposit_transaction(address, 1.0)
+        integration.prepare_mint_transaction(address, 0.6)
+        integration.confirm_mint(address, 0.6)
+    return integration
+
+
+def run_batch(count: int, workers: int, range_proofs: bool) -> dict:
+    integration = open_positions(count)
+    with BatchLiquidator(integration, workers=workers, range_proofs=range_proofs) as liquidator:
+        liquidator.start()
+        start = time.perf_counter()
+        first = None
+        transactions = []
+        for transaction in integration.prepare_batch_liquidation(SHOCK_PRICE, liquidator=liquidator):
+            if first is None:
+                first = time.perf_counter() - start
+            transactions.append(transaction)
+        total = time.perf_counter() - start
+
+    assert len(transactions) == count and not liquidator.skipped
+    # Positions stay until each liquidation is confirmed
+    assert len(integration.liquidatable_positions(SHOCK_PRICE)) == count
+    for transaction in transactions:
+        assert integration.confirm_liquidation(transaction["calldata"][0])
+    assert not integration.liquidatable_positions(SHOCK_PRICE)
+    if range_proofs:
+        assert integration.commitment_system.verify_aggregated_proofs(
+            [transaction["proof_data"]["range_proof"] for transaction in transactions]
+        )
+    return {"first": first, "total": total}
+
+
+def run_serial(count: int) -> dict:
+    integration = open_positions(count)
+    start = time.perf_counter()
+    first = None
+    for address in integration.liquidatable_positions(SHOCK_PRICE):
+        debt = integration.user_debts[address] / SHOCK_PRICE / 100_000_000
+        integration.prepare_liquidation_transaction("0xkeeper", address, debt)
+        if first is None:
+            first = time.perf_counter() - start
+    return {"first": first, "total": time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--positions", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--range-proofs", action="store_true")
+    args = parser.parse_args()
+
+    set_commitment_mode(COMMITMENT_MODE_EC)
+    get_generator_tables()
+
+    print(f"{args.positions} positions liquidated at price {SHOCK_PRICE}, "
+          f"{'range + hash' if args.range_proofs else 'hash'} proofs, {os.cpu_count()} CPUs")
+    rows = []
+    if not args.range_proofs:
+        rows.append(("serial prepare_liquidation", run_serial(args.positions)))
+    rows.append(("batch inline", run_batch(args.positions, 0, args.range_proofs)))
+    rows.append((f"batch {args.workers} workers", run_batch(args.positions, args.workers, args.range_proofs)))
+    for label, result in rows:
+        print(f"{label:<28} first {result['first'] * 1e3:9.1f}ms  all {result['total'] * 1e3:9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Liquidation index vs scanning every position on a price tick
+
+Usage:
+    python -m commitments.benchmarks.liquidation_index [--positions N]
+"""
+
+import argparse
+import random
+import time
+
+from commitments.liquidation_index import LIQUIDATION_THRESHOLD, LiquidationIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--positions", type=int, default=100_000)
+    parser.add_argument("--ticks", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    positions = {
+        f"0x{i:064x}": (rng.randrange(10**7, 10**9), rng.randrange(10**6, 10**9))
+        for i in range(args.positions)
+    }
+
+    index = LiquidationIndex()
+    start = time.perf_counter()
+    for address, (collateral, debt) in positions.items():
+        index.update(address, collateral, debt)
+    elapsed = time.perf_counter() - start
+    print(f"build:   {args.positions} positions in {elapsed:.2f}s")
+
+    prices = [rng.uniform(5.0, 50.0) for _ in range(args.ticks)]
+
+    start = time.perf_counter()
+    for price in prices:
+        scanned = [a for a, (c, d) in positions.items() if c * price < d * LIQUIDATION_THRESHOLD]
+    scan = (time.perf_counter() - start) / args.ticks
+
+    start = time.perf_counter()
+    for price in prices:
+        indexed = index.liquidatable_at(price)
+    indexed_time = (time.perf_counter() - start) / args.ticks
+    assert set(indexed) == set(scanned)
+    print(f"tick:    scan {scan * 1e3:.2f}ms  index {indexed_time * 1e3:.3f}ms  ({len(indexed)} liquidatable at last price)")
+
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        index.worst(10)
+    print(f"worst10: {(time.perf_counter() - start) / args.ticks * 1e6:.1f}us")
+
+    addresses = list(positions)
+    start = time.perf_counter()
+    for _ in range(10_000):
+        index.update(rng.choice(addresses), rng.randrange(10**7, 10**9), rng.randrange(10**6, 10**9))
+    print(f"update:  {(time.perf_counter() - start) / 10_000 * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
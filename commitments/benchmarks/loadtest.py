@@ -0,0 +1,389 @@
+"""
+Open-loop load generator and traffic replay for the commitment API
+
+`generate` sends synthetic traffic on a fixed schedule, whatever the
+server does, so a slow server builds a queue instead of slowing the
+client down. The schedule is controlled by:
+
+- --rates: the arrival rate of each step, each lasting --step seconds.
+  Stepping the rate up shows where throughput stops following it and
+  latency collapses.
+- --arrival: poisson or uniform arrivals.
+- --mix: weights of /generate-commitment, /verify-proof and
+  /generate-commitments requests.
+- --batch-sizes: the item count distribution of /generate-commitments.
+
+Verify requests use real proofs generated during a short warm-up.
+
+`replay` re-sends a file recorded by the capture hook
+(ZENLEND_CAPTURE_PATH, see capture.py) with its original timing,
+scaled by --speed.
+
+Either mode targets --url, or starts a local server with --server flask
+or asgi, configured by the caller's ZENLEND_* environment. Every request
+uses a new connection, since the werkzeug server does not keep them
+alive. At most --max-outstanding requests are open at once; anything
+beyond that counts as a client-side drop, not a server error.
+
+Output is a table per --interval showing:
+- requests sent, and responses completed;
+- throughput, as successful responses per second;
+- error rate of the requests sent in that interval, counting 5xx,
+  connection failures and drops (4xx is the payload's fault);
+- latency percentiles of those requests.
+
+A per-step summary follows for generate runs. --json writes every
+request's outcome.
+
+Usage:
+    python -m commitments.benchmarks.loadtest generate [--rates R [R ...]] [--step S] [--mix generate=6,verify=3,batch=1]
+                                                       [--batch-sizes 1:5,10:3,100:2] [--arrival poisson|uniform]
+    python -m commitments.benchmarks.loadtest replay CAPTURE [--speed X]
+    common: [--url http://127.0.0.1:5000 | --server flask|asgi] [--interval S] [--json FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import time
+import urllib.request
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from commitments.benchmarks.asgi_load import COMMITMENTS_DIR, SERVERS, _free_port, _wait_for_port, percentile
+from commitments.capture import read_capture
+
+KINDS = {
+    "generate": "/generate-commitment",
+    "verify": "/verify-proof",
+    "batch": "/generate-commitments",
+}
+
+# Status recorded for connection failures and for client-side drops
+STATUS_FAILED = 0
+STATUS_DROPPED = -1
+
+
+class Planned(NamedTuple):
+    """A request and the offset in seconds at which to send it"""
+    offset: float
+    kind: str
+    method: str
+    path: str
+    body: bytes = b""
+    content_type: Optional[str] = "application/json"
+    accept: Optional[str] = None
+    step: int = 0
+
+
+class Outcome(NamedTuple):
+    """What happened to a planned request; latency is NaN if it got no response"""
+    offset: float
+    kind: str
+    step: int
+    status: int
+    latency: float
+
+
+def parse_weights(spec: str, key_type=str) -> Dict:
+    """Parse "a=3,b=1" or "1:5,10:3" into {key: weight}"""
+    weights = {}
+    for part in spec.split(","):
+        key, sep, weight = part.replace(":", "=").partition("=")
+        if not sep:
+            raise ValueError(f"Expected key=weight, got {part!r}")
+        weights[key_type(key.strip())] = float(weight)
+    if not weights or any(w < 0 for w in weights.values()) or not sum(weights.values()):
+        raise ValueError(f"Weights must be non-negative and not all zero: {spec!r}")
+    return weights
+
+
+def _generate_body(rng: random.Random) -> bytes:
+    return json.dumps({
+        "amount": round(rng.uniform(0.01, 10.0), 8),
+        "private_key": f"loadtest-key-{rng.getrandbits(48):012x}"
+    }).encode()
+
+
+def synthetic_plan(
+    rates: Sequence[float],
+    step: float,
+    mix: Dict[str, float],
+    batch_sizes: Dict[int, float],
+    proofs: Sequence[bytes],
+    arrival: str = "poisson",
+    seed: int = 0
+) -> List[Planned]:
+    """Open-loop schedule of synthetic requests for each rate step in turn"""
+    unknown = set(mix) - set(KINDS)
+    if unknown:
+        raise ValueError(f"Unknown request kinds: {sorted(unknown)}")
+    if mix.get("verify") and not proofs:
+        raise ValueError("Verify traffic needs at least one proof")
+
+    rng = random.Random(seed)
+    kinds, kind_weights = zip(*mix.items())
+    sizes, size_weights = zip(*batch_sizes.items())
+    plan = []
+    for index, rate in enumerate(rates):
+        if rate <= 0:
+            raise ValueError("Rates must be positive")
+        start, end = index * step, (index + 1) * step
+        offset = start
+        while True:
+            offset += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+            if offset >= end:
+                break
+            kind = rng.choices(kinds, kind_weights)[0]
+            if kind == "generate":
+                body = _generate_body(rng)
+            elif kind == "verify":
+                body = rng.choice(proofs)
+            else:
+                items = [json.loads(_generate_body(rng)) for _ in range(rng.choices(sizes, size_weights)[0])]
+                body = json.dumps({"items": items}).encode()
+            plan.append(Planned(offset, kind, "POST", KINDS[kind], body, step=index))
+    return plan
+
+
+def replay_plan(path: str, speed: float = 1.0) -> List[Planned]:
+    """Schedule of a capture file, its gaps divided by speed"""
+    if speed <= 0:
+        raise ValueError("Speed must be positive")
+    entries = sorted(read_capture(path), key=lambda entry: entry["ts"])
+    if not entries:
+        raise ValueError(f"{path} has no requests")
+    paths = {route: kind for kind, route in KINDS.items()}
+    first = entries[0]["ts"]
+    return [
+        Planned((entry["ts"] - first) / speed, paths.get(entry["path"].split("?")[0], entry["path"]),
+                entry["method"], entry["path"], entry["body"], entry.get("content_type"), entry.get("accept"))
+        for entry in entries
+    ]
+
+
+def fetch_proofs(base_url: str, count: int = 16) -> List[bytes]:
+    """Generate count commitments and return valid /verify-proof bodies for them"""
+    proofs = []
+    rng = random.Random(1)
+    for _ in range(count):
+        body = _generate_body(rng)
+        request = urllib.request.Request(f"{base_url}/generate-commitment", body,
+                                         {"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=30) as response:
+            result = json.loads(response.read())
+        proofs.append(json.dumps({"commitment": result["commitment"], "proof": result["proof"],
+                                  "amount": json.loads(body)["amount"]}).encode())
+    return proofs
+
+
+async def _send(host: str, port: int, item: Planned, timeout: float) -> int:
+    """Send one request on a new connection and return the response status"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        head = [f"{item.method} {item.path} HTTP/1.1", f"Host: {host}", "Connection: close",
+                f"Content-Length: {len(item.body)}"]
+        if item.content_type:
+            head.append(f"Content-Type: {item.content_type}")
+        if item.accept:
+            head.append(f"Accept: {item.accept}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + item.body)
+        await writer.drain()
+
+        async def read_response() -> int:
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionError("Server closed the connection")
+            length = None
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value)
+            if length is None:
+                await reader.read()
+            else:
+                await reader.readexactly(length)
+            return int(status_line.split()[1])
+
+        return await asyncio.wait_for(read_response(), timeout)
+    finally:
+        writer.close()
+
+
+async def execute(
+    plan: Sequence[Planned],
+    host: str,
+    port: int,
+    max_outstanding: int = 512,
+    timeout: float = 30.0
+) -> List[Outcome]:
+    """Send every planned request on schedule and collect the outcomes"""
+    outcomes: List[Outcome] = []
+    outstanding = 0
+
+    async def fire(item: Planned) -> None:
+        nonlocal outstanding
+        outstanding += 1
+        start = time.perf_counter()
+        try:
+            status = await _send(host, port, item, timeout)
+            latency = time.perf_counter() - start
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, IndexError):
+            status, latency = STATUS_FAILED, float("nan")
+        finally:
+            outstanding -= 1
+        outcomes.append(Outcome(item.offset, item.kind, item.step, status, latency))
+
+    tasks = []
+    start = time.perf_counter()
+    for item in sorted(plan, key=lambda planned: planned.offset):
+        delay = start + item.offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if outstanding >= max_outstanding:
+            outcomes.append(Outcome(item.offset, item.kind, item.step, STATUS_DROPPED, float("nan")))
+            continue
+        tasks.append(asyncio.ensure_future(fire(item)))
+    await asyncio.gather(*tasks)
+    return outcomes
+
+
+def is_error(status: int) -> bool:
+    """Failures, drops and 5xx count as errors"""
+    return status <= 0 or status >= 500
+
+
+def summarize(outcomes: Sequence[Outcome], duration: float) -> dict:
+    """Throughput, error rate and latency percentiles of a set of outcomes"""
+    latencies = sorted(o.latency for o in outcomes if not is_error(o.status))
+    completed = [o for o in outcomes if not math.isnan(o.latency)]
+    errors = sum(1 for o in outcomes if is_error(o.status))
+    return {
+        "sent": len(outcomes),
+        "completed": len(completed),
+        "ok": len(latencies),
+        "throughput": len(latencies) / duration if duration > 0 else float("nan"),
+        "error_rate": errors / len(outcomes) if outcomes else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p90": percentile(latencies, 0.90),
+        "p99": percentile(latencies, 0.99),
+    }
+
+
+def timeline(outcomes: Sequence[Outcome], interval: float) -> List[Tuple[float, dict]]:
+    """
+    summarize() per interval of send time
+
+    Throughput counts responses completed within the interval, so it
+    tracks what the server delivered even while latency grows.
+    """
+    if not outcomes:
+        return []
+    end = max(o.offset + (0 if math.isnan(o.latency) else o.latency) for o in outcomes)
+    rows = []
+    for index in range(int(end // interval) + 1):
+        low, high = index * interval, (index + 1) * interval
+        sent = [o for o in outcomes if low <= o.offset < high]
+        row = summarize(sent, interval)
+        done = sum(1 for o in outcomes if not is_error(o.status) and low <= o.offset + o.latency < high)
+        row["completed"] = sum(1 for o in outcomes if not math.isnan(o.latency) and low <= o.offset + o.latency < high)
+        row["throughput"] = done / interval
+        rows.append((low, row))
+    return rows
+
+
+def _ms(seconds: float) -> str:
+    return "-" if math.isnan(seconds) else f"{seconds * 1e3:.1f}"
+
+
+def print_table(label: str, rows: Sequence[Tuple[str, dict]]) -> None:
+    print(f"{label:>8}{'sent':>7}{'done':>7}{'ok/s':>8}{'err %':>7}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}")
+    for key, row in rows:
+        print(f"{key:>8}{row['sent']:>7}{row['completed']:>7}{row['throughput']:>8.1f}{row['error_rate'] * 100:>7.1f}"
+              f"{_ms(row['p50']):>9}{_ms(row['p90']):>9}{_ms(row['p99']):>9}")
+
+
+def _start_server(name: str) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    command = [part.replace("{port}", str(port)) for part in SERVERS[name]]
+    process = subprocess.Popen(command, cwd=COMMITMENTS_DIR, env=dict(os.environ),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_for_port(port)
+    except RuntimeError:
+        process.terminate()
+        raise
+    return process, f"http://127.0.0.1:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = argparse.ArgumentParser(add_help=False)
+    group = target.add_mutually_exclusive_group()
+    group.add_argument("--url", default="http://127.0.0.1:5000", help="server to drive")
+    group.add_argument("--server", choices=list(SERVERS), help="start a local server instead of using --url")
+    target.add_argument("--interval", type=float, default=1.0, help="seconds per timeline row")
+    target.add_argument("--max-outstanding", type=int, default=512)
+    target.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for each response")
+    target.add_argument("--json", help="write every request's outcome to this file")
+    modes = parser.add_subparsers(dest="mode", required=True)
+
+    generate = modes.add_parser("generate", parents=[target], help="synthetic open-loop traffic")
+    generate.add_argument("--rates", type=float, nargs="+", default=[5.0, 10.0, 20.0, 40.0],
+                          help="requests per second of each step")
+    generate.add_argument("--step", type=float, default=5.0, help="seconds per rate step")
+    generate.add_argument("--mix", default="generate=6,verify=3,batch=1")
+    generate.add_argument("--batch-sizes", default="1:5,10:3,100:2", help="items:weight of batch requests")
+    generate.add_argument("--arrival", choices=("poisson", "uniform"), default="poisson")
+    generate.add_argument("--seed", type=int, default=0)
+
+    replay = modes.add_parser("replay", parents=[target], help="re-send a captured request log")
+    replay.add_argument("capture", help="file written with ZENLEND_CAPTURE_PATH")
+    replay.add_argument("--speed", type=float, default=1.0, help="replay this many times faster")
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.url
+    if args.server:
+        process, base_url = _start_server(args.server)
+    try:
+        url = urlsplit(base_url)
+        if args.mode == "generate":
+            mix = parse_weights(args.mix)
+            proofs = fetch_proofs(base_url) if mix.get("verify") else []
+            plan = synthetic_plan(args.rates, args.step, mix, parse_weights(args.batch_sizes, int),
+                                  proofs, args.arrival, args.seed)
+        else:
+            plan = replay_plan(args.capture, args.speed)
+        print(f"{len(plan)} requests over {max(p.offset for p in plan):.1f}s to {base_url}\n")
+        outcomes = asyncio.run(execute(plan, url.hostname, url.port or 80, args.max_outstanding, args.timeout))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print_table("t (s)", [(f"{start:g}", row) for start, row in timeline(outcomes, args.interval)])
+    if args.mode == "generate":
+        print()
+        steps = [(f"{rate:g}/s", summarize([o for o in outcomes if o.step == index], args.step))
+                 for index, rate in enumerate(args.rates)]
+        print_table("rate", steps)
+    total = summarize(outcomes, max(o.offset for o in outcomes) or 1.0)
+    print(f"\ntotal: {total['sent']} sent, {total['ok']} ok, {total['error_rate'] * 100:.1f}% errors, "
+          f"p50 {_ms(total['p50'])}ms, p99 {_ms(total['p99'])}ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([dict(o._asdict(), latency=None if math.isnan(o.latency) else o.latency)
+                       for o in outcomes], f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Commitment Merkle tree: build, single and batched updates, proofs
+
+Counts Pedersen hashes alongside wall time, since hashing dominates and
+its count is what batching reduces.
+
+Usage:
+    python -m commitments.benchmarks.merkle [--leaves N] [--batch B] [--sqlite PATH] [--cache-size C]
+"""
+
+import argparse
+import random
+import time
+
+from commitments.curve import FIELD_PRIME, pedersen_hash
+from commitments.merkle import MerkleTree, SQLiteNodeStore, verify_proof
+
+
+class CountingHash:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, a: int, b: int) -> int:
+        self.calls += 1
+        return pedersen_hash(a, b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leaves", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--sqlite", help="back the tree with a SQLite node store at this path")
+    parser.add_argument("--cache-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    hasher = CountingHash()
+    store = SQLiteNodeStore(args.sqlite) if args.sqlite else None
+    tree = MerkleTree(store, cache_size=args.cache_size, hash_function=hasher)
+    keys = [rng.getrandbits(251) for _ in range(args.leaves)]
+
+    pedersen_hash(0, 0)
+    start = time.perf_counter()
+    for i in range(0, len(keys), args.batch):
+        tree.update_many((key, rng.randrange(1, FIELD_PRIME)) for key in keys[i:i + args.batch])
+    elapsed = time.perf_counter() - start
+    print(f"build:  {args.leaves} leaves in {elapsed:.1f}s, {hasher.calls / args.leaves:.1f} hashes/leaf")
+
+    sample = rng.sample(keys, args.batch)
+
+    hasher.calls = 0
+    start = time.perf_counter()
+    for key in sample:
+        tree.update(key, rng.randrange(1, FIELD_PRIME))
+    single = time.perf_counter() - start
+    single_hashes = hasher.calls
+    print(f"update: {single / len(sample) * 1e3:.2f}ms, {single_hashes / len(sample):.1f} hashes")
+
+    hasher.calls = 0
+    start = time.perf_counter()
+    tree.update_many((key, rng.randrange(1, FIELD_PRIME)) for key in sample)
+    batched = time.perf_counter() - start
+    print(f"batch:  {len(sample)} updates in {batched * 1e3:.0f}ms ({batched / len(sample) * 1e3:.2f}ms each), "
+          f"{hasher.calls} hashes vs {single_hashes} one at a time")
+
+    start = time.perf_counter()
+    proofs = [(key, tree.prove(key)) for key in sample[:100]]
+    prove_time = (time.perf_counter() - start) / len(proofs)
+    start = time.perf_counter()
+    assert all(verify_proof(root, key, value, proof) for key, (root, value, proof) in proofs)
+    verify_time = (time.perf_counter() - start) / len(proofs)
+    depth = sum(len(proof) for _, (_, _, proof) in proofs) / len(proofs)
+    print(f"proof:  {depth:.1f} nodes, prove {prove_time * 1e6:.0f}us, verify {verify_time * 1e3:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Online commit_btc_amount latency with and without a precomputed nonce pool
+
+The pool is filled up front so the online numbers measure only the
+value-dependent work; the refill cost per nonce is reported separately.
+
+Usage:
+    python -m commitments.benchmarks.nonce_pool [--commits N] [--mode ec|hash]
+"""
+
+import argparse
+import time
+
+from commitments.nonce_pool import NoncePool
+from commitments.pedersen import (
+    COMMITMENT_MODE_EC,
+    COMMITMENT_MODES,
+    PedersenCommitmentSystem,
+    get_generator_tables,
+    set_commitment_mode
+)
+
+
+def time_commits(system: PedersenCommitmentSystem, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        system.commit_btc_amount(0.5 + i * 1e-4)
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commits", type=int, default=2000)
+    parser.add_argument("--mode", choices=COMMITMENT_MODES, default=COMMITMENT_MODE_EC)
+    args = parser.parse_args()
+
+    set_commitment_mode(args.mode)
+    get_generator_tables()
+
+    inline = time_commits(PedersenCommitmentSystem(), args.commits)
+
+    pool = NoncePool(size=args.commits, background=False)
+    start = time.perf_counter()
+    pool.fill()
+    refill = (time.perf_counter() - start) / args.commits
+    pooled = time_commits(PedersenCommitmentSystem(nonce_pool=pool), args.commits)
+    assert pool.misses == 0
+
+    print(f"mode:    {args.mode}")
+    print(f"inline:  {inline * 1e6:8.1f}us per commitment")
+    print(f"pooled:  {pooled * 1e6:8.1f}us per commitment ({inline / pooled:.1f}x)")
+    print(f"refill:  {refill * 1e6:8.1f}us per nonce, offline")
+
+
+if __name__ == "__main__":
+    main()
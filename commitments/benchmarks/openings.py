@@ -0,0 +1,72 @@
+"""
+Batch opening verification against checking each opening
+
+Makes --count ec-mode commitments, spoils --bad of their openings, and
+times verify_openings_batch with the commitments given as x-coordinate
+felts (what the API hands out) and as (x, y) points (what CommitmentStore
+and the position backend keep), against calling verify_commitment_opening
+on each. Points go through the combined check, bisected when it fails;
+x-coordinates are checked one by one, since lifting them costs a square
+root each.
+
+Usage:
+    python -m commitments.benchmarks.openings [--count N ...] [--bad B]
+"""
+
+import argparse
+import random
+import time
+
+from commitments.pedersen import (
+    COMMITMENT_MODE_EC,
+    PedersenCommitmentSystem,
+    get_generator_tables,
+    set_commitment_mode
+)
+
+
+def make_openings(system: PedersenCommitmentSystem, count: int, bad: int) -> tuple:
+    """(x-coordinate openings, point openings) of count commitments, bad of them spoiled"""
+    spoiled = set(random.sample(range(count), bad))
+    openings = []
+    points = []
+    for index in range(count):
+        commitment = system.commit_btc_amount(random.uniform(0.001, 100.0))
+        value = commitment.value + (index in spoiled)
+        openings.append((commitment.commitment, value, commitment.nonce))
+        points.append(((commitment.commitment, commitment.commitment_y), value, commitment.nonce))
+    return openings, points
+
+
+def timed(operation) -> tuple:
+    start = time.perf_counter()
+    result = operation()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, nargs="+", default=[64, 512, 2048])
+    parser.add_argument("--bad", type=int, default=0)
+    args = parser.parse_args()
+
+    set_commitment_mode(COMMITMENT_MODE_EC)
+    get_generator_tables()
+    system = PedersenCommitmentSystem()
+
+    print(f"ec-mode openings, {args.bad} bad per batch")
+    for count in args.count:
+        openings, points = make_openings(system, count, args.bad)
+        x_time, x_results = timed(lambda: system.verify_openings_batch(openings))
+        point_time, point_results = timed(lambda: system.verify_openings_batch(points))
+        single_time, single_results = timed(
+            lambda: [system.verify_commitment_opening(*opening) for opening in openings]
+        )
+        assert x_results == point_results == single_results
+        assert single_results.count(False) == args.bad
+        print(f"{count:6} openings  x-coordinates {x_time:7.3f}s  points {point_time:7.3f}s"
+              f"  individual {single_time:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Position store throughput and cold-start time
+
+Writes N synthetic positions through SQLitePositionBackend, then times
+a fresh ZenLendIntegration preloading them from the database file, and
+a read-through lookup of a single position without preloading.
+
+Usage:
+    python -m commitments.benchmarks.position_store [--positions N] [--batch-size N]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from commitments.integration import ZenLendIntegration
+from commitments.positions import PositionRecord, SQLitePositionBackend, health_ratio
+from commitments.store import FELT_BYTES
+
+
+def _records(count: int):
+    for i in range(count):
+        value = 100_000_000 + i
+        debt = (i % 7) * 30_000_000
+        yield PositionRecord(
+            f"0x{i:064x}",
+            value.to_bytes(FELT_BYTES, "big"),
+            (i * 7919).to_bytes(FELT_BYTES, "big"),
+            (i * 104729).to_bytes(FELT_BYTES, "big"),
+            debt,
+            health_ratio(value, debt)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--positions", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "positions.db")
+
+        backend = SQLitePositionBackend(path, batch_size=args.batch_size, flush_interval=None)
+        start = time.perf_counter()
+        for record in _records(args.positions):
+            backend.upsert(record)
+        backend.close()
+        elapsed = time.perf_counter() - start
+        print(f"write:      {args.positions} positions in {elapsed:.2f}s ({args.positions / elapsed:,.0f}/s)")
+
+        start = time.perf_counter()
+        integration = ZenLendIntegration(SQLitePositionBackend(path), preload=True)
+        elapsed = time.perf_counter() - start
+        print(f"cold start: {len(integration.user_commitments)} positions in {elapsed:.2f}s")
+
+        start = time.perf_counter()
+        lazy = ZenLendIntegration(SQLitePositionBackend(path))
+        info = lazy.get_user_commitment(f"0x{args.positions // 2:064x}")
+        elapsed = time.perf_counter() - start
+        print(f"lazy start: first lookup {'hit' if info else 'miss'} in {elapsed * 1e3:.2f}ms")
+
+        start = time.perf_counter()
+        at_risk = integration.backend.below_health_ratio(1.5, limit=100)
+        elapsed = time.perf_counter() - start
+        print(f"health idx: {len(at_risk)} positions below 1.5 in {elapsed * 1e3:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
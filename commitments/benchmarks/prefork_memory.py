@@ -0,0 +1,136 @@
+"""
+Per-worker memory of the pre-fork server, shared vs private tables
+
+Starts serve.py in "ec" mode twice: once with the tables mapped in the
+master and shared, once with --no-share-tables so each worker builds its
+own on first use. Each server is warmed with concurrent
+/generate-commitment requests. The benchmark then reads every worker's
+/proc/<pid>/smaps_rollup. USS (private clean + dirty) is what each extra
+worker costs, and PSS splits shared pages evenly between the processes
+mapping them. Linux only.
+
+Exits with status 1 when the shared-tables USS per worker exceeds
+--budget-mb, or when sharing does not save private memory.
+
+Usage:
+    python -m commitments.benchmarks.prefork_memory [--workers N] [--requests R] [--budget-mb MB]
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+COMMITMENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def smaps_kb(pid: int) -> Dict[str, int]:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields
+
+
+def children_of(pid: int) -> List[int]:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def post(port: int, index: int) -> str:
+    body = json.dumps({"amount": 1.5, "private_key": f"benchmark-key-{index:08d}"}).encode()
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/generate-commitment", body, {"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())["commitment"]
+
+
+def measure(share: bool, workers: int, requests: int) -> dict:
+    port = _free_port()
+    command = [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+    if not share:
+        command.append("--no-share-tables")
+    env = dict(os.environ, ZENLEND_COMMITMENT_MODE="ec", ZENLEND_WORKERS="0")
+    env.pop("ZENLEND_TABLES_PATH", None)
+    server = subprocess.Popen(command, cwd=COMMITMENTS_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        start = time.perf_counter()
+        while True:
+            try:
+                post(port, 0)
+                break
+            except OSError:
+                if server.poll() is not None or time.perf_counter() - start > 30:
+                    raise RuntimeError("server did not start")
+                time.sleep(0.05)
+        ready = time.perf_counter() - start
+
+        with ThreadPoolExecutor(workers * 2) as pool:
+            commitments = list(pool.map(lambda i: post(port, i), range(requests)))
+
+        pids = children_of(server.pid)
+        usage = [smaps_kb(pid) for pid in pids]
+        master = smaps_kb(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    uss = [u["Private_Clean"] + u["Private_Dirty"] for u in usage]
+    return {
+        "ready": ready,
+        "uss": sum(uss) / len(uss),
+        "pss": sum(u["Pss"] for u in usage) / len(usage),
+        "rss": sum(u["Rss"] for u in usage) / len(usage),
+        "master_pss": master["Pss"],
+        "commitments": commitments,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--budget-mb", type=float, default=12.0, help="USS per worker allowed with shared tables")
+    args = parser.parse_args()
+
+    results = {label: measure(share, args.workers, args.requests)
+               for label, share in (("private", False), ("shared", True))}
+    assert results["private"]["commitments"] == results["shared"]["commitments"]
+
+    print(f"{args.workers} workers, {args.requests} ec-mode requests; per-worker averages in MB")
+    print(f"{'tables':<9}{'USS':>8}{'PSS':>8}{'RSS':>8}{'master PSS':>12}{'first response':>16}")
+    for label, result in results.items():
+        print(f"{label:<9}{result['uss'] / 1024:8.1f}{result['pss'] / 1024:8.1f}{result['rss'] / 1024:8.1f}"
+              f"{result['master_pss'] / 1024:12.1f}{result['ready'] * 1e3:14.0f}ms")
+    saved = results["private"]["uss"] - results["shared"]["uss"]
+    print(f"shared tables save {saved / 1024:.2f} MB of private memory per worker")
+
+    failed = False
+    if results["shared"]["uss"] / 1024 > args.budget_mb:
+        print(f"shared-tables USS per worker over budget ({args.budget_mb:.1f} MB)")
+        failed = True
+    if saved <= 0:
+        print("shared tables do not reduce private memory")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
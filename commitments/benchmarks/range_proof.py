@@ -0,0 +1,71 @@
+"""
+Aggregated range proof cost against the number of aggregated positions
+
+For each aggregation size m, times proving, verifying and batch
+verifying --batch proofs of m positions' solvency, and reports the
+proof size next to what m separate proofs would take.
+
+Usage:
+    python -m commitments.benchmarks.range_proof [--max-positions M] [--batch K] [--repeat R]
+"""
+
+import argparse
+import time
+
+from commitments.pedersen import COMMITMENT_MODE_EC, PedersenCommitmentSystem, set_commitment_mode
+from commitments.range_proof import RangeProof, get_vector_generators
+
+
+def _best(op, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        op()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-positions", type=int, default=16)
+    parser.add_argument("--batch", type=int, default=4, help="proofs per batch verification")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    set_commitment_mode(COMMITMENT_MODE_EC)
+    system = PedersenCommitmentSystem()
+
+    start = time.perf_counter()
+    get_vector_generators(64 * args.max_positions)
+    print(f"generators: {64 * args.max_positions} pairs in {time.perf_counter() - start:.2f}s (once per process)")
+
+    print(f"{'m':>4}{'prove ms':>12}{'verify ms':>12}{'batch/proof ms':>16}{'bytes':>8}{'m x single':>12}")
+    single_size = None
+    m = 1
+    while m <= args.max_positions:
+        commitments = [system.commit_btc_amount(2.0 + i) for i in range(m)]
+        debts = [1.0] * m
+
+        proof = None
+
+        def prove():
+            nonlocal proof
+            proof = system.generate_aggregated_solvency_proof(commitments, debts)
+
+        prove_time = _best(prove, args.repeat)
+        assert system.verify_aggregated_proofs([proof])
+        verify_time = _best(lambda: system.verify_aggregated_proofs([proof]), args.repeat)
+
+        batch = [system.generate_aggregated_solvency_proof(commitments, debts) for _ in range(args.batch)]
+        batch_time = _best(lambda: system.verify_aggregated_proofs(batch), args.repeat)
+
+        size = RangeProof.from_dict(proof["range_proof"]).size_bytes()
+        if single_size is None:
+            single_size = size
+        print(f"{m:>4}{prove_time * 1e3:>12.1f}{verify_time * 1e3:>12.1f}"
+              f"{batch_time / args.batch * 1e3:>16.1f}{size:>8}{single_size * m:>12}")
+        m *= 2
+
+
+if __name__ == "__main__":
+    main()
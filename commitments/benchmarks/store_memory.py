@@ -0,0 +1,63 @@
+"""
+Bytes per position: dict of Commitment dataclasses vs CommitmentStore
+
+Usage:
+    python -m commitments.benchmarks.store_memory [--positions N]
+"""
+
+import argparse
+import secrets
+import tracemalloc
+
+from commitments.curve import CURVE_ORDER
+from commitments.pedersen import STARKNET_PRIME, Commitment
+from commitments.store import CommitmentStore
+
+
+def _positions(count: int):
+    """Random but realistic positions: 64-bit satoshi values, full-width felts"""
+    for i in range(count):
+        yield (
+            f"0x{i:064x}",
+            secrets.randbelow(2**51),
+            secrets.randbelow(CURVE_ORDER),
+            secrets.randbelow(STARKNET_PRIME)
+        )
+
+
+def measure(factory, count: int) -> int:
+    """Bytes still allocated after filling the mapping returned by factory"""
+    tracemalloc.start()
+    mapping = factory()
+    for address, value, nonce, commitment in _positions(count):
+        mapping[address] = Commitment(value=value, nonce=nonce, commitment=commitment)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del mapping
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--positions", type=int, default=200_000)
+    args = parser.parse_args()
+
+    # Address strings are the same in both layouts; count them separately
+    tracemalloc.start()
+    keys = [f"0x{i:064x}" for i in range(args.positions)]
+    key_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    key_bytes -= len(keys) * 8  # the list itself
+    del keys
+
+    dict_bytes = measure(dict, args.positions) - key_bytes
+    store_bytes = measure(CommitmentStore, args.positions) - key_bytes
+
+    print(f"{args.positions} positions (address strings excluded, {key_bytes / args.positions:.0f} B each)\n")
+    print(f"dict of Commitment   {dict_bytes / args.positions:8.1f} bytes/position")
+    print(f"CommitmentStore      {store_bytes / args.positions:8.1f} bytes/position")
+    print(f"reduction            {dict_bytes / store_bytes:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Micro and macro benchmark suite for the commitments package
+
+Micro benchmarks time single calls into pedersen.py and integration.py;
+macro benchmarks drive the Flask endpoints through the test client, so
+no server or network access is needed. Each benchmark is timed call by
+call and reported as ops/sec plus latency percentiles, as JSON.
+
+Usage:
+    python -m commitments.benchmarks.suite [--output FILE] [--baseline FILE]
+                                           [--threshold F] [--min-time S] [--filter TEXT]
+
+With --baseline, results are compared against a previous --output file
+and any benchmark whose ops/sec dropped by more than --threshold
+(default 0.15) is reported as a regression; the exit status is 1 if
+there are any.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from commitments.benchmarks.asgi_load import percentile
+from commitments.integration import ZenLendIntegration
+from commitments.pedersen import (
+    COMMITMENT_MODE_EC,
+    COMMITMENT_MODE_HASH,
+    PedersenCommitmentSystem,
+    get_commitment_mode,
+    pedersen_commit
+)
+
+COMMITMENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A benchmark's setup returns the zero-argument operation to time
+Setup = Callable[[], Callable[[], object]]
+
+
+def _pedersen_commit(mode: str) -> Setup:
+    def setup():
+        counter = iter(range(1, 1 << 62))
+        return lambda: pedersen_commit(next(counter), 0x1234567890ABCDEF, mode)
+    return setup
+
+
+def _commit_btc_amount():
+    system = PedersenCommitmentSystem()
+    return lambda: system.commit_btc_amount(1.5)
+
+
+def _solvency_proof():
+    system = PedersenCommitmentSystem()
+    commitment = system.commit_btc_amount(2.0)
+    return lambda: system.generate_solvency_proof(commitment, 1.0)
+
+
+def _liquidation_proof():
+    system = PedersenCommitmentSystem()
+    commitment = system.commit_btc_amount(1.0)
+    return lambda: system.generate_liquidation_proof(commitment, 1.0)
+
+
+def _verify_proof():
+    system = PedersenCommitmentSystem()
+    commitment, proof = system.generate_commitment_with_proof(1.5, "benchmark-key")
+    return lambda: system.verify_proof(commitment, proof, 1.5)
+
+
+def _prepare_deposit():
+    integration = ZenLendIntegration()
+    counter = iter(range(1 << 62))
+    return lambda: integration.prepare_deposit_transaction(f"0x{next(counter):x}", 2.0)
+
+
+def _prepare_mint():
+    integration = ZenLendIntegration()
+    integration.prepare_deposit_transaction("0x1", 1e6)
+    return lambda: integration.prepare_mint_transaction("0x1", 0.001)
+
+
+def _prepare_liquidation():
+    integration = ZenLendIntegration()
+    counter = iter(range(1 << 62))
+
+    def op():
+        address = f"0x{next(counter):x}"
+        integration.prepare_deposit_transaction(address, 1.0)
+        return integration.prepare_liquidation_transaction("0xliquidator", address, 1.0)
+    return op
+
+
+def _verify_position_health():
+    integration = ZenLendIntegration()
+    integration.prepare_deposit_transaction("0x1", 2.0)
+    return lambda: integration.verify_position_health("0x1", 1.0)
+
+
+def _flask_client():
+    if COMMITMENTS_DIR not in sys.path:
+        sys.path.insert(0, COMMITMENTS_DIR)
+    import logging
+    logging.disable(logging.INFO)
+    from app import app
+    return app.test_client()
+
+
+def _endpoint(method: str, path: str, body: Optional[dict] = None) -> Setup:
+    def setup():
+        client = _flask_client()
+
+        def op():
+            response = client.open(path, method=method, json=body)
+            if response.status_code != 200:
+                raise RuntimeError(f"{method} {path} returned {response.status_code}")
+        return op
+    return setup
+
+
+def _verify_endpoint():
+    system = PedersenCommitmentSystem()
+    commitment, proof = system.generate_commitment_with_proof(1.5, "benchmark-key")
+    return _endpoint("POST", "/verify-proof", {"commitment": commitment, "proof": proof, "amount": 1.5})()
+
+
+BENCHMARKS: List[Tuple[str, str, Setup]] = [
+    ("pedersen_commit[hash]", "micro", _pedersen_commit(COMMITMENT_MODE_HASH)),
+    ("pedersen_commit[ec]", "micro", _pedersen_commit(COMMITMENT_MODE_EC)),
+    ("commit_btc_amount", "micro", _commit_btc_amount),
+    ("generate_solvency_proof", "micro", _solvency_proof),
+    ("generate_liquidation_proof", "micro", _liquidation_proof),
+    ("verify_proof", "micro", _verify_proof),
+    ("prepare_deposit_transaction", "micro", _prepare_deposit),
+    ("prepare_mint_transaction", "micro", _prepare_mint),
+    ("prepare_liquidation_transaction", "micro", _prepare_liquidation),
+    ("verify_position_health", "micro", _verify_position_health),
+    ("GET /health", "macro", _endpoint("GET", "/health")),
+    ("POST /generate-commitment", "macro",
+     _endpoint("POST", "/generate-commitment", {"amount": 1.5, "private_key": "benchmark-key"})),
+    ("POST /generate-commitments[100]", "macro",
+     _endpoint("POST", "/generate-commitments",
+               {"items": [{"amount": 0.01 * (i + 1), "private_key": f"benchmark-key-{i}"} for i in range(100)]})),
+    ("POST /verify-proof", "macro", _verify_endpoint),
+]
+
+
+def run_benchmark(op: Callable[[], object], min_time: float, min_iterations: int = 20) -> Dict[str, float]:
+    """Time op call by call for at least min_time seconds"""
+    for _ in range(min(10, min_iterations)):
+        op()
+
+    latencies = []
+    clock = time.perf_counter
+    started = clock()
+    deadline = started + min_time
+    while True:
+        start = clock()
+        op()
+        end = clock()
+        latencies.append(end - start)
+        if end >= deadline and len(latencies) >= min_iterations:
+            break
+    total = sum(latencies)
+
+    latencies.sort()
+    return {
+        "iterations": len(latencies),
+        "ops_per_sec": len(latencies) / total,
+        "mean_us": total / len(latencies) * 1e6,
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p95_us": percentile(latencies, 0.95) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+    }
+
+
+def run_suite(min_time: float, name_filter: Optional[str] = None) -> Dict[str, object]:
+    """Run every (matching) benchmark and return the JSON report"""
+    results, skipped = {}, {}
+    for name, group, setup in BENCHMARKS:
+        if name_filter and name_filter not in name:
+            continue
+        try:
+            op = setup()
+        except ImportError as e:
+            # Flask is optional for the micro benchmarks
+            skipped[name] = str(e)
+            continue
+        results[name] = {"group": group, **run_benchmark(op, min_time)}
+        print(f"{name:<36}{results[name]['ops_per_sec']:>12,.0f} ops/s"
+              f"{results[name]['p50_us']:>12.1f} p50 us{results[name]['p99_us']:>12.1f} p99 us", file=sys.stderr)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "commitment_mode": get_commitment_mode(),
+            "min_time": min_time,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare(report: Dict[str, object], baseline: Dict[str, object], threshold: float) -> List[Dict[str, object]]:
+    """Benchmarks whose ops/sec fell more than threshold below the baseline"""
+    regressions = []
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        change = result["ops_per_sec"] / previous["ops_per_sec"] - 1
+        result["baseline_ops_per_sec"] = previous["ops_per_sec"]
+        result["change"] = change
+        if change < -threshold:
+            regressions.append({"name": name, "change": change})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="previous report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed ops/sec drop as a fraction")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds to time each benchmark")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+    args = parser.parse_args()
+
+    report = run_suite(args.min_time, args.filter)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        report["regressions"] = regressions
+        for regression in regressions:
+            print(f"REGRESSION {regression['name']}: {regression['change']:+.1%} ops/sec", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Bounded In-Process Cache for Deterministic Commitment Results
+
+generate_commitment_with_proof is a pure function of (amount, private_key)
+under a given commitment mode and hash encoding, so repeated calls from
+frontend retries can be served from memory. Entries are keyed by a
+BLAKE2b digest of the inputs, so raw private keys are never held as
+keys. Eviction is LRU once maxsize is reached, plus a per-entry TTL.
+All operations take a lock, so one cache can be shared by every thread
+of the Flask server.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+def commitment_cache_key(mode: str, encoding: str, amount: float, private_key: str) -> bytes:
+    """Digest of the commitment inputs used as the cache key"""
+    digest = hashlib.blake2b(digest_size=16, person=b"zenlend-cache")
+    digest.update(f"{mode}\0{encoding}\0{amount!r}\0".encode())
+    digest.update(private_key.encode())
+    return digest.digest()
+
+
+class CommitmentCache:
+    """
+    Thread-safe LRU cache with per-entry time-to-live
+
+    Args:
+        maxsize: Maximum number of entries
+        ttl: Seconds an entry stays valid (None disables expiry)
+
+    Values are returned as stored; callers caching mutable results
+    should copy them on the way in and out.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: Optional[float] = 300.0):
+        if maxsize < 1:
+            raise ValueError("Cache maxsize must be positive")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full"""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
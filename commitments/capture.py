@@ -0,0 +1,102 @@
+"""
+Opt-in Request Capture for Traffic Replay
+
+RequestCapture appends each request the API receives to a JSON-lines
+file, which `python -m commitments.benchmarks.loadtest replay` sends
+again with the original timing. One record per line:
+
+    {"ts": 1760000000.123, "method": "POST", "path": "/generate-commitment",
+     "content_type": "application/json", "accept": null, "body": "{...}"}
+
+ts is the Unix time the request arrived. A body that is not UTF-8 is
+stored base64-encoded under "body_b64" instead of "body".
+
+Captured bodies contain users' private keys. Capture is off unless
+ZENLEND_CAPTURE_PATH is set, the file is created readable by its owner
+only, and it should be treated like any other secret.
+"""
+
+import base64
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+# Routes never captured: scrapes and authenticated admin calls
+UNCAPTURED_PREFIXES = ("/metrics", "/admin/")
+
+
+class RequestCapture:
+    """
+    Thread-safe appender of request records
+
+    Args:
+        path: JSON-lines file to append to
+        sample: Fraction of requests recorded, chosen at random
+    """
+
+    def __init__(self, path: str, sample: float = 1.0):
+        if not 0 < sample <= 1:
+            raise ValueError("Capture sample must be in (0, 1]")
+        self.path = path
+        self.sample = sample
+        self.recorded = 0
+        self._lock = threading.Lock()
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        self._file = os.fdopen(fd, "a", encoding="utf-8")
+
+    def record(
+        self,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        content_type: Optional[str] = None,
+        accept: Optional[str] = None
+    ) -> bool:
+        """Append one request; returns False if it was skipped"""
+        if path.startswith(UNCAPTURED_PREFIXES) or (self.sample < 1 and random.random() >= self.sample):
+            return False
+        entry: Dict[str, Any] = {
+            "ts": time.time(), "method": method, "path": path,
+            "content_type": content_type, "accept": accept
+        }
+        try:
+            entry["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_b64"] = base64.b64encode(body).decode("ascii")
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.recorded += 1
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def read_capture(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Records of a capture file in file order, with the body as bytes
+
+    Raises:
+        ValueError: If a line is not a capture record
+    """
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                entry["ts"] = float(entry["ts"])
+                entry["method"], entry["path"]
+            except (ValueError, KeyError, TypeError):
+                raise ValueError(f"{path}:{number}: not a capture record")
+            if "body_b64" in entry:
+                entry["body"] = base64.b64decode(entry.pop("body_b64"))
+            else:
+                entry["body"] = (entry.get("body") or "").encode("utf-8")
+            yield entry
@@ -0,0 +1,148 @@
+"""
+Single-Flight Coalescing of Identical Concurrent Requests
+
+Frontend components often send the same /generate-commitment or
+/verify-proof request several times at once. Both results are
+deterministic in the request payload, so computing each copy is wasted
+work. SingleFlight runs the first request for a payload digest (the
+leader). Requests with the same digest that arrive while it is running
+(followers) wait for it and share its result or its exception.
+
+Callers mutate results when they build responses, so nobody is handed
+the shared object. Followers get copies. The leader gets the original
+only when nobody joined its flight, and otherwise a copy too.
+
+Unlike the result cache (cache.py), nothing outlives the flight: a
+request arriving after the leader finished starts a new one.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+try:
+    from .metrics import COALESCED_REQUESTS
+except ImportError:
+    from metrics import COALESCED_REQUESTS
+
+
+def request_digest(route: str, *fields: Any) -> bytes:
+    """
+    Digest of a route and its canonical JSON fields, used as the flight key
+
+    Dict keys are sorted, so payloads differing only in key order share a
+    key. Private keys are only held inside the digest.
+    """
+    canonical = json.dumps([route, *fields], sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode(), digest_size=16, person=b"zenlend-flight").digest()
+
+
+class _Flight:
+    """One in-progress computation and the requests waiting on it"""
+    __slots__ = ("done", "followers", "result", "error", "task")
+
+    def __init__(self, done):
+        self.done = done
+        self.followers = 0
+        self.result = None
+        self.error = None
+        self.task = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key
+
+    Args:
+        name: Route label for the coalescing metrics
+        copy_result: Makes an independent copy of a result (default deepcopy)
+
+    do() is for threaded servers and do_async() for asyncio ones. Each
+    keeps its own flights, so one instance serves either or both.
+    """
+
+    def __init__(self, name: str, copy_result: Callable[[Any], Any] = copy.deepcopy):
+        self.name = name
+        self.copy_result = copy_result
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._async_flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._leaders = COALESCED_REQUESTS.labels(name, "leader")
+        self._followers = COALESCED_REQUESTS.labels(name, "follower")
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights) + len(self._async_flights)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn() or wait for the identical call already running
+
+        Returns:
+            Tuple of (result, shared), shared being True for followers
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight(threading.Event())
+            else:
+                flight.followers += 1
+
+        if not leader:
+            self._followers.inc()
+            flight.done.wait()
+            return self._outcome(flight), True
+
+        self._leaders.inc()
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return self._leader_outcome(flight), False
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Awaitable do() for asyncio servers; all callers must share one event loop"""
+        import asyncio
+
+        flight = self._async_flights.get(key)
+        if flight is not None:
+            flight.followers += 1
+            self._followers.inc()
+            # shield: a cancelled follower must not cancel the leader's wait
+            await asyncio.shield(flight.done)
+            return self._outcome(flight), True
+
+        flight = self._async_flights[key] = _Flight(asyncio.get_running_loop().create_future())
+        self._leaders.inc()
+        # fn() runs in its own task: cancelling the leader's request must
+        # not cancel the computation its followers are waiting on
+        flight.task = asyncio.ensure_future(self._run_async(key, flight, fn))
+        await asyncio.shield(flight.done)
+        return self._leader_outcome(flight), False
+
+    async def _run_async(self, key: Hashable, flight: _Flight, fn: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            flight.result = await fn()
+        except BaseException as e:
+            flight.error = e
+        finally:
+            del self._async_flights[key]
+            flight.done.set_result(None)
+
+    def _outcome(self, flight: _Flight) -> Any:
+        if flight.error is not None:
+            raise flight.error
+        return self.copy_result(flight.result)
+
+    def _leader_outcome(self, flight: _Flight) -> Any:
+        # The flight is out of the table, so followers is final
+        if flight.error is not None:
+            raise flight.error
+        return self.copy_result(flight.result) if flight.followers else flight.result
@@ -0,0 +1,550 @@
+"""
+Stark Curve Arithmetic for Pedersen Commitments
+
+Short Weierstrass curve used by Starknet:
+- y^2 = x^3 + alpha*x + beta (mod p), with p the felt252 prime
+- Points are affine (x, y) tuples, or None for the point at infinity
+- Internal arithmetic uses Jacobian coordinates (X, Y, Z) to avoid
+  a modular inversion per addition
+
+Scalar multiplication by the fixed commitment generators goes through
+FixedBaseTable, which precomputes every window multiple of the base point
+so a multiplication is a short run of additions with no doublings.
+scalar_mul_naive is the plain double-and-add reference implementation.
+
+Building a table costs tens of milliseconds (the Pedersen hash tables
+about 160ms). With ZENLEND_TABLES_PATH naming a file written by
+`python -m commitments.tables`, get_fixed_base_table maps that file and
+decodes a table from it instead of building one.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Starknet field prime (same as Cairo felt252)
+FIELD_PRIME = 2**251 + 17 * 2**192 + 1
+
+# Stark curve parameters
+ALPHA = 1
+BETA = 0x06f21413efbe40de150e596d72f7a8c5609ad26c15c915c1f4cdfcb99cee9e89
+CURVE_ORDER = 0x0800000000000010ffffffffffffffffb781126dcae7b2321e66a241adc64d2f
+
+# Standard Stark curve generator (ECDSA base point)
+EC_GENERATOR = (
+    0x1ef15c18599971b7beced415a40f0c7deacfd9b0d1819e03d723d8bc943cfca,
+    0x5668060aa49730b7be4801df46ec62de53ecd11abe43a32873000c36e8dc1f,
+)
+
+# Scalars are reduced mod CURVE_ORDER, which fits in 252 bits
+SCALAR_BITS = CURVE_ORDER.bit_length()
+
+AffinePoint = Optional[Tuple[int, int]]
+JacobianPoint = Tuple[int, int, int]
+
+# Jacobian representation of the point at infinity
+JACOBIAN_INFINITY: JacobianPoint = (1, 1, 0)
+
+
+def is_on_curve(point: AffinePoint) -> bool:
+    """Check that an affine point satisfies the curve equation"""
+    if point is None:
+        return True
+    x, y = point
+    return (y * y - (x * x * x + ALPHA * x + BETA)) % FIELD_PRIME == 0
+
+
+# p - 1 = SQRT_Q * 2^SQRT_S with SQRT_Q odd; the 2-adicity is 192
+SQRT_S = 192
+SQRT_Q = (FIELD_PRIME - 1) >> SQRT_S
+
+# Digit width for the discrete log in the 2^SQRT_S-torsion subgroup
+SQRT_WINDOW = 8
+
+_sqrt_tables = None
+
+
+def _get_sqrt_tables() -> Tuple[List[List[int]], Dict[int, int]]:
+    """
+    Precompute the tables used by _sqrt_mod
+
+    With g a generator of the 2^SQRT_S-torsion subgroup, returns
+    inverse_powers[i][d] = g^(-d * 2^(SQRT_WINDOW * i)) and a map from each
+    SQRT_WINDOW-bit root of unity g^(d * 2^(SQRT_S - SQRT_WINDOW)) back to d.
+    """
+    global _sqrt_tables
+    if _sqrt_tables is None:
+        p = FIELD_PRIME
+        z = 3
+        while pow(z, (p - 1) // 2, p) != p - 1:
+            z += 1
+        g_inv = pow(pow(z, SQRT_Q, p), -1, p)
+
+        inverse_powers = []
+        base = g_inv
+        for _ in range(SQRT_S // SQRT_WINDOW):
+            row = [1]
+            for _ in range((1 << SQRT_WINDOW) - 1):
+                row.append(row[-1] * base % p)
+            inverse_powers.append(row)
+            base = pow(base, 1 << SQRT_WINDOW, p)
+
+        # g^(-d * 2^(s - w)) is the inverse of the root we need to recognise
+        top = inverse_powers[-1]
+        digit_of = {pow(value, -1, p): d for d, value in enumerate(top)}
+        _sqrt_tables = (inverse_powers, digit_of)
+    return _sqrt_tables
+
+
+def _sqrt_mod(n: int) -> Optional[int]:
+    """
+    Square root modulo FIELD_PRIME, or None if n is not a square
+
+    Tonelli-Shanks needs O(s^2) squarings for 2-adicity s, which is slow
+    for s = 192. Instead, the discrete log of t = n^q in the 2^s-torsion
+    subgroup is recovered SQRT_WINDOW bits at a time from precomputed
+    tables, and sqrt(n) = n^((q + 1) / 2) * g^(-log(t) / 2).
+    """
+    p = FIELD_PRIME
+    n %= p
+    if n == 0:
+        return 0
+
+    inverse_powers, digit_of = _get_sqrt_tables()
+    w = SQRT_WINDOW
+    windows = SQRT_S // w
+
+    # t^(2^(w*j)) for every window
+    t = pow(n, SQRT_Q, p)
+    chain = [t]
+    for _ in range(windows - 1):
+        t = pow(t, 1 << w, p)
+        chain.append(t)
+
+    # Recover the base-2^w digits of the log from least significant up
+    digits = []
+    for k in range(windows):
+        v = chain[windows - 1 - k]
+        offset = windows - 1 - k
+        for j, digit in enumerate(digits):
+            if digit:
+                v = v * inverse_powers[j + offset][digit] % p
+        digit = digit_of.get(v)
+        if digit is None:
+            return None
+        digits.append(digit)
+
+    # n is a square exactly when the log is even
+    if digits[0] & 1:
+        return None
+
+    log = sum(digit << (w * i) for i, digit in enumerate(digits))
+    half = log >> 1
+    r = pow(n, (SQRT_Q + 1) // 2, p)
+    mask = (1 << w) - 1
+    for i in range(windows):
+        digit = (half >> (w * i)) & mask
+        if digit:
+            r = r * inverse_powers[i][digit] % p
+    return r
+
+
+def lift_x(x: int, odd: bool = False) -> AffinePoint:
+    """
+    Recover the curve point with the given x-coordinate
+
+    Args:
+        x: x-coordinate
+        odd: Select the point whose y-coordinate is odd
+
+    Returns:
+        Affine point, or None if x is not on the curve
+    """
+    y = _sqrt_mod(x * x * x + ALPHA * x + BETA)
+    if y is None:
+        return None
+    if (y & 1) != odd:
+        y = FIELD_PRIME - y
+    return (x, y)
+
+
+def hash_to_curve(seed: int) -> Tuple[int, int]:
+    """
+    Map a seed to a curve point by try-and-increment on the x-coordinate
+
+    Nobody knows the discrete log of the result with respect to any
+    other generator, which is what Pedersen commitments require.
+    """
+    x = seed % FIELD_PRIME
+    while True:
+        point = lift_x(x)
+        if point is not None:
+            return point
+        x = (x + 1) % FIELD_PRIME
+
+
+def to_jacobian(point: AffinePoint) -> JacobianPoint:
+    """Convert an affine point to Jacobian coordinates"""
+    if point is None:
+        return JACOBIAN_INFINITY
+    return (point[0], point[1], 1)
+
+
+def to_affine(point: JacobianPoint) -> AffinePoint:
+    """Convert a Jacobian point to affine coordinates"""
+    X, Y, Z = point
+    if Z == 0:
+        return None
+    p = FIELD_PRIME
+    z_inv = pow(Z, -1, p)
+    z_inv2 = z_inv * z_inv % p
+    return (X * z_inv2 % p, Y * z_inv2 * z_inv % p)
+
+
+def batch_to_affine(points: Sequence[JacobianPoint]) -> List[AffinePoint]:
+    """Convert many Jacobian points to affine with a single modular inversion"""
+    p = FIELD_PRIME
+
+    # Montgomery's trick: prefix products of the Z coordinates
+    prefix = []
+    acc = 1
+    for _, _, Z in points:
+        prefix.append(acc)
+        if Z:
+            acc = acc * Z % p
+
+    inv = pow(acc, -1, p)
+    result: List[AffinePoint] = [None] * len(points)
+    for i in range(len(points) - 1, -1, -1):
+        X, Y, Z = points[i]
+        if not Z:
+            continue
+        z_inv = inv * prefix[i] % p
+        inv = inv * Z % p
+        z_inv2 = z_inv * z_inv % p
+        result[i] = (X * z_inv2 % p, Y * z_inv2 * z_inv % p)
+    return result
+
+
+def jacobian_double(point: JacobianPoint) -> JacobianPoint:
+    """Double a Jacobian point"""
+    X, Y, Z = point
+    if Z == 0 or Y == 0:
+        return JACOBIAN_INFINITY
+    p = FIELD_PRIME
+    YY = Y * Y % p
+    ZZ = Z * Z % p
+    S = 4 * X * YY % p
+    M = (3 * X * X + ALPHA * ZZ * ZZ) % p
+    X3 = (M * M - 2 * S) % p
+    Y3 = (M * (S - X3) - 8 * YY * YY) % p
+    Z3 = 2 * Y * Z % p
+    return (X3, Y3, Z3)
+
+
+def jacobian_add(P: JacobianPoint, Q: JacobianPoint) -> JacobianPoint:
+    """Add two Jacobian points"""
+    X1, Y1, Z1 = P
+    X2, Y2, Z2 = Q
+    if Z1 == 0:
+        return Q
+    if Z2 == 0:
+        return P
+    p = FIELD_PRIME
+    Z1Z1 = Z1 * Z1 % p
+    Z2Z2 = Z2 * Z2 % p
+    U1 = X1 * Z2Z2 % p
+    U2 = X2 * Z1Z1 % p
+    S1 = Y1 * Z2 * Z2Z2 % p
+    S2 = Y2 * Z1 * Z1Z1 % p
+    H = (U2 - U1) % p
+    r = (S2 - S1) % p
+    if H == 0:
+        if r == 0:
+            return jacobian_double(P)
+        return JACOBIAN_INFINITY
+    HH = H * H % p
+    HHH = H * HH % p
+    V = U1 * HH % p
+    X3 = (r * r - HHH - 2 * V) % p
+    Y3 = (r * (V - X3) - S1 * HHH) % p
+    Z3 = Z1 * Z2 * H % p
+    return (X3, Y3, Z3)
+
+
+def jacobian_add_affine(P: JacobianPoint, Q: Tuple[int, int]) -> JacobianPoint:
+    """Add an affine point (not infinity) to a Jacobian point"""
+    X1, Y1, Z1 = P
+    x2, y2 = Q
+    if Z1 == 0:
+        return (x2, y2, 1)
+    p = FIELD_PRIME
+    Z1Z1 = Z1 * Z1 % p
+    U2 = x2 * Z1Z1 % p
+    S2 = y2 * Z1 * Z1Z1 % p
+    H = (U2 - X1) % p
+    r = (S2 - Y1) % p
+    if H == 0:
+        if r == 0:
+            return jacobian_double(P)
+        return JACOBIAN_INFINITY
+    HH = H * H % p
+    HHH = H * HH % p
+    V = X1 * HH % p
+    X3 = (r * r - HHH - 2 * V) % p
+    Y3 = (r * (V - X3) - Y1 * HHH) % p
+    Z3 = Z1 * H % p
+    return (X3, Y3, Z3)
+
+
+def jacobian_neg(point: JacobianPoint) -> JacobianPoint:
+    """Negate a Jacobian point"""
+    X, Y, Z = point
+    return (X, (-Y) % FIELD_PRIME, Z)
+
+
+def point_add(P: AffinePoint, Q: AffinePoint) -> AffinePoint:
+    """Add two affine points"""
+    return to_affine(jacobian_add(to_jacobian(P), to_jacobian(Q)))
+
+
+def scalar_mul_naive(point: AffinePoint, scalar: int) -> AffinePoint:
+    """
+    Multiply a point by a scalar with left-to-right double-and-add
+
+    Reference implementation; the fixed generators use FixedBaseTable.
+    """
+    scalar %= CURVE_ORDER
+    if point is None or scalar == 0:
+        return None
+    acc = JACOBIAN_INFINITY
+    for bit in bin(scalar)[2:]:
+        acc = jacobian_double(acc)
+        if bit == '1':
+            acc = jacobian_add_affine(acc, point)
+    return to_affine(acc)
+
+
+class FixedBaseTable:
+    """
+    Precomputed window table for multiplying a fixed base point
+
+    For window width w the scalar is split into w-bit digits d_j and
+    the table holds d * 2^(w*j) * P in affine form for every digit value,
+    so k*P is the sum of one table entry per non-zero digit.
+    """
+
+    def __init__(self, base: Tuple[int, int], window: int = 4):
+        if not is_on_curve(base):
+            raise ValueError("Base point is not on the curve")
+        if window < 1:
+            raise ValueError("Window width must be positive")
+
+        self.base = base
+        self.window = window
+        self.num_windows = -(-SCALAR_BITS // window)
+        self.digits = (1 << window) - 1
+        self.table = self._build()
+
+    def _build(self) -> List[Tuple[int, int]]:
+        """Compute every window multiple, normalized to affine in one pass"""
+        jacobian = []
+        window_base = to_jacobian(self.base)
+        for _ in range(self.num_windows):
+            multiple = window_base
+            jacobian.append(multiple)
+            for _ in range(self.digits - 1):
+                multiple = jacobian_add(multiple, window_base)
+                jacobian.append(multiple)
+            for _ in range(self.window):
+                window_base = jacobian_double(window_base)
+        return batch_to_affine(jacobian)
+
+    @classmethod
+    def from_points(cls, base: Tuple[int, int], window: int, points: List[Tuple[int, int]]) -> "FixedBaseTable":
+        """Table from window multiples computed earlier, e.g. read from a table file"""
+        table = cls.__new__(cls)
+        table.base = base
+        table.window = window
+        table.num_windows = -(-SCALAR_BITS // window)
+        table.digits = (1 << window) - 1
+        if len(points) != table.num_windows * table.digits:
+            raise ValueError(f"Expected {table.num_windows * table.digits} table points, got {len(points)}")
+        table.table = points
+        return table
+
+    def mul_jacobian(self, scalar: int) -> JacobianPoint:
+        """Multiply the base point by a scalar, returning Jacobian coordinates"""
+        scalar %= CURVE_ORDER
+        table = self.table
+        window = self.window
+        mask = self.digits
+        add = jacobian_add_affine
+
+        acc = JACOBIAN_INFINITY
+        offset = -1
+        while scalar:
+            digit = scalar & mask
+            if digit:
+                acc = add(acc, table[offset + digit])
+            scalar >>= window
+            offset += mask
+        return acc
+
+    def mul(self, scalar: int) -> AffinePoint:
+        """Multiply the base point by a scalar"""
+        return to_affine(self.mul_jacobian(scalar))
+
+
+_table_cache = {}
+_table_lock = threading.Lock()
+
+# Environment variable naming a precomputed table file
+TABLES_PATH_ENV = "ZENLEND_TABLES_PATH"
+
+# TableFile for TABLES_PATH_ENV; False once found unset
+_table_file = None
+
+
+def _load_table(base: Tuple[int, int], window: int) -> Optional[FixedBaseTable]:
+    """Table for (base, window) from the precomputed table file, if it has one"""
+    global _table_file
+    if _table_file is None:
+        path = os.environ.get(TABLES_PATH_ENV)
+        if path:
+            try:
+                from .tables import TableFile
+            except ImportError:
+                from tables import TableFile
+            _table_file = TableFile(path)
+        else:
+            _table_file = False
+    return _table_file.load(base, window) if _table_file else None
+
+
+def get_fixed_base_table(base: Tuple[int, int], window: int = 4) -> FixedBaseTable:
+    """Return the process-wide table for a base point, loading or building it on first use"""
+    key = (base, window)
+    table = _table_cache.get(key)
+    if table is None:
+        with _table_lock:
+            table = _table_cache.get(key)
+            if table is None:
+                table = _load_table(base, window) or FixedBaseTable(base, window)
+                _table_cache[key] = table
+    return table
+
+
+def install_fixed_base_table(table: FixedBaseTable) -> None:
+    """Make table the process-wide table for its base point and window"""
+    with _table_lock:
+        _table_cache[(table.base, table.window)] = table
+
+
+def cached_fixed_base_tables() -> List[FixedBaseTable]:
+    """Every table built or loaded so far in this process"""
+    return list(_table_cache.values())
+
+
+def multi_scalar_mul(points: Sequence[Tuple[int, int]], scalars: Sequence[int]) -> JacobianPoint:
+    """
+    Compute sum(scalar_i * point_i) with Pippenger's bucket method
+
+    Each c-bit window of every scalar drops its point into one of 2^c - 1
+    buckets, and the buckets are combined with a running sum, so the cost
+    grows like n * bits / c additions instead of n full multiplications.
+
+    Args:
+        points: Affine points (not infinity)
+        scalars: Matching scalars
+
+    Returns:
+        Jacobian sum
+    """
+    if len(points) != len(scalars):
+        raise ValueError(f"Length mismatch: {len(points)} points, {len(scalars)} scalars")
+    if not points:
+        return JACOBIAN_INFINITY
+
+    scalars = [k % CURVE_ORDER for k in scalars]
+    bits = max(k.bit_length() for k in scalars)
+    if bits == 0:
+        return JACOBIAN_INFINITY
+
+    # Pick the window minimizing bucket additions plus bucket combination
+    n = len(points)
+    c = min(range(1, 17), key=lambda c: -(-bits // c) * (n + (2 << c)))
+    mask = (1 << c) - 1
+    num_windows = -(-bits // c)
+    add_affine = jacobian_add_affine
+    add = jacobian_add
+    double = jacobian_double
+
+    acc = JACOBIAN_INFINITY
+    for window in range(num_windows - 1, -1, -1):
+        for _ in range(c):
+            acc = double(acc)
+
+        shift = window * c
+        buckets = [JACOBIAN_INFINITY] * mask
+        for point, scalar in zip(points, scalars):
+            digit = (scalar >> shift) & mask
+            if digit:
+                buckets[digit - 1] = add_affine(buckets[digit - 1], point)
+
+        # sum(d * bucket_d) via running sums from the top bucket down
+        running = JACOBIAN_INFINITY
+        window_sum = JACOBIAN_INFINITY
+        for bucket in reversed(buckets):
+            running = add(running, bucket)
+            window_sum = add(window_sum, running)
+        acc = add(acc, window_sum)
+    return acc
+
+
+# Constant points of the Starknet Pedersen hash (the Cairo pedersen builtin):
+# shift point P0, then P1/P2 for the low 248 / high bits of the first input
+# and P3/P4 for the second
+PEDERSEN_POINTS = (
+    (0x49ee3eba8c1600700ee1b87eb599f16716b0b1022947733551fde4050ca6804,
+     0x3ca0cfe4b3bc6ddf346d49d06ea0ed34e621062c0e056c1d0405d266e10268a),
+    (0x234287dcbaffe7f969c748655fca9e58fa8120b6d56eb0c1080d17957ebe47b,
+     0x3b056f100f96fb21e889527d41f4e39940135dd7a6c94cc6ed0268ee89e5615),
+    (0x4fa56f376c83db33f9dab2656558f3399099ec1de5e3018b7a6932dba8aa378,
+     0x3fa0984c931c9e38113e0c0e47e4401562761f92a7a23b45168f4e80ff5b54d),
+    (0x4ba4cc166be8dec764910f75b45f74b40c690c74709e90f3aa372f0bd2d6997,
+     0x40301cf5c1751f4b971e46c4ede85fcac5c59a5ce5ae7c48151f27b24b219c),
+    (0x54302dcb0e6cc1c6e44cca8f61a63bb2ca65048d53fb325d36ff12c49a58202,
+     0x1b77b3e37d13504b348046268d8ae25ce98ad783c25561a879dcc77e99c2426),
+)
+
+# Window for the 248-bit halves; 8 bits means 31 additions per input
+PEDERSEN_TABLE_WINDOW = 8
+
+_PEDERSEN_LOW_BITS = 248
+_PEDERSEN_LOW_MASK = (1 << _PEDERSEN_LOW_BITS) - 1
+_pedersen_tables = None
+
+
+def pedersen_hash(a: int, b: int) -> int:
+    """
+    Starknet Pedersen hash of two felts, equal to Cairo's pedersen(a, b)
+
+    [P0 + a_low*P1 + a_high*P2 + b_low*P3 + b_high*P4].x with the low
+    248 bits and the remaining high bits of each input. Each low half is
+    a fixed-base table multiplication; the first call builds the tables.
+    """
+    global _pedersen_tables
+    if not (0 <= a < FIELD_PRIME and 0 <= b < FIELD_PRIME):
+        raise ValueError("Pedersen hash inputs must be felts")
+    if _pedersen_tables is None:
+        _pedersen_tables = tuple(
+            get_fixed_base_table(point, PEDERSEN_TABLE_WINDOW if i % 2 else 1)
+            for i, point in enumerate(PEDERSEN_POINTS[1:], start=1)
+        )
+    table_a_low, table_a_high, table_b_low, table_b_high = _pedersen_tables
+    acc = jacobian_add_affine(table_a_low.mul_jacobian(a & _PEDERSEN_LOW_MASK), PEDERSEN_POINTS[0])
+    acc = jacobian_add(acc, table_a_high.mul_jacobian(a >> _PEDERSEN_LOW_BITS))
+    acc = jacobian_add(acc, table_b_low.mul_jacobian(b & _PEDERSEN_LOW_MASK))
+    acc = jacobian_add(acc, table_b_high.mul_jacobian(b >> _PEDERSEN_LOW_BITS))
+    return to_affine(acc)[0]
@@ -0,0 +1,211 @@
+"""
+Process-Pool Offload for CPU-Bound Commitment Work
+
+Commitment generation and proof verification are pure Python and hold
+the GIL, so running them on Flask request threads serializes all of it
+on one core. CommitmentExecutor dispatches PedersenCommitmentSystem calls
+to a pool of worker processes instead:
+- Workers are warmed up on start (commitment mode and generator tables)
+- Pending work is bounded; extra requests are rejected instead of queued
+- Calls dispatched to workers, and inline calls made through
+  call_async, have a timeout
+
+With workers=0 calls run inline on the caller's system, which keeps the
+single-process behaviour for serverless deployments. The process pool
+and asyncio modules are only imported when they are used, so that mode
+does not pay for them at startup.
+"""
+
+import threading
+from typing import Any, Optional, Tuple
+
+try:
+    from .cache import CommitmentCache
+    from .pedersen import (
+        COMMITMENT_MODE_EC,
+        PedersenCommitmentSystem,
+        get_commitment_mode,
+        get_generator_tables,
+        get_hash_encoding,
+        set_commitment_mode,
+        set_hash_encoding
+    )
+except ImportError:
+    from cache import CommitmentCache
+    from pedersen import (
+        COMMITMENT_MODE_EC,
+        PedersenCommitmentSystem,
+        get_commitment_mode,
+        get_generator_tables,
+        get_hash_encoding,
+        set_commitment_mode,
+        set_hash_encoding
+    )
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when the executor already has its maximum pending calls"""
+
+
+class ExecutorTimeoutError(RuntimeError):
+    """Raised when a call does not finish within the executor timeout"""
+
+
+# Per-process commitment system used inside worker processes
+_worker_system: Optional[PedersenCommitmentSystem] = None
+
+
+def init_worker(mode: str, encoding: str, cache_config: Optional[Tuple[int, Optional[float]]]) -> None:
+    """
+    Worker initializer: match the parent's mode, hash encoding and cache
+    settings and build the generator tables
+    """
+    global _worker_system
+    set_commitment_mode(mode)
+    set_hash_encoding(encoding)
+    if mode == COMMITMENT_MODE_EC:
+        get_generator_tables()
+    cache = CommitmentCache(*cache_config) if cache_config else None
+    _worker_system = PedersenCommitmentSystem(cache=cache)
+
+
+def _run_in_worker(method: str, args: tuple) -> Any:
+    """Call a PedersenCommitmentSystem method on the worker's system"""
+    return getattr(_worker_system, method)(*args)
+
+
+def _ping() -> bool:
+    """No-op task used to force worker start-up"""
+    return _worker_system is not None
+
+
+class CommitmentExecutor:
+    """
+    Bounded, timed dispatch of commitment system calls
+
+    Args:
+        system: Commitment system used when running inline
+        workers: Number of worker processes (0 runs calls inline)
+        max_pending: Maximum calls queued or running at once
+        timeout: Seconds to wait for each worker or call_async call
+        start_method: multiprocessing start method for the workers
+    """
+
+    def __init__(
+        self,
+        system: PedersenCommitmentSystem,
+        workers: int = 0,
+        max_pending: int = 64,
+        timeout: float = 10.0,
+        start_method: str = "spawn"
+    ):
+        if workers < 0:
+            raise ValueError("Worker count must not be negative")
+        if max_pending < 1:
+            raise ValueError("max_pending must be positive")
+
+        self.system = system
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        if workers:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            cache_config = (system.cache.maxsize, system.cache.ttl) if system.cache else None
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(start_method),
+                initializer=init_worker,
+                initargs=(get_commitment_mode(), get_hash_encoding(), cache_config)
+            )
+
+    def start(self) -> None:
+        """Spawn and warm up every worker before the first request"""
+        if self._pool is None:
+            return
+        futures = [self._pool.submit(_ping) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def call(self, method: str, *args) -> Any:
+        """
+        Run a PedersenCommitmentSystem method, inline or on a worker
+
+        Raises:
+            ExecutorSaturatedError: max_pending calls are already in flight
+            ExecutorTimeoutError: The call did not finish within the timeout
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorSaturatedError(f"{self.max_pending} commitment calls already pending")
+
+        if self._pool is None:
+            try:
+                return getattr(self.system, method)(*args)
+            finally:
+                self._slots.release()
+
+        from concurrent.futures import TimeoutError as FutureTimeoutError
+
+        # The slot is held until the worker is done, even past a timeout,
+        # so abandoned calls still count against max_pending
+        try:
+            future = self._pool.submit(_run_in_worker, method, args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise ExecutorTimeoutError(f"{method} did not finish within {self.timeout}s")
+
+    async def call_async(self, method: str, *args) -> Any:
+        """
+        Awaitable version of call for asyncio servers
+
+        Worker calls are awaited without blocking a thread; inline calls
+        run on the event loop's default thread pool. Both are subject to
+        the timeout, which call cannot apply to inline work.
+        """
+        import asyncio
+
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorSaturatedError(f"{self.max_pending} commitment calls already pending")
+
+        loop = asyncio.get_running_loop()
+        if self._pool is None:
+            try:
+                future = loop.run_in_executor(None, getattr(self.system, method), *args)
+            except BaseException:
+                self._slots.release()
+                raise
+            future.add_done_callback(lambda _: self._slots.release())
+
+            # Shielded so a timed-out call keeps its slot until the thread finishes
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except asyncio.TimeoutError:
+                raise ExecutorTimeoutError(f"{method} did not finish within {self.timeout}s")
+
+        try:
+            future = self._pool.submit(_run_in_worker, method, args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise ExecutorTimeoutError(f"{method} did not finish within {self.timeout}s")
+
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,381 @@
+"""
+Streaming Indexer for PrivateBTCLending Events
+
+Rebuilds per-address position state from the events the contract emits:
+
+    CollateralDeposited  keys [selector, user]                 data [commitment, timestamp]
+    DebtMinted           keys [selector, user]                 data [amount, timestamp]
+    CollateralWithdrawn  keys [selector, user]                 data [amount, timestamp]
+    DebtRepaid           keys [selector, user]                 data [amount, timestamp]
+    PositionLiquidated   keys [selector, borrower, liquidator] data [debt_amount, timestamp]
+
+Input is Starknet JSON-RPC emitted events ({"from_address", "keys",
+"data", "block_number", ...}), one per line, from files or any iterable
+of lines. Lines are parsed a batch at a time with a single json.loads
+over the joined batch, and each event is immediately reduced to a
+(block_number, kind, address, value) tuple, so no per-event objects
+outlive decoding.
+
+Events are applied a batch at a time. The checkpoint is a cursor of
+(block number, events applied from that block), so a restarted indexer
+skips exactly the events it already applied, even when it stopped
+partway through a block. With a SQLiteIndexStore, the positions touched
+since the last checkpoint and the cursor are written in one transaction
+every checkpoint_interval events; a crash replays from the last
+checkpoint against the state saved with it.
+"""
+
+import gzip
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+try:
+    from .merkle import MerkleTree
+    from .store import FELT_BYTES
+except ImportError:
+    from merkle import MerkleTree
+    from store import FELT_BYTES
+
+# Event kinds, in the order of the contract's Event enum
+DEPOSITED, MINTED, WITHDRAWN, REPAID, LIQUIDATED = range(5)
+
+EVENT_NAMES = ("CollateralDeposited", "DebtMinted", "CollateralWithdrawn", "DebtRepaid", "PositionLiquidated")
+
+# keys[0] of each event: sn_keccak(name), keccak-256 truncated to 250 bits
+EVENT_SELECTORS = {
+    0x2c544d0729c3ccc19d71367a6cd5b8962de68603eea147509fd482ea870a5e6: DEPOSITED,
+    0x33e8865f5d1513c206fbf6602a6c35567cf792617d2b459ef51bf5e7aaf0845: MINTED,
+    0x33f733ac130a8f1b4e843945f18d0b86b75d5e0dde7598a2539328671daaf93: WITHDRAWN,
+    0x38f3b1b49f5b47f2473a3bdea3f26a6a8aa7b7aad3f77cadebfb5fffc5d8723: REPAID,
+    0xb295ca209e72a7b9eb103900cc336df50bb73a732c3b4b6ca4df5f4e59ec2a: LIQUIDATED,
+}
+
+DEFAULT_BATCH_SIZE = 10_000
+
+# Events between checkpoints; a position touched many times in between is written once
+DEFAULT_CHECKPOINT_INTERVAL = 100_000
+
+# (block_number, kind, address, value); value is the commitment for
+# DEPOSITED and the amount otherwise
+Event = Tuple[int, int, int, int]
+
+Line = Union[str, bytes]
+
+# Selector spellings seen so far ("0x2c54..." / "0x02C54..."), mapped to kind or None
+_selector_kinds: Dict[str, Optional[int]] = {hex(selector): kind for selector, kind in EVENT_SELECTORS.items()}
+_SELECTOR_CACHE_LIMIT = 4096
+
+
+def _selector_kind(selector: str) -> Optional[int]:
+    kind = _selector_kinds.get(selector, -1)
+    if kind == -1:
+        kind = EVENT_SELECTORS.get(int(selector, 16))
+        if len(_selector_kinds) < _SELECTOR_CACHE_LIMIT:
+            _selector_kinds[selector] = kind
+    return kind
+
+
+class IndexedPosition(NamedTuple):
+    """Position state derived from events; debt and withdrawn are in contract units"""
+    commitment: int
+    debt: int
+    withdrawn: int
+
+
+def decode_event(event: dict) -> Optional[Event]:
+    """Reduce one emitted event to an Event tuple, or None if it is not a lending event"""
+    keys = event["keys"]
+    kind = _selector_kind(keys[0])
+    if kind is None:
+        return None
+    return (event["block_number"], kind, int(keys[1], 16), int(event["data"][0], 16))
+
+
+def decode_events(events: Iterable[dict], contract_address: Optional[int] = None) -> List[Event]:
+    """
+    Decode emitted events, dropping other contracts' and unknown events
+
+    Args:
+        events: Parsed JSON-RPC emitted events
+        contract_address: Only keep events emitted by this contract
+    """
+    kinds = _selector_kinds
+    decoded = []
+    append = decoded.append
+    for event in events:
+        if contract_address is not None and int(event["from_address"], 16) != contract_address:
+            continue
+        keys = event["keys"]
+        kind = kinds.get(keys[0], -1)
+        if kind == -1:
+            kind = _selector_kind(keys[0])
+        if kind is not None:
+            append((event["block_number"], kind, int(keys[1], 16), int(event["data"][0], 16)))
+    return decoded
+
+
+def iter_raw_batches(lines: Iterable[Line], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[list]:
+    """
+    Parse newline-delimited JSON a batch at a time
+
+    All lines of a batch are joined into one JSON array and parsed with a
+    single json.loads call. Blank lines are skipped; lines must be all str
+    or all bytes.
+    """
+    batch = []
+    append = batch.append
+    for line in lines:
+        if line.strip():
+            append(line.rstrip())
+            if len(batch) >= batch_size:
+                yield _load_batch(batch)
+                batch.clear()
+    if batch:
+        yield _load_batch(batch)
+
+
+def _load_batch(lines: list) -> list:
+    if isinstance(lines[0], bytes):
+        return json.loads(b"[" + b",".join(lines) + b"]")
+    return json.loads("[" + ",".join(lines) + "]")
+
+
+def read_event_files(paths: Sequence[str]) -> Iterator[bytes]:
+    """Lines of each file in turn; files ending in .gz are decompressed"""
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as f:
+            yield from f
+
+
+class SQLiteIndexStore:
+    """
+    Indexed positions and the indexer checkpoint in one SQLite database
+
+    Amounts are u128 in the contract, so every column is a 32-byte
+    big-endian cell, as in SQLitePositionBackend.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS indexed_positions ("
+        " address BLOB PRIMARY KEY,"
+        " commitment BLOB NOT NULL,"
+        " debt BLOB NOT NULL,"
+        " withdrawn BLOB NOT NULL"
+        ") WITHOUT ROWID",
+        "CREATE TABLE IF NOT EXISTS indexer_checkpoint ("
+        " id INTEGER PRIMARY KEY CHECK (id = 0),"
+        " block_number INTEGER NOT NULL,"
+        " block_offset INTEGER NOT NULL,"
+        " events INTEGER NOT NULL"
+        ")",
+    )
+    _UPSERT = "INSERT OR REPLACE INTO indexed_positions (address, commitment, debt, withdrawn) VALUES (?, ?, ?, ?)"
+    _DELETE = "DELETE FROM indexed_positions WHERE address = ?"
+    _CHECKPOINT = (
+        "INSERT OR REPLACE INTO indexer_checkpoint (id, block_number, block_offset, events) VALUES (0, ?, ?, ?)"
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in self._SCHEMA:
+            self._conn.execute(statement)
+        self._lock = threading.Lock()
+
+    def load(self) -> Tuple[Dict[int, List[int]], Tuple[int, int], int]:
+        """(positions, (block_number, block_offset) cursor, events applied)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT address, commitment, debt, withdrawn FROM indexed_positions").fetchall()
+            checkpoint = self._conn.execute(
+                "SELECT block_number, block_offset, events FROM indexer_checkpoint"
+            ).fetchone()
+        positions = {
+            int.from_bytes(address, 'big'): [int.from_bytes(cell, 'big') for cell in cells]
+            for address, *cells in rows
+        }
+        block_number, block_offset, events = checkpoint if checkpoint else (-1, 0, 0)
+        return positions, (block_number, block_offset), events
+
+    def commit(self, changes: Dict[int, Optional[List[int]]], cursor: Tuple[int, int], events: int) -> None:
+        """Write changed positions (None deletes) and the checkpoint cursor atomically"""
+        upserts = [
+            (address.to_bytes(FELT_BYTES, 'big'), *(cell.to_bytes(FELT_BYTES, 'big') for cell in position))
+            for address, position in changes.items() if position is not None
+        ]
+        deletes = [(address.to_bytes(FELT_BYTES, 'big'),) for address, position in changes.items() if position is None]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if upserts:
+                    self._conn.executemany(self._UPSERT, upserts)
+                if deletes:
+                    self._conn.executemany(self._DELETE, deletes)
+                self._conn.execute(self._CHECKPOINT, (*cursor, events))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __repr__(self) -> str:
+        return f"SQLiteIndexStore({self.path!r})"
+
+
+class EventIndexer:
+    """
+    Applies lending events to position state in batches
+
+    A deposit replaces the position's commitment; mints and repayments
+    move its debt; withdrawals accumulate in withdrawn (the event does not
+    say whether the commitment was cleared); a liquidation removes the
+    position.
+
+    Args:
+        store: Persists positions and the checkpoint (default: memory only)
+        commitment_tree: Kept in sync with every position's commitment;
+            filled from the store's positions if it is empty
+        contract_address: Only index events emitted by this contract; the
+            checkpoint counts filtered events, so keep it fixed across restarts
+        batch_size: Lines per json.loads and events per applied batch
+        checkpoint_interval: Events applied between checkpoints
+    """
+
+    def __init__(
+        self,
+        store: Optional[SQLiteIndexStore] = None,
+        commitment_tree: Optional[MerkleTree] = None,
+        contract_address: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL
+    ):
+        if batch_size < 1 or checkpoint_interval < 1:
+            raise ValueError("Batch size and checkpoint interval must be positive")
+        self.store = store
+        self.commitment_tree = commitment_tree
+        self.contract_address = contract_address
+        self.batch_size = batch_size
+        self.checkpoint_interval = checkpoint_interval
+        self.positions: Dict[int, List[int]] = {}
+        # Block of the last applied event and how many of its events were applied
+        self.block_number = -1
+        self.block_offset = 0
+        self.events_applied = 0
+        if store is not None:
+            self.positions, (self.block_number, self.block_offset), self.events_applied = store.load()
+            # An empty tree is rebuilt from the restored positions; a tree
+            # with its own persistent store is expected to match them
+            if commitment_tree is not None and commitment_tree.root == 0 and self.positions:
+                commitment_tree.update_many(
+                    (address, position[0]) for address, position in self.positions.items() if position[0]
+                )
+        self._checkpointed = self.events_applied
+        self._unsaved = set()
+
+    def position(self, address: Union[int, str]) -> Optional[IndexedPosition]:
+        """Current state of a position, or None if it has none"""
+        if isinstance(address, str):
+            address = int(address, 16)
+        position = self.positions.get(address)
+        return IndexedPosition(*position) if position is not None else None
+
+    def run(self, lines: Iterable[Line]) -> int:
+        """
+        Index newline-delimited JSON events, resuming after the checkpoint
+
+        Blocks must arrive in non-decreasing order, and a re-read stream
+        must repeat each block's events in the same order. Checkpoints at
+        the end of input.
+
+        Returns:
+            Number of events applied
+        """
+        applied = self.events_applied
+        skip_block, skip_count = self.block_number, self.block_offset
+        for raw in iter_raw_batches(lines, self.batch_size):
+            events = decode_events(raw, self.contract_address)
+            if events and events[0][0] <= skip_block:
+                # Drop events applied before the restart
+                kept = []
+                for event in events:
+                    if event[0] < skip_block:
+                        continue
+                    if event[0] == skip_block and skip_count:
+                        skip_count -= 1
+                        continue
+                    kept.append(event)
+                events = kept
+            self.apply(events)
+        self.checkpoint()
+        return self.events_applied - applied
+
+    def apply(self, events: Sequence[Event]) -> None:
+        """
+        Apply decoded events that follow the last applied one
+
+        Raises:
+            ValueError: If the events start before the last applied block
+        """
+        if not events:
+            return
+        if events[0][0] < self.block_number:
+            raise ValueError(f"Block {events[0][0]} is before the last applied block {self.block_number}")
+
+        positions = self.positions
+        touched = self._unsaved
+        commitments_touched = set()
+        for _, kind, address, value in events:
+            touched.add(address)
+            if kind == LIQUIDATED:
+                positions.pop(address, None)
+                commitments_touched.add(address)
+                continue
+            position = positions.get(address)
+            if position is None:
+                position = positions[address] = [0, 0, 0]
+            if kind == DEPOSITED:
+                position[0] = value
+                commitments_touched.add(address)
+            elif kind == MINTED:
+                position[1] += value
+            elif kind == REPAID:
+                position[1] = max(position[1] - value, 0)
+            else:
+                position[2] += value
+
+        last_block = events[-1][0]
+        trailing = len(events)
+        while trailing and events[trailing - 1][0] == last_block:
+            trailing -= 1
+        if trailing == 0 and last_block == self.block_number:
+            self.block_offset += len(events)
+        else:
+            self.block_offset = len(events) - trailing
+        self.block_number = last_block
+        self.events_applied += len(events)
+
+        if self.commitment_tree is not None and commitments_touched:
+            self.commitment_tree.update_many(
+                (address, positions[address][0] if address in positions else 0) for address in commitments_touched
+            )
+        if self.events_applied - self._checkpointed >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """Persist positions touched since the last checkpoint together with the cursor"""
+        if self.store is not None and self.events_applied != self._checkpointed:
+            positions = self.positions
+            self.store.commit(
+                {address: positions.get(address) for address in self._unsaved},
+                (self.block_number, self.block_offset),
+                self.events_applied
+            )
+        self._unsaved = set()
+        self._checkpointed = self.events_applied
@@ -2,9 +2,20 @@
 Integration utilities for connecting Python commitment system to Cairo contracts
 """
 
-import json
-from typing import Dict, List, Any
-from .pedersen import PedersenCommitmentSystem, Commitment, btc_to_satoshis
+from typing import Dict, Iterator, List, Any, Optional
+from .indexer import DEPOSITED, EVENT_NAMES, LIQUIDATED, MINTED, REPAID, decode_event
+from .liquidation import BatchLiquidator
+from .liquidation_index import LIQUIDATION_THRESHOLD, LiquidationIndex
+from .merkle import MerkleTree, address_key
+from .multicall import DEFAULT_MAX_CALLDATA_FELTS, MulticallBuilder, encode_felt_array
+from .nonce_pool import NoncePool
+from .pedersen import PedersenCommitmentSystem, btc_to_satoshis
+from .positions import PositionBackend, PositionRecord, health_ratio
+from .store import CommitmentStore
+from .wire import expand_response, iter_batch_results, iter_decode
+
+# PUSD has 18 decimals and debt is tracked in satoshis (1 PUSD = 1e8)
+PUSD_UNITS_PER_SATOSHI = 10 ** 10
 
 class ZenLendIntegration:
     """
@@ -14,11 +25,149 @@ class ZenLendIntegration:
     - Converting Python proofs to Cairo-compatible format
     - Generating transaction parameters
     - Formatting contract call data
+    
+    With a backend, positions are written through to it and read back on
+    a miss, with user_commitments / user_debts acting as the hot cache.
+    preload=True fills the cache from the backend at startup. close() (or
+    leaving a with block) flushes and closes the backend.
+    
+    liquidation_index orders the cached positions with debt by
+    liquidation price; it covers persisted positions once they are
+    loaded, so use preload=True when querying it across all users.
+    
+    With a commitment_tree, every position's commitment is kept in a
+    sparse Merkle tree keyed by address, for anchoring its root on-chain
+    and serving inclusion proofs. An empty tree is filled from the
+    backend by load_positions; a tree with its own persistent store is
+    expected to already match the backend.
+    
+    A nonce_pool (NoncePool) precomputes the nonce side of deposit
+    commitments off the request path.
+    
+    Debt changes are recorded when they land, not when they are
+    prepared: call confirm_mint / confirm_repay / confirm_liquidation, or
+    feed the contract's events to apply_debt_event and
+    apply_liquidation_event.
     """
     
-    def __init__(self):
-        self.commitment_system = PedersenCommitmentSystem()
-        self.user_commitments: Dict[str, Commitment] = {}
+    def __init__(
+        self,
+        backend: Optional[PositionBackend] = None,
+        preload: bool = False,
+        commitment_tree: Optional[MerkleTree] = None,
+        nonce_pool: Optional[NoncePool] = None
+    ):
+        self.commitment_system = PedersenCommitmentSystem(nonce_pool=nonce_pool)
+        self.user_commitments = CommitmentStore()
+        # Cumulative minted debt per user, in satoshis
+        self.user_debts: Dict[str, int] = {}
+        self.liquidation_index = LiquidationIndex(LIQUIDATION_THRESHOLD)
+        self.backend = backend
+        self.commitment_tree = commitment_tree
+        if backend is not None and preload:
+            self.load_positions()
+    
+    def load_positions(self) -> int:
+        """Bulk-load every persisted position into the cache"""
+        debts = self.user_debts
+        index = self.liquidation_index
+        tree = self.commitment_tree
+        fill_tree = tree is not None and tree.root == 0
+        leaves = []
+        
+        def rows():
+            for record in self.backend.iter_records():
+                if record.address in self.user_commitments:
+                    continue
+                if record.debt:
+                    debts[record.address] = record.debt
+                    index.update(record.address, int.from_bytes(record.value, 'big'), record.debt)
+                if fill_tree:
+                    leaves.append((address_key(record.address), int.from_bytes(record.commitment, 'big')))
+                yield record.address, record.value, record.nonce, record.commitment, record.commitment_y
+        
+        loaded = self.user_commitments.load_rows(rows())
+        if leaves:
+            tree.update_many(leaves)
+        return loaded
+    
+    def flush(self) -> None:
+        """Write out any position changes the backend is still buffering"""
+        if self.backend is not None:
+            self.backend.flush()
+    
+    def close(self) -> None:
+        """Flush and close the backend"""
+        if self.backend is not None:
+            self.backend.close()
+    
+    def __enter__(self) -> "ZenLendIntegration":
+        return self
+    
+    def __exit__(self, *exc) -> bool:
+        self.close()
+        return False
+    
+    def has_position(self, user_address: str) -> bool:
+        """
+        Whether user_address has a position
+        
+        Read-through lookup: a miss in memory loads the position and its
+        debt from the backend, if there is one.
+        """
+        if user_address in self.user_commitments:
+            return True
+        if self.backend is None:
+            return False
+        
+        record = self.backend.get(user_address)
+        if record is None:
+            return False
+        self.user_commitments.load_rows([
+            (user_address, record.value, record.nonce, record.commitment, record.commitment_y)
+        ])
+        if record.debt:
+            self.user_debts[user_address] = record.debt
+            self.liquidation_index.update(user_address, int.from_bytes(record.value, 'big'), record.debt)
+        return True
+    
+    def _tree_key(self, user_address: str) -> Optional[int]:
+        """
+        Commitment tree key of user_address, or None without a tree
+        
+        Callers compute it before changing any state, so an address the
+        tree cannot hold leaves the cache, index and backend untouched.
+        
+        Raises:
+            ValueError: If the address is not a hex felt
+        """
+        return address_key(user_address) if self.commitment_tree is not None else None
+    
+    def _position_changed(self, user_address: str, key: Optional[int]) -> None:
+        """Re-index and persist a cached position after its collateral or debt changed"""
+        collateral = self.user_commitments[user_address].value
+        debt = self.user_debts.get(user_address, 0)
+        self.liquidation_index.update(user_address, collateral, debt)
+        if key is not None:
+            commitment = self.user_commitments[user_address].commitment
+            if self.commitment_tree.get(key) != commitment:
+                self.commitment_tree.update(key, commitment)
+        if self.backend is not None:
+            value, nonce, commitment, commitment_y = self.user_commitments.row_bytes(user_address)
+            self.backend.upsert(PositionRecord(
+                user_address, value, nonce, commitment, debt, health_ratio(collateral, debt), commitment_y
+            ))
+    
+    def _drop_position(self, user_address: str) -> None:
+        """Forget a closed position everywhere"""
+        key = self._tree_key(user_address)
+        self.user_commitments.pop(user_address, None)
+        self.user_debts.pop(user_address, None)
+        self.liquidation_index.remove(user_address)
+        if key is not None:
+            self.commitment_tree.update(key, 0)
+        if self.backend is not None:
+            self.backend.delete(user_address)
     
     def prepare_deposit_transaction(self, user_address: str, btc_amount: float) -> Dict[str, Any]:
         """
@@ -30,10 +179,17 @@ class ZenLendIntegration:
             
         Returns:
             Transaction parameters for Cairo contract call
+        
+        Raises:
+            ValueError: If there is a commitment tree and user_address is not a hex felt
         """
+        key = self._tree_key(user_address)
+        
         # Generate commitment
         commitment = self.commitment_system.commit_btc_amount(btc_amount)
+        self.has_position(user_address)
         self.user_commitments[user_address] = commitment
+        self._position_changed(user_address, key)
         
         # Convert to Cairo felt252 format
         commitment_felt = hex(commitment.commitment)
@@ -72,16 +228,20 @@ class ZenLendIntegration:
             
         Returns:
             Transaction parameters for Cairo contract call
+        
+        Solvency is proven for the user's total debt once this mint lands.
+        The debt itself is recorded by confirm_mint (or apply_debt_event).
         """
-        if user_address not in self.user_commitments:
+        if not self.has_position(user_address):
             raise ValueError("No collateral commitment found for user")
         
         commitment = self.user_commitments[user_address]
+        total_debt = self.user_debts.get(user_address, 0) + btc_to_satoshis(pusd_amount)
         
         # Generate solvency proof
         solvency_proof = self.commitment_system.generate_solvency_proof(
             commitment,
-            pusd_amount,
+            total_debt / 100_000_000,
             collateral_ratio
         )
         
@@ -92,11 +252,39 @@ class ZenLendIntegration:
             "function_name": "mint_stable",
             "calldata": [
                 str(mint_amount),
-                json.dumps(solvency_proof["proof_elements"])
+                *encode_felt_array(solvency_proof["proof_elements"])
             ],
             "proof_data": solvency_proof
         }
     
+    def prepare_repay_transaction(self, user_address: str, pusd_amount: float) -> Dict[str, Any]:
+        """
+        Prepare transaction data for repaying PUSD debt
+        
+        Args:
+            user_address: User's Starknet address
+            pusd_amount: Amount of PUSD to repay
+            
+        Returns:
+            Transaction parameters for Cairo contract call; remaining_debt
+            is the debt once it lands, recorded by confirm_repay
+        """
+        if not self.has_position(user_address):
+            raise ValueError("No collateral commitment found for user")
+        
+        debt = self.user_debts.get(user_address, 0)
+        repay_satoshis = btc_to_satoshis(pusd_amount)
+        if repay_satoshis > debt:
+            raise ValueError("Repay amount exceeds debt")
+        
+        repay_amount = int(pusd_amount * 1e18)  # ERC20 decimals
+        
+        return {
+            "function_name": "repay_debt",
+            "calldata": [str(repay_amount)],
+            "remaining_debt": debt - repay_satoshis
+        }
+    
     def prepare_liquidation_transaction(
         self,
         liquidator_address: str,
@@ -113,8 +301,12 @@ class ZenLendIntegration:
             
         Returns:
             Transaction parameters for liquidation
+        
+        The borrower's position is kept: the transaction may never be
+        sent, may revert or may lose to another keeper. Call
+        confirm_liquidation (or apply_liquidation_event) once it lands.
         """
-        if borrower_address not in self.user_commitments:
+        if not self.has_position(borrower_address):
             raise ValueError("No commitment found for borrower")
         
         commitment = self.user_commitments[borrower_address]
@@ -123,18 +315,119 @@ class ZenLendIntegration:
         liquidation_proof = self.commitment_system.generate_liquidation_proof(
             commitment,
             debt_amount,
-            liquidation_threshold=1.2
+            liquidation_threshold=LIQUIDATION_THRESHOLD
         )
         
+        # The position stays until the liquidation is confirmed on-chain
         return {
             "function_name": "liquidate_position",
             "calldata": [
                 borrower_address,
-                json.dumps(liquidation_proof["proof_elements"])
+                *encode_felt_array(liquidation_proof["proof_elements"])
             ],
             "proof_data": liquidation_proof
         }
     
+    def prepare_batch_liquidation(
+        self,
+        btc_price: float,
+        borrowers: Optional[List[str]] = None,
+        liquidator: Optional[BatchLiquidator] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream liquidation transactions for every position underwater at btc_price
+        
+        Args:
+            btc_price: Price the positions are proven liquidatable at
+            borrowers: Candidates to check (default: the liquidation index)
+            liquidator: BatchLiquidator with worker processes; without
+                one, proofs are generated inline
+            
+        Returns:
+            Iterator of prepare_liquidation_transaction-shaped results, in
+            completion order; positions are kept until confirm_liquidation
+        """
+        if liquidator is None:
+            liquidator = BatchLiquidator(self)
+        elif liquidator.integration is not self:
+            raise ValueError("Liquidator belongs to a different integration")
+        return liquidator.liquidate(btc_price, borrowers)
+    
+    def confirm_mint(self, user_address: str, pusd_amount: float) -> int:
+        """
+        Record a mint after it landed on-chain; returns the new debt in satoshis
+        
+        Raises:
+            ValueError: If the user has no position
+        """
+        return self._change_debt(user_address, btc_to_satoshis(pusd_amount))
+    
+    def confirm_repay(self, user_address: str, pusd_amount: float) -> int:
+        """
+        Record a repayment after it landed on-chain; returns the new debt in satoshis
+        
+        The chain has accepted it, so a repayment larger than the tracked
+        debt clears the debt rather than failing.
+        
+        Raises:
+            ValueError: If the user has no position
+        """
+        return self._change_debt(user_address, -btc_to_satoshis(pusd_amount))
+    
+    def _change_debt(self, user_address: str, delta: int) -> int:
+        """Apply a landed debt change, never below zero, and re-index the position"""
+        if not self.has_position(user_address):
+            raise ValueError("No collateral commitment found for user")
+        key = self._tree_key(user_address)
+        debt = max(0, self.user_debts.get(user_address, 0) + delta)
+        self.user_debts[user_address] = debt
+        self._position_changed(user_address, key)
+        return debt
+    
+    def apply_debt_event(self, event_data: Dict[str, Any]) -> bool:
+        """
+        confirm_mint / confirm_repay for a DebtMinted or DebtRepaid JSON-RPC event
+        
+        The user is matched by its hex() address; other events, and
+        events for users without a cached or persisted position, are
+        ignored. Returns True if a debt was changed.
+        """
+        decoded = decode_event(event_data)
+        if decoded is None or decoded[1] not in (MINTED, REPAID):
+            return False
+        _, kind, address, amount = decoded
+        user_address = hex(address)
+        if not self.has_position(user_address):
+            return False
+        satoshis = amount // PUSD_UNITS_PER_SATOSHI
+        self._change_debt(user_address, satoshis if kind == MINTED else -satoshis)
+        return True
+    
+    def confirm_liquidation(self, borrower_address: str) -> bool:
+        """
+        Drop a borrower's position after its liquidation landed on-chain
+        
+        liquidate_position clears the borrower's debt and commitment, so
+        the position leaves the cache, index, tree and backend. Returns
+        False if there was no position to drop.
+        """
+        if not self.has_position(borrower_address):
+            return False
+        self._drop_position(borrower_address)
+        return True
+    
+    def apply_liquidation_event(self, event_data: Dict[str, Any]) -> bool:
+        """
+        confirm_liquidation for a PositionLiquidated JSON-RPC event
+        
+        The borrower is matched by its hex() address; other events are
+        ignored. Returns True if a position was dropped.
+        """
+        decoded = decode_event(event_data)
+        if decoded is None or decoded[1] != LIQUIDATED:
+            return False
+        return self.confirm_liquidation(hex(decoded[2]))
+    
     def verify_position_health(self, user_address: str, debt_amount: float) -> Dict[str, Any]:
         """
         Check if a position is healthy (properly collateralized)
@@ -146,7 +439,7 @@ class ZenLendIntegration:
         Returns:
             Health status and proof data
         """
-        if user_address not in self.user_commitments:
+        if not self.has_position(user_address):
             return {"healthy": False, "reason": "No collateral found"}
         
         commitment = self.user_commitments[user_address]
@@ -163,9 +456,108 @@ class ZenLendIntegration:
             "collateral_ratio": (commitment.value / debt_satoshis) if debt_satoshis > 0 else float('inf')
         }
     
+    def audit_positions(self, user_addresses: Optional[List[str]] = None) -> Dict[str, bool]:
+        """
+        Check that cached positions open to their stored value and nonce
+        
+        Positions with a stored commitment point go through one combined
+        "ec" batch check (see verify_openings_batch), so auditing many
+        positions costs far less than recomputing each commitment.
+        
+        Args:
+            user_addresses: Positions to audit (default: every cached position)
+            
+        Returns:
+            Address -> whether its opening is valid
+        
+        Raises:
+            ValueError: If an address has no position
+        """
+        if user_addresses is None:
+            user_addresses = list(self.user_commitments)
+        openings = []
+        for address in user_addresses:
+            if not self.has_position(address):
+                raise ValueError(f"No collateral commitment found for {address}")
+            commitment = self.user_commitments[address]
+            point_or_x = (
+                (commitment.commitment, commitment.commitment_y) if commitment.commitment_y
+                else commitment.commitment
+            )
+            openings.append((point_or_x, commitment.value, commitment.nonce))
+        return dict(zip(user_addresses, self.commitment_system.verify_openings_batch(openings)))
+    
+    def liquidatable_positions(self, btc_price: float = 1.0) -> List[str]:
+        """Indexed addresses liquidatable at btc_price, most under-collateralized first"""
+        return self.liquidation_index.liquidatable_at(btc_price)
+    
+    def worst_positions(self, n: int = 10) -> List[Dict[str, Any]]:
+        """The n indexed positions with the lowest collateral ratio"""
+        return [
+            {
+                "user_address": address,
+                "collateral_ratio": ratio,
+                "liquidation_price": self.liquidation_index.get(address)[0]
+            }
+            for address, ratio in self.liquidation_index.worst(n)
+        ]
+    
+    def commitment_root(self) -> str:
+        """Root of the commitment tree, as a felt hex string"""
+        if self.commitment_tree is None:
+            raise ValueError("No commitment tree configured")
+        return hex(self.commitment_tree.root)
+    
+    def commitment_inclusion_proof(self, user_address: str) -> Dict[str, Any]:
+        """
+        Merkle proof of a user's commitment (or of its absence) against the current root
+        
+        Check it with merkle.verify_proof(root, key, commitment, proof),
+        where commitment is 0 for a user without a position.
+        """
+        if self.commitment_tree is None:
+            raise ValueError("No commitment tree configured")
+        key = address_key(user_address)
+        root, commitment, proof = self.commitment_tree.prove(key)
+        return {
+            "root": hex(root),
+            "key": hex(key),
+            "commitment": hex(commitment),
+            "proof": proof
+        }
+    
+    def prepare_multicall(
+        self,
+        contract_address: str,
+        transactions: List[Dict[str, Any]],
+        max_calldata_felts: int = DEFAULT_MAX_CALLDATA_FELTS
+    ) -> Dict[str, Any]:
+        """
+        Pack prepared transactions into as few account multicalls as fit
+        
+        Args:
+            contract_address: PrivateBTCLending address the calls target
+            transactions: Results of the prepare_*_transaction methods
+            max_calldata_felts: __execute__ calldata budget per transaction
+            
+        Returns:
+            __execute__ calldata for each transaction, plus how many
+            liquidations were dropped as repeats of a queued borrower
+        """
+        builder = MulticallBuilder(max_calldata_felts)
+        builder.add_prepared(contract_address, transactions)
+        return {
+            "function_name": "__execute__",
+            "transactions": [
+                {"calls": len(batch), "calldata": [hex(felt) for felt in calldata]}
+                for batch, calldata in zip(builder.batches(), builder.build())
+            ],
+            "skipped_calls": len(builder.skipped)
+        }
+    
     def get_user_commitment(self, user_address: str) -> Dict[str, Any]:
         """Get commitment data for a user"""
-        if user_address not in self.user_commitments:
+        if not self.has_position(user_address):
             return None
         
         commitment = self.user_commitments[user_address]
@@ -190,18 +582,63 @@ def format_cairo_calldata(calldata: List[str]) -> str:
     return " ".join(calldata)
 
 
+def iter_cbor_responses(stream) -> Iterator[Dict[str, Any]]:
+    """
+    Decode a stream of CBOR API responses (e.g. a CBOR sequence)
+    
+    Args:
+        stream: Buffered binary stream, e.g. an HTTP response
+        
+    Returns:
+        Iterator over response bodies in the JSON API's shape
+    """
+    for item in iter_decode(stream):
+        yield expand_response(item)
+
+
+def iter_cbor_batch_results(stream) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the per-item results of a CBOR /generate-commitments response
+    
+    Results are yielded in the JSON API's shape as they are read, so a
+    large batch never has to be held in memory at once.
+    
+    Args:
+        stream: Buffered binary stream, e.g. an HTTP response
+        
+    Returns:
+        Iterator over per-item results
+    """
+    for result in iter_batch_results(stream):
+        yield expand_response(result)
+
+
 def parse_cairo_event(event_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Parse events emitted from Cairo contracts
     
     Args:
-        event_data: Raw event data from Starknet
+        event_data: JSON-RPC emitted event ("keys"/"data"/"block_number"),
+            or an already-decoded {"event_name", "user", "amount", "timestamp"}
         
     Returns:
         Parsed event information
     """
-    # This would parse actual Starknet event data
-    # For now, return a placeholder structure
+    if "keys" in event_data:
+        # JSON-RPC emitted event from PrivateBTCLending
+        decoded = decode_event(event_data)
+        if decoded is not None:
+            block_number, kind, address, value = decoded
+            return {
+                "event_type": EVENT_NAMES[kind],
+                "user": hex(address),
+                "amount": 0 if kind == DEPOSITED else value,
+                "commitment": hex(value) if kind == DEPOSITED else None,
+                "block_number": block_number,
+                "timestamp": int(event_data["data"][-1], 16)
+            }
+    
+    # Pre-decoded event
     return {
         "event_type": event_data.get("event_name", "unknown"),
         "user": event_data.get("user", ""),
@@ -229,9 +666,10 @@ if __name__ == "__main__":
     print("2. Preparing PUSD mint transaction")
     try:
         mint_tx = integration.prepare_mint_transaction(user_addr, 1.0)
+        integration.confirm_mint(user_addr, 1.0)
         print(f"   Function: {mint_tx['function_name']}")
         print(f"   Mint amount: {mint_tx['calldata'][0]}")
-        print(f"   Proof components: {len(json.loads(mint_tx['calldata'][1]))} elements")
+        print(f"   Proof components: {mint_tx['calldata'][1]} elements")
         print()
     except ValueError as e:
         print(f"   Error: {e}")
@@ -0,0 +1,259 @@
+"""
+Batch Liquidation Proofs for Price Shocks
+
+A sharp BTC drop makes many positions liquidatable at once, and calling
+prepare_liquidation_transaction borrower by borrower proves them
+serially. BatchLiquidator takes a price and candidate borrowers and
+runs in three stages:
+
+1. Filter, in the calling process. Candidates are checked against the
+   cached collateral and tracked debt. Without an explicit list, they
+   come straight from the liquidation index.
+2. Prove, in worker processes (or inline with workers=0). Each job is a
+   chunk of borrowers, and produces their liquidation proofs and
+   liquidate_position calldata.
+3. Stream. Transactions are yielded as their chunks finish, so a keeper
+   can submit the first while later ones are still being proven.
+
+Each yielded transaction has the same shape as a
+prepare_liquidation_transaction result, and can go straight into
+prepare_multicall. As with prepare_liquidation_transaction, positions
+are left in place: the keeper calls confirm_liquidation (or
+apply_liquidation_event) for each transaction that lands, so one that
+is never sent or reverts loses nothing. Jobs are submitted most
+under-collateralized first, whether the candidates come from the index
+or from the caller.
+
+Proofs are made at the given price. A position is liquidatable at
+price P when collateral * P < debt * threshold, so the proof's debt is
+the tracked debt divided by P (see liquidation_index.py).
+
+The hash proof of generate_liquidation_proof takes microseconds, less
+than handing it to a worker costs. Process parallelism pays off with
+range_proofs=True: each transaction then also carries a zero-knowledge
+range proof (generate_aggregated_liquidation_proof, "ec" mode) that
+collateral is below the threshold. Each of those takes hundreds of
+milliseconds.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from .executor import init_worker
+    from .liquidation_index import LIQUIDATION_THRESHOLD
+    from .multicall import encode_felt_array
+    from .pedersen import (
+        COMMITMENT_MODE_EC,
+        Commitment,
+        PedersenCommitmentSystem,
+        get_commitment_mode,
+        get_hash_encoding
+    )
+except ImportError:
+    from executor import init_worker
+    from liquidation_index import LIQUIDATION_THRESHOLD
+    from multicall import encode_felt_array
+    from pedersen import (
+        COMMITMENT_MODE_EC,
+        Commitment,
+        PedersenCommitmentSystem,
+        get_commitment_mode,
+        get_hash_encoding
+    )
+
+# Borrowers per worker job when only hash proofs are made
+HASH_PROOF_CHUNK = 64
+
+# (borrower address, collateral, nonce, commitment, debt in BTC at the price)
+Job = Tuple[str, int, int, int, float]
+
+
+def prove_liquidations(
+    jobs: Sequence[Job],
+    threshold: float = LIQUIDATION_THRESHOLD,
+    range_proofs: bool = False
+) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Liquidation transactions for a chunk of jobs; runs in the workers
+
+    Returns:
+        (borrower, transaction) per job; transaction is None when the
+        position turned out not to be liquidatable
+    """
+    system = PedersenCommitmentSystem()
+    results = []
+    for address, value, nonce, commitment_value, debt_amount in jobs:
+        commitment = Commitment(value, nonce, commitment_value)
+        try:
+            liquidation_proof = system.generate_liquidation_proof(
+                commitment, debt_amount, liquidation_threshold=threshold
+            )
+            if range_proofs:
+                liquidation_proof["range_proof"] = system.generate_aggregated_liquidation_proof(
+                    [commitment], [debt_amount], liquidation_threshold=threshold
+                )
+        except ValueError:
+            # The filter's float comparison disagreed at the boundary
+            results.append((address, None))
+            continue
+        results.append((address, {
+            "function_name": "liquidate_position",
+            "calldata": [
+                address,
+                *encode_felt_array(liquidation_proof["proof_elements"])
+            ],
+            "proof_data": liquidation_proof
+        }))
+    return results
+
+
+def _warm_worker(range_proofs: bool) -> bool:
+    """Build the range proof generators before the first job needs them"""
+    if range_proofs:
+        try:
+            from . import range_proof
+        except ImportError:
+            import range_proof
+        range_proof.get_vector_generators(range_proof.DEFAULT_RANGE_BITS)
+    return True
+
+
+class BatchLiquidator:
+    """
+    Parallel liquidation proof pipeline over a ZenLendIntegration
+
+    Args:
+        integration: Integration whose positions are liquidated
+        workers: Worker processes (0 proves inline, still streaming)
+        range_proofs: Attach an "ec"-mode range proof to every transaction
+        chunk_size: Borrowers per worker job (default 1 with range proofs, else 64)
+        start_method: multiprocessing start method for the workers
+
+    The worker pool is created on first use and kept for later price
+    shocks; call close() or use the liquidator as a context manager.
+    """
+
+    def __init__(
+        self,
+        integration,
+        workers: int = 0,
+        range_proofs: bool = False,
+        chunk_size: Optional[int] = None,
+        start_method: str = "spawn"
+    ):
+        if workers < 0:
+            raise ValueError("Worker count must not be negative")
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        if range_proofs and get_commitment_mode() != COMMITMENT_MODE_EC:
+            raise ValueError("Range proofs require ec commitment mode")
+
+        self.integration = integration
+        self.workers = workers
+        self.range_proofs = range_proofs
+        self.chunk_size = chunk_size or (1 if range_proofs else HASH_PROOF_CHUNK)
+        self.start_method = start_method
+        self.threshold = integration.liquidation_index.threshold
+        # Borrowers filtered out or found not liquidatable by the last run
+        self.skipped: List[str] = []
+        self._pool = None
+
+    def start(self) -> None:
+        """Spawn and warm up the workers ahead of a price shock"""
+        if not self.workers or self._pool is not None:
+            return
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=init_worker,
+            initargs=(get_commitment_mode(), get_hash_encoding(), None)
+        )
+        futures = [self._pool.submit(_warm_worker, self.range_proofs) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def close(self) -> None:
+        """Stop the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self) -> "BatchLiquidator":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.close()
+        return False
+
+    def candidates(self, btc_price: float, borrowers: Optional[Iterable[str]] = None) -> List[Job]:
+        """
+        Filter stage: jobs for the borrowers liquidatable at btc_price
+
+        Without borrowers, every indexed position liquidatable at the
+        price is a candidate. Others land in self.skipped. Jobs are
+        ordered most under-collateralized first.
+        """
+        if btc_price <= 0:
+            raise ValueError("BTC price must be positive")
+        integration = self.integration
+        if borrowers is None:
+            borrowers = integration.liquidatable_positions(btc_price)
+
+        jobs = []
+        seen = set()
+        for address in borrowers:
+            if address in seen:
+                continue
+            seen.add(address)
+            if not integration.has_position(address):
+                self.skipped.append(address)
+                continue
+            debt = integration.user_debts.get(address, 0)
+            commitment = integration.user_commitments[address]
+            if not debt or commitment.value * btc_price >= debt * self.threshold:
+                self.skipped.append(address)
+                continue
+            jobs.append((address, commitment.value, commitment.nonce, commitment.commitment,
+                         debt / btc_price / 100_000_000))
+        # Lowest collateral / debt first; the ratio's order does not depend on the price
+        jobs.sort(key=lambda job: job[1] / job[4])
+        return jobs
+
+    def liquidate(self, btc_price: float, borrowers: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream liquidation transactions for the positions underwater at btc_price
+
+        Positions are not dropped here; confirm each liquidation that
+        lands. Closing the iterator early cancels the unstarted jobs.
+        """
+        self.skipped = []
+        jobs = self.candidates(btc_price, borrowers)
+
+        if not self.workers:
+            # Nothing to amortize inline, so each job streams on its own
+            for job in jobs:
+                yield from self._finish(prove_liquidations([job], self.threshold, self.range_proofs))
+            return
+
+        from concurrent.futures import as_completed
+
+        chunks = [jobs[i:i + self.chunk_size] for i in range(0, len(jobs), self.chunk_size)]
+        self.start()
+        futures = [self._pool.submit(prove_liquidations, chunk, self.threshold, self.range_proofs)
+                   for chunk in chunks]
+        try:
+            for future in as_completed(futures):
+                yield from self._finish(future.result())
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _finish(self, results: List[Tuple[str, Optional[Dict[str, Any]]]]) -> Iterator[Dict[str, Any]]:
+        for address, transaction in results:
+            if transaction is None:
+                self.skipped.append(address)
+                continue
+            yield transaction
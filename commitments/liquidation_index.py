@@ -0,0 +1,117 @@
+"""
+Liquidation-Price Index
+
+Keeps borrowing positions ordered by the BTC price at which they become
+liquidatable, so a price tick can find every at-risk position without
+re-checking each user.
+
+With collateral and debt both in satoshi units (the convention of
+verify_position_health and generate_liquidation_proof, where a price of
+1.0 compares them directly), a position is liquidatable at price P when
+
+    collateral * P < debt * threshold
+
+i.e. when P is below its liquidation price threshold * debt / collateral.
+Positions without debt are not indexed.
+"""
+
+import heapq
+from bisect import bisect_right, insort
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+
+# Matches the threshold prepare_liquidation_transaction proves against
+LIQUIDATION_THRESHOLD = 1.2
+
+
+class LiquidationIndex:
+    """
+    Positions ordered by liquidation price, plus a min-heap of health ratios
+
+    Args:
+        threshold: Liquidation threshold (e.g., 1.2 = 120%)
+
+    update() and remove() are O(log N) searches plus a list insert; the
+    heap is invalidated lazily and compacted once stale entries dominate.
+    """
+
+    def __init__(self, threshold: float = LIQUIDATION_THRESHOLD):
+        self.threshold = threshold
+        # Sorted (liquidation_price, address)
+        self._by_price: List[Tuple[float, str]] = []
+        # (health_ratio, sequence, address); stale when sequence is outdated
+        self._heap: List[Tuple[float, int, str]] = []
+        # address -> (liquidation_price, health_ratio, sequence)
+        self._entries: Dict[str, Tuple[float, float, int]] = {}
+        self._sequence = count()
+
+    def liquidation_price(self, collateral: int, debt: int) -> float:
+        """Price below which the position is liquidatable"""
+        if collateral <= 0:
+            return float('inf')
+        return self.threshold * debt / collateral
+
+    def update(self, address: str, collateral: int, debt: int) -> None:
+        """Insert or re-position an address after its collateral or debt changed"""
+        self.remove(address)
+        if debt <= 0:
+            return
+
+        price = self.liquidation_price(collateral, debt)
+        ratio = collateral / debt
+        sequence = next(self._sequence)
+        insort(self._by_price, (price, address))
+        heapq.heappush(self._heap, (ratio, sequence, address))
+        self._entries[address] = (price, ratio, sequence)
+
+    def remove(self, address: str) -> None:
+        """Drop an address (no-op if not indexed)"""
+        entry = self._entries.pop(address, None)
+        if entry is None:
+            return
+
+        position = bisect_right(self._by_price, (entry[0], address)) - 1
+        del self._by_price[position]
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._compact()
+
+    def _compact(self) -> None:
+        self._heap = [(ratio, sequence, address) for address, (_, ratio, sequence) in self._entries.items()]
+        heapq.heapify(self._heap)
+
+    def _is_current(self, item: Tuple[float, int, str]) -> bool:
+        entry = self._entries.get(item[2])
+        return entry is not None and entry[2] == item[1]
+
+    def liquidatable_at(self, price: float) -> List[str]:
+        """Addresses liquidatable at price, highest liquidation price first"""
+        start = bisect_right(self._by_price, (price, chr(0x10FFFF)))
+        return [address for _, address in reversed(self._by_price[start:])]
+
+    def count_liquidatable_at(self, price: float) -> int:
+        return len(self._by_price) - bisect_right(self._by_price, (price, chr(0x10FFFF)))
+
+    def worst(self, n: int = 1) -> List[Tuple[str, float]]:
+        """Up to n (address, health_ratio) pairs with the lowest collateral / debt"""
+        found = []
+        while self._heap and len(found) < n:
+            item = heapq.heappop(self._heap)
+            if self._is_current(item):
+                found.append(item)
+        for item in found:
+            heapq.heappush(self._heap, item)
+        return [(address, ratio) for ratio, _, address in found]
+
+    def get(self, address: str) -> Optional[Tuple[float, float]]:
+        """(liquidation_price, health_ratio) for an indexed address"""
+        entry = self._entries.get(address)
+        return entry[:2] if entry else None
+
+    def __contains__(self, address: object) -> bool:
+        return address in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"LiquidationIndex({len(self)} positions, threshold={self.threshold})"
@@ -0,0 +1,483 @@
+"""
+Sparse Merkle Tree over Position Commitments
+
+A binary Merkle-Patricia tree of height 251 keyed by Starknet address,
+laid out like Starknet's own state tries so a root computed here can be
+anchored on-chain and its proofs checked with Cairo's pedersen builtin:
+
+- leaf: the value itself (a non-zero felt; 0 means "no leaf")
+- binary node: pedersen(left, right)
+- edge node, a run of `length` single-child levels along `path`:
+  pedersen(child, path) + length
+- an empty tree has root 0
+
+Edges collapse the single-child chains of the 251-level sparse tree, so a
+tree of N leaves has about 2N nodes and an update rehashes about log2(N)
+of them. update_many applies a sorted batch in one recursive descent, so
+ancestors shared by several keys are rehashed once per batch.
+
+Nodes live in a NodeStore keyed by their position (height, key prefix);
+updates overwrite in place and each batch is written atomically. Reads go
+through a bounded LRU of decoded nodes, which is what keeps a
+SQLiteNodeStore-backed tree of millions of leaves within a fixed memory
+budget.
+"""
+
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .curve import FIELD_PRIME, pedersen_hash
+except ImportError:
+    from curve import FIELD_PRIME, pedersen_hash
+
+TREE_HEIGHT = 251
+
+# Decoded nodes kept in memory in front of the store
+DEFAULT_NODE_CACHE_SIZE = 100_000
+
+LEAF, BINARY, EDGE = 0, 1, 2
+
+# (LEAF, value) | (BINARY, hash, left, right) | (EDGE, hash, child, path, length)
+Node = Tuple[int, ...]
+# (height above the leaves, key >> height)
+Position = Tuple[int, int]
+
+HashFunction = Callable[[int, int], int]
+
+_ROOT: Position = (TREE_HEIGHT, 0)
+
+_default_hash: Optional[HashFunction] = None
+
+
+def default_hash_function() -> HashFunction:
+    """
+    starknet_py's Pedersen hash when it is installed, else curve.pedersen_hash
+
+    Both compute the same function; starknet_py's runs in native code
+    (crypto-cpp), the pure-Python one costs about 0.3ms per hash.
+    starknet_py is imported on first use rather than with this module.
+    """
+    global _default_hash
+    if _default_hash is None:
+        try:
+            from starknet_py.hash.utils import pedersen_hash as native_pedersen_hash
+            _default_hash = native_pedersen_hash
+        except ImportError:
+            _default_hash = pedersen_hash
+    return _default_hash
+
+
+def address_key(address: str) -> int:
+    """Tree key of a Starknet address given as a hex string"""
+    key = int(address, 16)
+    if not 0 <= key < 1 << TREE_HEIGHT:
+        raise ValueError(f"Address out of range for the commitment tree: {address}")
+    return key
+
+
+class NodeStore(ABC):
+    """Persistence interface for tree nodes"""
+
+    @abstractmethod
+    def get(self, position: Position) -> Optional[Node]:
+        """The node stored at position, or None"""
+
+    @abstractmethod
+    def write(self, changes: Dict[Position, Optional[Node]]) -> None:
+        """Apply one update's node writes (None deletes) atomically"""
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryNodeStore(NodeStore):
+    """Nodes in a dict; the tree is lost on restart"""
+
+    def __init__(self):
+        self._nodes: Dict[Position, Node] = {}
+
+    def get(self, position: Position) -> Optional[Node]:
+        return self._nodes.get(position)
+
+    def write(self, changes: Dict[Position, Optional[Node]]) -> None:
+        nodes = self._nodes
+        for position, node in changes.items():
+            if node is None:
+                nodes.pop(position, None)
+            else:
+                nodes[position] = node
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+
+def _encode_position(position: Position) -> bytes:
+    return bytes((position[0],)) + position[1].to_bytes(32, 'big')
+
+
+def _encode_node(node: Node) -> bytes:
+    encoded = bytes((node[0],)) + b"".join(field.to_bytes(32, 'big') for field in node[1:4])
+    if node[0] == EDGE:
+        encoded += bytes((node[4],))
+    return encoded
+
+
+def _decode_node(data: bytes) -> Node:
+    kind = data[0]
+    fields = [int.from_bytes(data[i:i + 32], 'big') for i in range(1, min(len(data), 97), 32)]
+    if kind == EDGE:
+        fields.append(data[97])
+    return (kind, *fields)
+
+
+class SQLiteNodeStore(NodeStore):
+    """
+    Nodes in a SQLite table in WAL mode
+
+    Each update is one transaction, so the stored tree is always the tree
+    after some complete update_many call.
+    """
+
+    _SCHEMA = "CREATE TABLE IF NOT EXISTS merkle_nodes (position BLOB PRIMARY KEY, node BLOB NOT NULL) WITHOUT ROWID"
+    _GET = "SELECT node FROM merkle_nodes WHERE position = ?"
+    _UPSERT = "INSERT OR REPLACE INTO merkle_nodes (position, node) VALUES (?, ?)"
+    _DELETE = "DELETE FROM merkle_nodes WHERE position = ?"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(self._SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, position: Position) -> Optional[Node]:
+        with self._lock:
+            row = self._conn.execute(self._GET, (_encode_position(position),)).fetchone()
+        return _decode_node(row[0]) if row else None
+
+    def write(self, changes: Dict[Position, Optional[Node]]) -> None:
+        upserts = [(_encode_position(p), _encode_node(n)) for p, n in changes.items() if n is not None]
+        deletes = [(_encode_position(p),) for p, n in changes.items() if n is None]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if upserts:
+                    self._conn.executemany(self._UPSERT, upserts)
+                if deletes:
+                    self._conn.executemany(self._DELETE, deletes)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM merkle_nodes").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __repr__(self) -> str:
+        return f"SQLiteNodeStore({self.path!r})"
+
+
+class MerkleTree:
+    """
+    Sparse Merkle tree of felt values keyed by 251-bit keys
+
+    Args:
+        store: Node storage (default: in memory)
+        cache_size: Decoded nodes kept in the LRU in front of the store
+        hash_function: Two-to-one felt hash (default: default_hash_function())
+    """
+
+    def __init__(
+        self,
+        store: Optional[NodeStore] = None,
+        cache_size: int = DEFAULT_NODE_CACHE_SIZE,
+        hash_function: Optional[HashFunction] = None
+    ):
+        if cache_size < 0:
+            raise ValueError("Cache size must not be negative")
+        self.store = store if store is not None else MemoryNodeStore()
+        self.cache_size = cache_size
+        self._hash = hash_function or default_hash_function()
+        self._cache: "OrderedDict[Position, Optional[Node]]" = OrderedDict()
+        self._changes: Dict[Position, Optional[Node]] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def root(self) -> int:
+        """Root hash, 0 for the empty tree"""
+        with self._lock:
+            node = self._get(_ROOT)
+        return node[1] if node is not None else 0
+
+    def _get(self, position: Position) -> Optional[Node]:
+        changes = self._changes
+        if position in changes:
+            return changes[position]
+        cache = self._cache
+        if position in cache:
+            cache.move_to_end(position)
+            return cache[position]
+        node = self.store.get(position)
+        if self.cache_size:
+            cache[position] = node
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return node
+
+    def _set(self, position: Position, node: Optional[Node]) -> None:
+        self._changes[position] = node
+
+    def _edge(self, child: int, path: int, length: int) -> Node:
+        return (EDGE, (self._hash(child, path) + length) % FIELD_PRIME, child, path, length)
+
+    def get(self, key: int) -> int:
+        """Value stored under key, 0 if absent"""
+        _check_key(key)
+        with self._lock:
+            height, prefix = _ROOT
+            node = self._get(_ROOT)
+            while node is not None:
+                if node[0] == LEAF:
+                    return node[1]
+                if node[0] == BINARY:
+                    height -= 1
+                    prefix = prefix << 1 | (key >> height) & 1
+                else:
+                    _, _, _, path, length = node
+                    height -= length
+                    if (key >> height) & ((1 << length) - 1) != path:
+                        return 0
+                    prefix = prefix << length | path
+                node = self._get((height, prefix))
+        return 0
+
+    def update(self, key: int, value: int) -> int:
+        """Set key to value (0 removes it) and return the new root"""
+        return self.update_many([(key, value)])
+
+    def update_many(self, items: Iterable[Tuple[int, int]]) -> int:
+        """
+        Apply many (key, value) updates and return the new root
+
+        A value of 0 removes the key; when a key repeats, the last value wins.
+        """
+        updates = {}
+        for key, value in items:
+            _check_key(key)
+            if not 0 <= value < FIELD_PRIME:
+                raise ValueError("Tree values must be felts")
+            updates[key] = value
+        if not updates:
+            return self.root
+
+        with self._lock:
+            self._changes = {}
+            try:
+                root = self._apply(TREE_HEIGHT, 0, self._get(_ROOT), sorted(updates.items()))
+                self._set(_ROOT, root)
+                self.store.write(self._changes)
+                cache = self._cache
+                for position, node in self._changes.items():
+                    if position in cache:
+                        cache[position] = node
+            finally:
+                self._changes = {}
+        return root[1] if root is not None else 0
+
+    def _apply(self, height: int, prefix: int, node: Optional[Node], items: List[Tuple[int, int]]) -> Optional[Node]:
+        """
+        New node at (height, prefix) after applying sorted items under it
+
+        Writes changed descendants to self._changes; the caller decides
+        where the returned node itself goes, since a parent edge may
+        absorb it.
+        """
+        if height == 0:
+            value = items[-1][1]
+            return (LEAF, value) if value else None
+
+        if node is None:
+            items = [item for item in items if item[1]]
+            if not items:
+                return None
+            # Edge down to the point where the keys first differ
+            split = ((items[0][0] ^ items[-1][0]) & ((1 << height) - 1)).bit_length()
+            split_prefix = items[0][0] >> split
+            if split:
+                child = self._split(split, split_prefix, None, None, items, None)
+            else:
+                child = (LEAF, items[0][1])
+            return self._edge_over(height - split, split_prefix & ((1 << (height - split)) - 1), child, (split, split_prefix))
+
+        if node[0] == BINARY:
+            child_height = height - 1
+            left = self._get((child_height, prefix << 1))
+            right = self._get((child_height, prefix << 1 | 1))
+            return self._split(height, prefix, left, right, items, None)
+
+        _, _, child_hash, path, length = node
+        child_height = height - length
+        mask = (1 << length) - 1
+        diverge = 0
+        for key, _ in items:
+            diverge |= ((key >> child_height) & mask) ^ path
+        if not diverge:
+            child_position = (child_height, prefix << length | path)
+            child = self._apply(child_height, child_position[1], self._get(child_position), items)
+            return self._edge_over(length, path, child, child_position)
+
+        # Some key leaves the edge: branch where the first one does
+        split_bits = diverge.bit_length()
+        common = length - split_bits
+        split_height = child_height + split_bits
+        split_prefix = prefix << common | path >> split_bits
+        bit = path >> (split_bits - 1) & 1
+        rest = split_bits - 1
+        if rest:
+            # Not stored yet; hashed by _split only if it survives unchanged
+            existing = (EDGE, None, child_hash, path & ((1 << rest) - 1), rest)
+        else:
+            existing = self._get((child_height, prefix << length | path))
+        left, right = (None, existing) if bit else (existing, None)
+        child = self._split(split_height, split_prefix, left, right, items, bit if rest else None)
+        return self._edge_over(common, path >> split_bits, child, (split_height, split_prefix))
+
+    def _split(
+        self,
+        height: int,
+        prefix: int,
+        left: Optional[Node],
+        right: Optional[Node],
+        items: List[Tuple[int, int]],
+        unstored: Optional[int]
+    ) -> Optional[Node]:
+        """Apply items below a branching point and normalize the result"""
+        child_height = height - 1
+        boundary = (prefix << 1 | 1) << child_height
+        middle = bisect_left(items, (boundary,))
+        children = [left, right]
+        dirty = [unstored == 0, unstored == 1]
+        for side, side_items in ((0, items[:middle]), (1, items[middle:])):
+            if side_items:
+                children[side] = self._apply(child_height, prefix << 1 | side, children[side], side_items)
+                dirty[side] = True
+        left, right = children
+
+        if left is not None and right is not None:
+            for side in (0, 1):
+                node = children[side]
+                if node[1] is None:
+                    node = children[side] = self._edge(node[2], node[3], node[4])
+                if dirty[side]:
+                    self._set((child_height, prefix << 1 | side), node)
+            left, right = children
+            return (BINARY, self._hash(left[1], right[1]), left[1], right[1])
+
+        for side in (0, 1):
+            if dirty[side] and children[side] is None:
+                self._set((child_height, prefix << 1 | side), None)
+        if left is None and right is None:
+            return None
+        side = 0 if right is None else 1
+        return self._edge_over(1, side, children[side], (child_height, prefix << 1 | side))
+
+    def _edge_over(self, length: int, path: int, child: Optional[Node], child_position: Position) -> Optional[Node]:
+        """Node `length` levels above child along path, merging consecutive edges"""
+        if length == 0:
+            return child
+        if child is None:
+            self._set(child_position, None)
+            return None
+        if child[0] == EDGE:
+            self._set(child_position, None)
+            return self._edge(child[2], path << child[4] | child[3], length + child[4])
+        self._set(child_position, child)
+        return self._edge(child[1], path, length)
+
+    def get_proof(self, key: int) -> List[Dict[str, Any]]:
+        """
+        Nodes from the root down to key's leaf, or to where key's path leaves the tree
+
+        Shaped like starknet_getProof nodes: {"binary": {"left", "right"}}
+        or {"edge": {"child", "path": {"value", "len"}}}, with hex felts.
+        """
+        _check_key(key)
+        proof = []
+        with self._lock:
+            height, prefix = _ROOT
+            node = self._get(_ROOT)
+            while node is not None and node[0] != LEAF:
+                if node[0] == BINARY:
+                    proof.append({"binary": {"left": hex(node[2]), "right": hex(node[3])}})
+                    height -= 1
+                    prefix = prefix << 1 | (key >> height) & 1
+                else:
+                    _, _, child, path, length = node
+                    proof.append({"edge": {"child": hex(child), "path": {"value": hex(path), "len": length}}})
+                    height -= length
+                    if (key >> height) & ((1 << length) - 1) != path:
+                        break
+                    prefix = prefix << length | path
+                node = self._get((height, prefix))
+        return proof
+
+    def prove(self, key: int) -> Tuple[int, int, List[Dict[str, Any]]]:
+        """(root, value, get_proof(key)) read together, consistent under concurrent updates"""
+        with self._lock:
+            return self.root, self.get(key), self.get_proof(key)
+
+
+def _check_key(key: int) -> None:
+    if not 0 <= key < 1 << TREE_HEIGHT:
+        raise ValueError(f"Tree keys must be below 2^{TREE_HEIGHT}")
+
+
+def verify_proof(
+    root: int,
+    key: int,
+    value: int,
+    proof: List[Dict[str, Any]],
+    hash_function: Optional[HashFunction] = None
+) -> bool:
+    """
+    Check a get_proof result against a root
+
+    value 0 checks that key is absent.
+    """
+    hash_function = hash_function or default_hash_function()
+    try:
+        if root == 0:
+            return value == 0 and not proof
+        expected = root
+        height = TREE_HEIGHT
+        for index, entry in enumerate(proof):
+            if "binary" in entry:
+                left, right = int(entry["binary"]["left"], 16), int(entry["binary"]["right"], 16)
+                if hash_function(left, right) != expected or height < 1:
+                    return False
+                height -= 1
+                expected = right if (key >> height) & 1 else left
+                continue
+            edge = entry["edge"]
+            child, path, length = int(edge["child"], 16), int(edge["path"]["value"], 16), edge["path"]["len"]
+            if not 1 <= length <= height or (hash_function(child, path) + length) % FIELD_PRIME != expected:
+                return False
+            height -= length
+            if (key >> height) & ((1 << length) - 1) != path:
+                # Key's path leaves the tree here: only absence is provable
+                return value == 0 and index == len(proof) - 1
+            expected = child
+        return height == 0 and expected == value != 0
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return False
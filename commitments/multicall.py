@@ -0,0 +1,158 @@
+"""
+Multicall Batching of Prepared Contract Calls
+
+Packs the calls prepared by ZenLendIntegration into the calldata of an
+account's __execute__, so a keeper sends one transaction for many
+positions instead of one each. The layout is the Cairo 1 account
+Array<Call> serialization:
+
+    [n_calls, to_1, selector_1, len_1, *calldata_1, to_2, ...]
+
+Cairo arrays are serialized as their length followed by their elements,
+which is how encode_felt_array lays out solvency_proof and
+liquidation_proof.
+
+Every call in a multicall runs as the sending account. Keeper work such
+as liquidations batches across positions; user-scoped entry points
+(deposit, mint, repay act on the caller's own position) only batch
+within that user's account.
+
+MulticallBuilder drops a second liquidation of a borrower already
+queued, which would revert once the first has cleared the debt, and
+splits the calls into transactions whose __execute__ calldata fits a
+felt budget. Every other call is kept, repeats included: two identical
+mints are two mints.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple, Union
+
+try:
+    from .curve import FIELD_PRIME
+except ImportError:
+    from curve import FIELD_PRIME
+
+# sn_keccak of each PrivateBTCLending entry point
+FUNCTION_SELECTORS = {
+    "deposit_collateral": 0x23312df85c61571a6479208a8dcab2604a8afc6308397d38723bc4412be6c59,
+    "withdraw_collateral": 0x24edce9f0cd5ff28df8174bb6190e6d67c11d8c7555ab6b3beaaada806e8071,
+    "mint_stable": 0xcee9446ef9b6d34632bd23e2d23404209b385381967e42158986d49d00e864,
+    "repay_debt": 0x36ed002b4bb279a4c9a5967488a9970cc2ce66bcc8d25238b6c9a3f06f18986,
+    "liquidate_position": 0x3c43e150ca840fd9e5333a4158e5070dab803a57a3e2b2eeac6a442075fb5e,
+}
+
+# Felts of __execute__ calldata per transaction; raise it where the network allows more
+DEFAULT_MAX_CALLDATA_FELTS = 2000
+
+# Entry points whose first argument names a position that can only be acted on once
+_ONCE_PER_POSITION = {FUNCTION_SELECTORS["liquidate_position"]}
+
+Felt = Union[int, str]
+
+
+class Call(NamedTuple):
+    """One contract call: target address, entry point selector and calldata felts"""
+    to: int
+    selector: int
+    calldata: Tuple[int, ...]
+
+
+def to_felt(value: Felt) -> int:
+    """Felt from an int or a hex ("0x...") or decimal string"""
+    felt = value if isinstance(value, int) else int(value, 0)
+    if not 0 <= felt < FIELD_PRIME:
+        raise ValueError(f"Not a felt: {value}")
+    return felt
+
+
+def encode_felt_array(values: Sequence[Felt]) -> List[str]:
+    """Serialize an Array<felt252> argument: its length, then the elements"""
+    return [str(len(values))] + [hex(to_felt(value)) for value in values]
+
+
+def call_from_prepared(contract_address: Felt, prepared: Dict) -> Call:
+    """
+    Call for a transaction from ZenLendIntegration.prepare_*_transaction
+
+    Raises:
+        ValueError: For an unknown function_name or non-felt calldata
+    """
+    function_name = prepared["function_name"]
+    selector = FUNCTION_SELECTORS.get(function_name)
+    if selector is None:
+        raise ValueError(f"Unknown entry point: {function_name}")
+    return Call(to_felt(contract_address), selector, tuple(to_felt(value) for value in prepared["calldata"]))
+
+
+def encode_execute_calldata(calls: Sequence[Call]) -> List[int]:
+    """__execute__ calldata for calls, in the Cairo 1 Array<Call> layout"""
+    calldata = [len(calls)]
+    for call in calls:
+        calldata.append(call.to)
+        calldata.append(call.selector)
+        calldata.append(len(call.calldata))
+        calldata.extend(call.calldata)
+    return calldata
+
+
+def call_size(call: Call) -> int:
+    """Felts a call adds to __execute__ calldata"""
+    return 3 + len(call.calldata)
+
+
+class MulticallBuilder:
+    """
+    Collects calls and packs them into as few multicalls as fit the budget
+
+    Args:
+        max_calldata_felts: Largest __execute__ calldata per transaction
+    """
+
+    def __init__(self, max_calldata_felts: int = DEFAULT_MAX_CALLDATA_FELTS):
+        if max_calldata_felts < 4:
+            raise ValueError("Calldata budget is too small for any call")
+        self.max_calldata_felts = max_calldata_felts
+        self.calls: List[Call] = []
+        self.skipped: List[Call] = []
+        self._seen = set()
+
+    def add(self, call: Call) -> bool:
+        """
+        Queue a call; False if it liquidates a position already queued
+
+        Raises:
+            ValueError: If the call alone exceeds the calldata budget
+        """
+        if 1 + call_size(call) > self.max_calldata_felts:
+            raise ValueError(f"Call needs {1 + call_size(call)} calldata felts, budget is {self.max_calldata_felts}")
+        if call.selector in _ONCE_PER_POSITION and call.calldata:
+            key = (call.to, call.selector, call.calldata[0])
+            if key in self._seen:
+                self.skipped.append(call)
+                return False
+            self._seen.add(key)
+        self.calls.append(call)
+        return True
+
+    def add_prepared(self, contract_address: Felt, prepared: Iterable[Dict]) -> int:
+        """Queue prepared transactions; returns how many were kept"""
+        return sum(self.add(call_from_prepared(contract_address, item)) for item in prepared)
+
+    def batches(self) -> List[List[Call]]:
+        """Queued calls in order, split so each batch's __execute__ calldata fits the budget"""
+        batches: List[List[Call]] = []
+        current: List[Call] = []
+        size = 1
+        for call in self.calls:
+            needed = call_size(call)
+            if current and size + needed > self.max_calldata_felts:
+                batches.append(current)
+                current, size = [], 1
+            current.append(call)
+            size += needed
+        if current:
+            batches.append(current)
+        return batches
+
+    def build(self) -> List[List[int]]:
+        """__execute__ calldata for each transaction"""
+        return [encode_execute_calldata(batch) for batch in self.batches()]
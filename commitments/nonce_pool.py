@@ -0,0 +1,179 @@
+"""
+Pool of Pre-Generated Commitment Nonces
+
+commit_btc_amount draws a fresh random nonce per commitment. In "ec" mode
+the nonce side of value*G + nonce*H is a full 252-bit scalar
+multiplication, while the value side is small: satoshi amounts stay under
+2^51. NoncePool moves the nonce side offline. It draws nonces ahead of
+time, computes nonce*H for a whole batch with one batched affine
+conversion, and hands them out one at a time. The online commitment is
+then value*G plus a single point addition.
+
+In "hash" mode the nonce is one of the hashed inputs, so nothing beyond
+drawing it can be precomputed, and taking from the pool costs about as
+much as drawing inline. The pool is meant for "ec" mode.
+
+A daemon thread refills the pool to size whenever it drops below
+low_water, working in batches of refill_batch so request threads get the
+GIL between batches. When the pool is empty, take() returns None and the
+caller commits inline. Every entry is handed out exactly once. Entries
+drawn for one commitment mode are discarded if the mode has changed by
+the time they are taken.
+
+Pool depth, nonces refilled and misses are exported as
+zenlend_nonce_pool_* metrics; the refill rate is the rate of
+zenlend_nonce_pool_refilled_total.
+"""
+
+import secrets
+import threading
+from collections import deque
+from typing import Deque, List, NamedTuple, Optional, Tuple
+
+try:
+    from .curve import batch_to_affine
+    from .metrics import NONCE_POOL_DEPTH, NONCE_POOL_MISSES, NONCE_POOL_REFILLED, PHASE_DURATION
+    from .pedersen import COMMITMENT_MODE_EC, STARKNET_PRIME, get_commitment_mode, get_generator_tables
+except ImportError:
+    from curve import batch_to_affine
+    from metrics import NONCE_POOL_DEPTH, NONCE_POOL_MISSES, NONCE_POOL_REFILLED, PHASE_DURATION
+    from pedersen import COMMITMENT_MODE_EC, STARKNET_PRIME, get_commitment_mode, get_generator_tables
+
+DEFAULT_POOL_SIZE = 1024
+DEFAULT_REFILL_BATCH = 64
+
+_refill_timer = PHASE_DURATION.labels("nonce_pool_refill")
+
+
+class PrecomputedNonce(NamedTuple):
+    """A nonce and, in "ec" mode, nonce*H in affine coordinates"""
+    mode: str
+    nonce: int
+    nonce_point: Optional[Tuple[int, int]]
+
+
+def precompute_nonces(count: int, mode: str) -> List[PrecomputedNonce]:
+    """Draw count nonces and do their nonce-side commitment work"""
+    nonces = [secrets.randbelow(STARKNET_PRIME) for _ in range(count)]
+    if mode != COMMITMENT_MODE_EC:
+        return [PrecomputedNonce(mode, nonce, None) for nonce in nonces]
+
+    _, table_h = get_generator_tables()
+    points = batch_to_affine([table_h.mul_jacobian(nonce) for nonce in nonces])
+    # nonce*H is infinity only for a multiple of the curve order; such
+    # nonces are left to the inline path rather than special-cased
+    return [PrecomputedNonce(mode, nonce, point) for nonce, point in zip(nonces, points) if point is not None]
+
+
+class NoncePool:
+    """
+    Bounded pool of precomputed nonces with background refill
+
+    Args:
+        size: Entries the pool is refilled up to
+        low_water: Depth below which a refill starts (defaults to size // 2)
+        refill_batch: Entries precomputed per refill step
+        background: Start the refill thread; without it, call fill()
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        low_water: Optional[int] = None,
+        refill_batch: int = DEFAULT_REFILL_BATCH,
+        background: bool = True
+    ):
+        if size < 1 or refill_batch < 1:
+            raise ValueError("Nonce pool size and refill batch must be positive")
+        low_water = size // 2 if low_water is None else low_water
+        if not 0 <= low_water < size:
+            raise ValueError(f"low_water must be in [0, {size}), got {low_water}")
+
+        self.size = size
+        self.low_water = low_water
+        self.refill_batch = refill_batch
+        self._entries: Deque[PrecomputedNonce] = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self.refilled = 0
+        self.misses = 0
+        if background:
+            self.start()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def take(self, mode: str = None) -> Optional[PrecomputedNonce]:
+        """Remove and return an entry for mode, or None if none is ready"""
+        mode = mode or get_commitment_mode()
+        entry = None
+        with self._lock:
+            while self._entries:
+                candidate = self._entries.popleft()
+                NONCE_POOL_DEPTH.dec()
+                if candidate.mode == mode:
+                    entry = candidate
+                    break
+            depth = len(self._entries)
+            if entry is None:
+                self.misses += 1
+        if entry is None:
+            NONCE_POOL_MISSES.inc()
+        if depth < self.low_water:
+            self._wake.set()
+        return entry
+
+    def fill(self, count: int = None) -> int:
+        """
+        Precompute entries for the active mode until the pool is full
+
+        Runs in the caller's thread; count caps how many are added.
+        Returns the number added.
+        """
+        added = 0
+        while not self._stopped and (count is None or added < count):
+            batch = min(self.refill_batch, self.size - len(self._entries))
+            if count is not None:
+                batch = min(batch, count - added)
+            if batch <= 0:
+                break
+            with _refill_timer.timer():
+                entries = precompute_nonces(batch, get_commitment_mode())
+            with self._lock:
+                entries = entries[:self.size - len(self._entries)]
+                self._entries.extend(entries)
+                self.refilled += len(entries)
+            NONCE_POOL_DEPTH.inc(len(entries))
+            NONCE_POOL_REFILLED.inc(len(entries))
+            added += len(entries)
+        return added
+
+    def start(self) -> None:
+        """Start the background refill thread"""
+        if self._thread is not None:
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._refill_loop, name="zenlend-nonce-pool", daemon=True)
+        self._thread.start()
+        self._wake.set()
+
+    def stop(self) -> None:
+        """Stop the refill thread and discard the remaining entries"""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            discarded = len(self._entries)
+            self._entries.clear()
+        NONCE_POOL_DEPTH.dec(discarded)
+
+    def _refill_loop(self) -> None:
+        while not self._stopped:
+            self._wake.wait()
+            self._wake.clear()
+            if not self._stopped and len(self._entries) < self.size:
+                self.fill()
@@ -9,26 +9,129 @@ Mathematical Foundation:
 - Where g, h are generators and p is prime modulus
 - Commitment hiding: computationally infeasible to extract value/nonce
 - Commitment binding: computationally infeasible to find different (value', nonce') with same commitment
+
+Commitment Modes:
+- "hash": SHA-256 over the generators, value and nonce (default, PoC scheme)
+- "ec": C = value*G + nonce*H on the Stark curve, encoded as the x-coordinate
+- Selected with set_commitment_mode() or the ZENLEND_COMMITMENT_MODE env var
+
+Hash Encodings (hash-mode commitments and solvency/liquidation proof hashes):
+- "v1": SHA-256 over a decimal string of the inputs (default)
+- "v2": SHA-256 over 32-byte big-endian felts after a constant prefix whose
+  hash state is computed once and copied per call (opt-in)
+- Selected with set_hash_encoding() or the ZENLEND_HASH_ENCODING env var;
+  proofs carry an "encoding" tag and untagged proofs verify as v1
+- Commitments carry no tag, so stored hash-mode commitments only open
+  under the encoding they were made with; switch to v2 only for new data
 """
 
 import hashlib
+import os
 import secrets
-from typing import Tuple, Dict, Any
+import struct
+import threading
+from typing import Tuple, Dict, Any, List, Optional, Sequence
 from dataclasses import dataclass
 
-# Starknet field prime (same as Cairo felt252)
-STARKNET_PRIME = 2**251 + 17 * 2**192 + 1
+try:
+    from .cache import CommitmentCache, commitment_cache_key
+    from .metrics import PHASE_DURATION
+    from .store import CommitmentStore
+    from . import range_proof
+    from .curve import (
+        CURVE_ORDER,
+        EC_GENERATOR,
+        FIELD_PRIME,
+        FixedBaseTable,
+        batch_to_affine,
+        get_fixed_base_table,
+        is_on_curve,
+        jacobian_add,
+        jacobian_add_affine,
+        jacobian_neg,
+        lift_x,
+        multi_scalar_mul,
+        to_affine
+    )
+except ImportError:
+    from cache import CommitmentCache, commitment_cache_key
+    from metrics import PHASE_DURATION
+    from store import CommitmentStore
+    import range_proof
+    from curve import (
+        CURVE_ORDER,
+        EC_GENERATOR,
+        FIELD_PRIME,
+        FixedBaseTable,
+        batch_to_affine,
+        get_fixed_base_table,
+        is_on_curve,
+        jacobian_add,
+        jacobian_add_affine,
+        jacobian_neg,
+        lift_x,
+        multi_scalar_mul,
+        to_affine
+    )
+
+# Starknet field prime, defined once in curve.py
+STARKNET_PRIME = FIELD_PRIME
 
 # Pedersen generators (using standard Starknet Pedersen hash generators)
 GENERATOR_G = 0x1ef15c18599971b7beced415a40f0c7deacfd9b0d1819e03d723d8bc943cfca
 GENERATOR_H = 0x5af3107a4000c94cd5b6fd87df0e9b6fd378d766499c0b09adbaf0e3e2a8c8e
 
+# hash_to_curve(GENERATOR_H), spelled out so startup skips the square root;
+# `python -m commitments.tables` re-derives it before writing a table file
+GENERATOR_POINT_H = (
+    0x5af3107a4000c94cd5b6fd87df0e9b6fd378d766499c0b09adbaf0e3e2a8c8f,
+    0x195e3f302d9f536a77b7c39b3496887ae8970cec5197526eb9fa217bc540bb6,
+)
+
+# Commitment modes
+COMMITMENT_MODE_HASH = "hash"
+COMMITMENT_MODE_EC = "ec"
+COMMITMENT_MODES = (COMMITMENT_MODE_HASH, COMMITMENT_MODE_EC)
+
+# Proof commitment_type tag for each mode
+COMMITMENT_TYPES = {
+    COMMITMENT_MODE_HASH: "pedersen",
+    COMMITMENT_MODE_EC: "pedersen_ec"
+}
+
+# Hash input encodings
+ENCODING_V1 = "v1"
+ENCODING_V2 = "v2"
+ENCODING_VERSIONS = (ENCODING_V1, ENCODING_V2)
+
+# Width of a felt in the v2 encoding
+FELT_BYTES = 32
+
+# Window width of the fixed-base generator tables
+GENERATOR_TABLE_WINDOW = 4
+
+# Smallest batch of point openings folded into one combined check;
+# below about 16 points the multi-scalar multiplication costs more per
+# opening than recomputing each commitment from the fixed-base tables
+BATCH_VERIFY_MIN_SIZE = 16
+
+_commitment_mode = os.environ.get("ZENLEND_COMMITMENT_MODE", COMMITMENT_MODE_HASH)
+_hash_encoding = os.environ.get("ZENLEND_HASH_ENCODING", ENCODING_V1)
+
+# v2 hash states with the constant prefix already absorbed; callers .copy() them
+_COMMIT_V2_PREFIX = hashlib.sha256(
+    b"zenlend/commit/v2" + GENERATOR_G.to_bytes(FELT_BYTES, 'big') + GENERATOR_H.to_bytes(FELT_BYTES, 'big')
+)
+_PROOF_HASH_V2_PREFIX = hashlib.sha256(b"zenlend/proof/v2")
+_pack_ratio = struct.Struct('>d').pack
+
 @dataclass
 class Commitment:
     """Represents a Pedersen commitment"""
     value: int          # The hidden value (in satoshis)
     nonce: int          # Random nonce for hiding  
     commitment: int     # The commitment C = g^value * h^nonce
+    commitment_y: int = 0  # y of the "ec" commitment point (0 in hash mode or if unknown)
     
     def __post_init__(self):
         if self.commitment == 0:
@@ -43,10 +146,16 @@ class PedersenCommitmentSystem:
     - Create zero-knowledge proofs of solvency
     - Verify commitment openings
     - Generate liquidation proofs
+    
+    Args:
+        cache: Optional cache for generate_commitment_with_proof results
+        nonce_pool: Optional NoncePool supplying precomputed nonces to commit_btc_amount
     """
     
-    def __init__(self):
-        self.commitments: Dict[str, Commitment] = {}
+    def __init__(self, cache: Optional[CommitmentCache] = None, nonce_pool=None):
+        self.commitments = CommitmentStore()
+        self.cache = cache
+        self.nonce_pool = nonce_pool
     
     def commit_btc_amount(self, btc_amount: float, user_id: str = None) -> Commitment:
         """
@@ -62,16 +171,26 @@ class PedersenCommitmentSystem:
         # Convert BTC to satoshis (8 decimals)
         satoshis = int(btc_amount * 100_000_000)
         
-        # Generate cryptographically secure random nonce
-        nonce = secrets.randbelow(STARKNET_PRIME)
-        
-        # Create commitment
-        commitment_value = pedersen_commit(satoshis, nonce)
+        # Use a precomputed nonce when the pool has one ready
+        entry = self.nonce_pool.take(_commitment_mode) if self.nonce_pool is not None else None
+        if entry is not None:
+            nonce, commitment_value, commitment_y = _commit_canonical(
+                satoshis, entry.nonce, _commitment_mode, _hash_encoding, entry.nonce_point
+            )
+        else:
+            # Generate cryptographically secure random nonce
+            nonce = secrets.randbelow(STARKNET_PRIME)
+            
+            # Create commitment
+            nonce, commitment_value, commitment_y = _commit_canonical(
+                satoshis, nonce, _commitment_mode, _hash_encoding
+            )
         
         commitment = Commitment(
             value=satoshis,
             nonce=nonce,
-            commitment=commitment_value
+            commitment=commitment_value,
+            commitment_y=commitment_y
         )
         
         # Store if user_id provided
@@ -111,14 +230,17 @@ class PedersenCommitmentSystem:
         # In production: this would be a ZK-STARK proof
         # For PoC: we provide proof elements that Cairo can verify
         
+        encoding = _hash_encoding
         proof_hash = self._generate_proof_hash(
             collateral_commitment.commitment,
             debt_satoshis,
-            collateral_ratio
+            collateral_ratio,
+            encoding
         )
         
         return {
             "commitment": hex(collateral_commitment.commitment),
+            "encoding": encoding,
             "debt_amount": debt_satoshis,
             "collateral_ratio": int(collateral_ratio * 100),  # 150
             "proof_elements": [
@@ -155,14 +277,17 @@ class PedersenCommitmentSystem:
         if not is_liquidatable:
             raise ValueError("Position is not liquidatable")
         
+        encoding = _hash_encoding
         proof_hash = self._generate_proof_hash(
             collateral_commitment.commitment,
             debt_satoshis,
-            liquidation_threshold
+            liquidation_threshold,
+            encoding
         )
         
         return {
             "commitment": hex(collateral_commitment.commitment),
+            "encoding": encoding,
             "debt_amount": debt_satoshis,
             "liquidation_threshold": int(liquidation_threshold * 100),
             "proof_elements": [
@@ -173,11 +298,149 @@ class PedersenCommitmentSystem:
             "is_liquidatable": True
         }
     
+    def generate_aggregated_solvency_proof(
+        self,
+        collateral_commitments: Sequence[Commitment],
+        debt_amounts: Sequence[float],
+        collateral_ratio: float = 1.5
+    ) -> Dict[str, Any]:
+        """
+        Prove committed_collateral >= debt_amount * collateral_ratio for many positions at once
+        
+        One aggregated range proof shows that every C_j - required_j*G
+        commits to a value in [0, 2^64), i.e. collateral_j - required_j
+        is non-negative, without revealing any collateral amount. The
+        proof size grows with log2 of the number of positions.
+        
+        Requires "ec" commitments: the range proof is built on their
+        curve points, which hash-mode commitments do not have.
+        
+        Args:
+            collateral_commitments: "ec"-mode commitments to BTC collateral
+            debt_amounts: Debt of each position
+            collateral_ratio: Required over-collateralization (e.g., 1.5 = 150%)
+            
+        Returns:
+            Proof structure for verify_aggregated_proofs
+        """
+        debts = [int(debt * 100_000_000) for debt in debt_amounts]
+        required = [int(debt * collateral_ratio) for debt in debts]
+        proof = self._aggregated_range_proof(
+            collateral_commitments, required, "solvency",
+            [c.value - bound for c, bound in zip(collateral_commitments, required)],
+            [c.nonce for c in collateral_commitments]
+        )
+        proof.update({
+            "debt_amounts": debts,
+            "collateral_ratio": int(collateral_ratio * 100),
+            "is_valid": True
+        })
+        return proof
+    
+    def generate_aggregated_liquidation_proof(
+        self,
+        collateral_commitments: Sequence[Commitment],
+        debt_amounts: Sequence[float],
+        liquidation_threshold: float = 1.2
+    ) -> Dict[str, Any]:
+        """
+        Prove committed_collateral < debt_amount * liquidation_threshold for many positions at once
+        
+        The aggregated range proof covers threshold_j - 1 - collateral_j,
+        committed as (threshold_j - 1)*G - C_j under the negated nonce.
+        
+        Args:
+            collateral_commitments: "ec"-mode commitments to BTC collateral
+            debt_amounts: Debt of each position
+            liquidation_threshold: Liquidation threshold (e.g., 1.2 = 120%)
+            
+        Returns:
+            Proof structure for verify_aggregated_proofs
+        """
+        debts = [int(debt * 100_000_000) for debt in debt_amounts]
+        thresholds = [int(debt * liquidation_threshold) for debt in debts]
+        proof = self._aggregated_range_proof(
+            collateral_commitments, thresholds, "liquidation",
+            [bound - 1 - c.value for c, bound in zip(collateral_commitments, thresholds)],
+            [-c.nonce for c in collateral_commitments]
+        )
+        proof.update({
+            "debt_amounts": debts,
+            "liquidation_threshold": int(liquidation_threshold * 100),
+            "is_liquidatable": True
+        })
+        return proof
+    
+    def _aggregated_range_proof(
+        self,
+        collateral_commitments: Sequence[Commitment],
+        bounds: Sequence[int],
+        statement: str,
+        differences: Sequence[int],
+        blindings: Sequence[int]
+    ) -> Dict[str, Any]:
+        """Range-prove the differences and check they match the public commitments"""
+        if len(collateral_commitments) != len(bounds):
+            raise ValueError(f"Length mismatch: {len(collateral_commitments)} commitments, {len(bounds)} debts")
+        for commitment, difference in zip(collateral_commitments, differences):
+            if difference < 0:
+                if statement == "solvency":
+                    raise ValueError(f"Insufficient collateral: {commitment.value} < {commitment.value - difference}")
+                raise ValueError("Position is not liquidatable")
+        
+        commitments = [c.commitment for c in collateral_commitments]
+        points = _range_statement_points(commitments, bounds, statement)
+        table_g, table_h = get_generator_tables()
+        proof, proven = range_proof.prove(differences, blindings, (table_g.base, table_h.base))
+        if proven != points:
+            raise ValueError("Range proofs require ec-mode commitments opened by their value and nonce")
+        
+        return {
+            "proof_type": "aggregated_range",
+            "statement": statement,
+            "commitments": [hex(c) for c in commitments],
+            "bounds": list(bounds),
+            "range_bits": range_proof.DEFAULT_RANGE_BITS,
+            "range_proof": proof.to_dict()
+        }
+    
+    def verify_aggregated_proofs(self, proofs: Sequence[Dict[str, Any]]) -> bool:
+        """
+        Verify aggregated solvency/liquidation proofs together
+        
+        All proofs are checked with a single multi-scalar multiplication,
+        so verifying k proofs costs far less than k separate checks. The
+        caller is responsible for checking each proof's bounds against the
+        debts it expects.
+        
+        Args:
+            proofs: Proofs from generate_aggregated_solvency_proof or
+                generate_aggregated_liquidation_proof
+            
+        Returns:
+            True if every proof is valid
+        """
+        try:
+            items = []
+            for proof in proofs:
+                if proof.get("range_bits") != range_proof.DEFAULT_RANGE_BITS:
+                    return False
+                commitments = [int(c, 16) for c in proof["commitments"]]
+                points = _range_statement_points(commitments, proof["bounds"], proof["statement"])
+                items.append((range_proof.RangeProof.from_dict(proof["range_proof"]), points))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return False
+        
+        table_g, table_h = get_generator_tables()
+        return range_proof.verify_batch(items, (table_g.base, table_h.base))
+    
     def verify_commitment_opening(
         self, 
         commitment_value: int,
         claimed_value: int,
-        nonce: int
+        nonce: int,
+        mode: str = None,
+        encoding: str = None
     ) -> bool:
         """
         Verify that a commitment opens to the claimed value
@@ -186,13 +449,142 @@ class PedersenCommitmentSystem:
             commitment_value: The commitment to verify
             claimed_value: The claimed hidden value
             nonce: The opening nonce
+            mode: Commitment mode (defaults to the active mode)
+            encoding: Hash encoding of a hash-mode commitment (defaults to the active encoding)
             
         Returns:
             True if commitment opens correctly
+        
+        In "ec" mode the opening must be canonical: value and nonce in
+        [0, CURVE_ORDER) and a point with an even y-coordinate. Comparing
+        x-coordinates alone would also accept the negated opening
+        (CURVE_ORDER - value, CURVE_ORDER - nonce), whose point -C shares
+        C's x. A commitment given as an (x, y) point is compared in full.
         """
-        expected_commitment = pedersen_commit(claimed_value, nonce)
+        if (mode or _commitment_mode) == COMMITMENT_MODE_EC:
+            point = _canonical_opening_point(claimed_value, nonce)
+            if point is None:
+                return False
+            if isinstance(commitment_value, tuple):
+                return point == commitment_value
+            return point[0] == commitment_value
+        
+        expected_commitment = pedersen_commit(claimed_value, nonce, mode, encoding)
         return expected_commitment == commitment_value
     
+    def verify_openings_batch(
+        self,
+        openings: Sequence[Tuple[int, int, int]],
+        mode: str = None,
+        encoding: str = None
+    ) -> List[bool]:
+        """
+        Verify many commitment openings at once
+        
+        In "ec" mode, openings whose commitment is given as an (x, y) point
+        are folded with secret random weights w_i into a single check
+        
+            sum(w_i * C_i) == (sum(w_i * value_i)) * G + (sum(w_i * nonce_i)) * H
+        
+        where the left side is one multi-scalar multiplication and the right
+        side two fixed-base multiplications. If the combined check fails,
+        the batch is bisected: the left half gets its own combined check,
+        the right half's follows from the whole's without another
+        multiplication, and a half that passes is accepted as a whole.
+        Each bad opening costs about one more multi-scalar multiplication
+        over the batch, so bisection beats checking every opening only
+        while bad openings are rare, as in an audit. Halves smaller than
+        BATCH_VERIFY_MIN_SIZE are checked one by one.
+        
+        Commitments given as the bare x-coordinate felt are checked one by
+        one: lifting one to its point costs a square root, which takes as
+        long as recomputing the commitment, so the combined check cannot
+        win. They share a single inversion for the affine conversion.
+        Commitment.commitment_y, CommitmentStore and the position backend
+        keep the y-coordinate so stored positions can be passed as points
+        (see ZenLendIntegration.audit_positions).
+        
+        The hash mode has no homomorphic structure, so each opening is
+        recomputed individually.
+        
+        Args:
+            openings: (commitment, claimed_value, nonce) triples
+            mode: Commitment mode (defaults to the active mode)
+            encoding: Hash encoding for hash mode (defaults to the active encoding)
+            
+        Returns:
+            List of booleans, True where the opening is valid
+        """
+        mode = mode or _commitment_mode
+        if mode != COMMITMENT_MODE_EC:
+            verify = self.verify_commitment_opening
+            return [verify(c, v, n, mode, encoding) for c, v, n in openings]
+        
+        results = [False] * len(openings)
+        candidates = []
+        singles = []
+        for index, (commitment_value, value, nonce) in enumerate(openings):
+            if not (0 <= value < CURVE_ORDER and 0 <= nonce < CURVE_ORDER):
+                continue
+            if isinstance(commitment_value, tuple):
+                if is_on_curve(commitment_value) and not commitment_value[1] & 1:
+                    candidates.append(index)
+            elif 0 < commitment_value < STARKNET_PRIME:
+                singles.append(index)
+        
+        weights = [secrets.randbits(128) or 1 for _ in openings]
+        table_g, table_h = get_generator_tables()
+        
+        def check_each(indices: List[int]) -> None:
+            expected = batch_to_affine([
+                jacobian_add(table_g.mul_jacobian(openings[i][1]), table_h.mul_jacobian(openings[i][2]))
+                for i in indices
+            ])
+            for i, point in zip(indices, expected):
+                commitment_value = openings[i][0]
+                if point is None or point[1] & 1:
+                    results[i] = False
+                elif isinstance(commitment_value, tuple):
+                    results[i] = point == commitment_value
+                else:
+                    results[i] = point[0] == commitment_value
+        
+        def residual(indices: List[int]):
+            # sum(w_i * C_i) - (sum(w_i * value_i) * G + sum(w_i * nonce_i) * H), infinity if all open
+            value_sum = 0
+            nonce_sum = 0
+            for i in indices:
+                value_sum += weights[i] * openings[i][1]
+                nonce_sum += weights[i] * openings[i][2]
+            lhs = multi_scalar_mul([openings[i][0] for i in indices], [weights[i] for i in indices])
+            rhs = jacobian_add(table_g.mul_jacobian(value_sum), table_h.mul_jacobian(nonce_sum))
+            return jacobian_add(lhs, jacobian_neg(rhs))
+        
+        def locate(indices: List[int], known=None) -> None:
+            # known: the residual of indices, if already derived from its parent's
+            if len(indices) < BATCH_VERIFY_MIN_SIZE:
+                singles.extend(indices)
+                return
+            total = known if known is not None else residual(indices)
+            if to_affine(total) is None:
+                for i in indices:
+                    results[i] = True
+                return
+            # Residuals add up over the halves, so the right half's is the
+            # whole's minus the left half's and costs no multiplication
+            middle = len(indices) // 2
+            left, right = indices[:middle], indices[middle:]
+            left_total = residual(left) if len(left) >= BATCH_VERIFY_MIN_SIZE else None
+            locate(left, left_total)
+            locate(right, jacobian_add(total, jacobian_neg(left_total)) if left_total is not None else None)
+        
+        locate(candidates)
+        if singles:
+            check_each(singles)
+        
+        return results
+    
+    @PHASE_DURATION.labels("generate_commitment_with_proof").time
     def generate_commitment_with_proof(self, amount: float, private_key: str) -> Tuple[str, Dict[str, Any]]:
         """
         Generate a Pedersen commitment with associated proof for Flask API
@@ -204,36 +596,69 @@ class PedersenCommitmentSystem:
         Returns:
             Tuple of (commitment_hex, proof_dict)
         """
+        mode = _commitment_mode
+        encoding = _hash_encoding
+        
+        # The result is deterministic in (mode, encoding, amount, private_key)
+        if self.cache is not None:
+            cache_key = commitment_cache_key(mode, encoding, amount, private_key)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return copy_commitment_result(cached)
+        
         # Use private key to generate deterministic nonce (for demo purposes)
         # In production, should use proper key derivation
-        nonce_seed = hashlib.sha256(private_key.encode()).digest()
-        nonce = int.from_bytes(nonce_seed[:31], byteorder='big') % STARKNET_PRIME
+        nonce = _derive_nonce(private_key)
         
         # Convert amount to satoshis
         satoshis = btc_to_satoshis(amount)
         
         # Generate commitment
-        commitment_value = pedersen_commit(satoshis, nonce)
-        
-        # Create proof structure
-        proof = {
-            "commitment_type": "pedersen",
-            "amount_satoshis": satoshis,
-            "amount_btc": amount,
-            "nonce": hex(nonce),
-            "generators": {
-                "g": hex(GENERATOR_G),
-                "h": hex(GENERATOR_H)
-            },
-            "prime_modulus": hex(STARKNET_PRIME),
-            "verification_data": {
-                "expected_commitment": hex(commitment_value),
-                "can_verify": True
-            }
-        }
+        nonce, commitment_value, _ = _commit_canonical(satoshis, nonce, mode, encoding)
+        result = (
+            hex(commitment_value),
+            _build_commitment_proof(amount, satoshis, nonce, commitment_value, mode, encoding)
+        )
+        
+        if self.cache is not None:
+            self.cache.put(cache_key, copy_commitment_result(result))
+        
+        return result
+    
+    def commit_many(self, amounts: Sequence[float], private_keys: Sequence[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Generate commitments with proofs for a whole batch of amounts in one pass
+        
+        Equivalent to calling generate_commitment_with_proof for each
+        (amount, private_key) pair, without the per-call overhead.
+        
+        Args:
+            amounts: BTC amounts to commit
+            private_keys: Private keys used to derive each nonce
+            
+        Returns:
+            List of (commitment_hex, proof_dict) tuples in input order
+        """
+        if len(amounts) != len(private_keys):
+            raise ValueError(f"Length mismatch: {len(amounts)} amounts, {len(private_keys)} private keys")
+        
+        mode = _commitment_mode
+        encoding = _hash_encoding
+        derive_nonce = _derive_nonce
+        commit = _commit_canonical
+        build_proof = _build_commitment_proof
+        
+        results = []
+        append = results.append
+        for amount, private_key in zip(amounts, private_keys):
+            nonce = derive_nonce(private_key)
+            satoshis = int(amount * 100_000_000)
+            nonce, commitment_value, _ = commit(satoshis, nonce, mode, encoding)
+            append((hex(commitment_value), build_proof(amount, satoshis, nonce, commitment_value, mode, encoding)))
         
-        return hex(commitment_value), proof
+        return results
     
+    @PHASE_DURATION.labels("verify_proof").time
     def verify_proof(self, commitment: str, proof: Dict[str, Any], amount: float) -> bool:
         """
         Verify a commitment proof for Flask API
@@ -261,41 +686,263 @@ class PedersenCommitmentSystem:
             # Extract nonce and verify commitment
             nonce = int(proof['nonce'], 16)
             satoshis = btc_to_satoshis(amount)
+            mode = _mode_for_commitment_type(proof.get('commitment_type'))
+            # Proofs issued before versioning carry no tag
+            encoding = proof.get('encoding', ENCODING_V1)
             
             # Verify commitment opening
-            return self.verify_commitment_opening(commitment_int, satoshis, nonce)
+            return self.verify_commitment_opening(commitment_int, satoshis, nonce, mode, encoding)
             
         except (ValueError, KeyError, TypeError) as e:
             return False
     
-    def _generate_proof_hash(self, commitment: int, debt: int, ratio: float) -> int:
+    def _generate_proof_hash(self, commitment: int, debt: int, ratio: float, encoding: str = None) -> int:
         """Generate a proof hash for verification"""
-        proof_data = f"{commitment}:{debt}:{ratio}".encode()
-        hash_bytes = hashlib.sha256(proof_data).digest()
+        encoding = encoding or _hash_encoding
+        if debt < 0:
+            raise ValueError(f"Debt must not be negative: {debt}")
+        if encoding == ENCODING_V2:
+            digest = _PROOF_HASH_V2_PREFIX.copy()
+            digest.update(commitment.to_bytes(FELT_BYTES, 'big') + debt.to_bytes(FELT_BYTES, 'big') + _pack_ratio(ratio))
+            hash_bytes = digest.digest()
+        elif encoding == ENCODING_V1:
+            proof_data = f"{commitment}:{debt}:{ratio}".encode()
+            hash_bytes = hashlib.sha256(proof_data).digest()
+        else:
+            raise ValueError(f"Unknown hash encoding: {encoding}")
         return int.from_bytes(hash_bytes[:31], byteorder='big')  # Fit in felt252
 
 
-def pedersen_commit(value: int, nonce: int) -> int:
+def set_commitment_mode(mode: str) -> None:
+    """Select the commitment scheme used by pedersen_commit ("hash" or "ec")"""
+    global _commitment_mode
+    if mode not in COMMITMENT_MODES:
+        raise ValueError(f"Unknown commitment mode: {mode}")
+    _commitment_mode = mode
+
+
+def get_commitment_mode() -> str:
+    """Return the active commitment mode"""
+    return _commitment_mode
+
+
+def set_hash_encoding(encoding: str) -> None:
+    """Select the hash input encoding for new commitments and proofs ("v1" or "v2")"""
+    global _hash_encoding
+    if encoding not in ENCODING_VERSIONS:
+        raise ValueError(f"Unknown hash encoding: {encoding}")
+    _hash_encoding = encoding
+
+
+def get_hash_encoding() -> str:
+    """Return the active hash encoding"""
+    return _hash_encoding
+
+
+def _mode_for_commitment_type(commitment_type: str) -> str:
+    """Map a proof's commitment_type tag back to its commitment mode"""
+    for mode, tag in COMMITMENT_TYPES.items():
+        if tag == commitment_type:
+            return mode
+    return _commitment_mode
+
+
+_generator_tables = None
+_generator_tables_lock = threading.Lock()
+
+
+def get_generator_tables() -> Tuple[FixedBaseTable, FixedBaseTable]:
+    """
+    Return the fixed-base tables for the G and H generator points
+    
+    G is the standard Stark curve generator (GENERATOR_G is its x-coordinate).
+    H is derived from GENERATOR_H by hash-to-curve, so its discrete log
+    relative to G is unknown (GENERATOR_POINT_H is that point). Tables are
+    built, or loaded from ZENLEND_TABLES_PATH, once per process.
+    """
+    global _generator_tables
+    if _generator_tables is None:
+        with _generator_tables_lock:
+            if _generator_tables is None:
+                _generator_tables = (
+                    get_fixed_base_table(EC_GENERATOR, GENERATOR_TABLE_WINDOW),
+                    get_fixed_base_table(GENERATOR_POINT_H, GENERATOR_TABLE_WINDOW)
+                )
+    return _generator_tables
+
+
+@PHASE_DURATION.labels("pedersen_commit").time
+def pedersen_commit(value: int, nonce: int, mode: str = None, encoding: str = None) -> int:
     """
     Compute Pedersen commitment: g^value * h^nonce mod p
     
-    Simplified implementation using hash-based approach
-    In production: would use proper elliptic curve operations
+    In "hash" mode this is a simplified hash-based construction whose
+    input layout is selected by encoding ("v1" or "v2").
+    In "ec" mode it is value*G + nonce*H on the Stark curve, returned
+    as the x-coordinate of the resulting point; encoding does not apply.
+    The x-coordinate is shared with the negated point, so check openings
+    with verify_commitment_opening, which also requires the canonical
+    (even-y) point, rather than by comparing against this value.
     """
+    mode = mode or _commitment_mode
+    
+    if mode == COMMITMENT_MODE_EC:
+        table_g, table_h = get_generator_tables()
+        point = to_affine(jacobian_add(table_g.mul_jacobian(value), table_h.mul_jacobian(nonce)))
+        return point[0] if point is not None else 0
+    
+    if mode != COMMITMENT_MODE_HASH:
+        raise ValueError(f"Unknown commitment mode: {mode}")
+    
     # Ensure inputs fit in Starknet felt
     value = value % STARKNET_PRIME
     nonce = nonce % STARKNET_PRIME
     
-    # Simplified commitment using hash combination
-    # Production would use proper group operations
-    commitment_data = f"{GENERATOR_G}^{value}*{GENERATOR_H}^{nonce}".encode()
-    commitment_hash = hashlib.sha256(commitment_data).digest()
+    encoding = encoding or _hash_encoding
+    if encoding == ENCODING_V2:
+        digest = _COMMIT_V2_PREFIX.copy()
+        digest.update(value.to_bytes(FELT_BYTES, 'big') + nonce.to_bytes(FELT_BYTES, 'big'))
+        commitment_hash = digest.digest()
+    elif encoding == ENCODING_V1:
+        # Simplified commitment using hash combination
+        commitment_data = f"{GENERATOR_G}^{value}*{GENERATOR_H}^{nonce}".encode()
+        commitment_hash = hashlib.sha256(commitment_data).digest()
+    else:
+        raise ValueError(f"Unknown hash encoding: {encoding}")
     
     # Convert to felt252
     commitment_int = int.from_bytes(commitment_hash[:31], byteorder='big')
     return commitment_int % STARKNET_PRIME
 
 
+def _commit_canonical(
+    value: int,
+    nonce: int,
+    mode: str,
+    encoding: str = None,
+    nonce_point: Optional[Tuple[int, int]] = None
+) -> Tuple[int, int, int]:
+    """
+    Commit to a value, returning the (possibly adjusted) nonce, commitment and y
+    
+    In "ec" mode the nonce is reduced below CURVE_ORDER and stepped until
+    the commitment point has an even y-coordinate, so the x-coordinate
+    alone identifies the point and lifts to it without a sign ambiguity
+    (see verify_openings_batch). nonce_point, if given, is nonce*H
+    already computed (see nonce_pool). y is the point's y-coordinate, for
+    callers that keep the point (see verify_openings_batch), and 0 in
+    hash mode.
+    """
+    if mode != COMMITMENT_MODE_EC:
+        return nonce, pedersen_commit(value, nonce, mode, encoding), 0
+    
+    nonce %= CURVE_ORDER
+    table_g, table_h = get_generator_tables()
+    point_h = table_h.base
+    if nonce_point is not None:
+        point = jacobian_add_affine(table_g.mul_jacobian(value), nonce_point)
+    else:
+        point = jacobian_add(table_g.mul_jacobian(value), table_h.mul_jacobian(nonce))
+    while True:
+        affine = to_affine(point)
+        if affine is not None and not affine[1] & 1:
+            return nonce, affine[0], affine[1]
+        nonce = (nonce + 1) % CURVE_ORDER
+        point = jacobian_add_affine(point, point_h)
+
+
+def _canonical_opening_point(value: int, nonce: int) -> Optional[Tuple[int, int]]:
+    """
+    The "ec" commitment point value*G + nonce*H, or None if the opening is not canonical
+    
+    Canonical openings have value and nonce in [0, CURVE_ORDER) and a
+    point with an even y-coordinate, as _commit_canonical produces.
+    """
+    if not (0 <= value < CURVE_ORDER and 0 <= nonce < CURVE_ORDER):
+        return None
+    table_g, table_h = get_generator_tables()
+    point = to_affine(jacobian_add(table_g.mul_jacobian(value), table_h.mul_jacobian(nonce)))
+    if point is None or point[1] & 1:
+        return None
+    return point
+
+
+def _range_statement_points(commitments: Sequence[int], bounds: Sequence[int], statement: str) -> List[Tuple[int, int]]:
+    """
+    Points whose range proof establishes an aggregated statement
+    
+    "solvency": C - bound*G hides collateral - bound.
+    "liquidation": (bound - 1)*G - C hides bound - 1 - collateral.
+    Commitments are x-coordinates lifted to their even-y point.
+    """
+    if statement not in ("solvency", "liquidation"):
+        raise ValueError(f"Unknown range statement: {statement}")
+    if len(commitments) != len(bounds):
+        raise ValueError(f"Length mismatch: {len(commitments)} commitments, {len(bounds)} bounds")
+    
+    table_g, _ = get_generator_tables()
+    points = []
+    for commitment, bound in zip(commitments, bounds):
+        point = lift_x(commitment) if 0 < commitment < STARKNET_PRIME else None
+        if point is None or bound < 0:
+            raise ValueError(f"Invalid range statement for commitment {hex(commitment)}")
+        if statement == "solvency":
+            shifted = jacobian_add_affine(table_g.mul_jacobian(CURVE_ORDER - bound), point)
+        else:
+            shifted = jacobian_add_affine(table_g.mul_jacobian(bound - 1), (point[0], STARKNET_PRIME - point[1]))
+        points.append(to_affine(shifted))
+    return points
+
+
+def _derive_nonce(private_key: str) -> int:
+    """Derive the deterministic commitment nonce from a private key"""
+    nonce_seed = hashlib.sha256(private_key.encode()).digest()
+    return int.from_bytes(nonce_seed[:31], byteorder='big') % STARKNET_PRIME
+
+
+# Hex encodings of the fixed commitment parameters, shared by every proof
+_GENERATOR_G_HEX = hex(GENERATOR_G)
+_GENERATOR_H_HEX = hex(GENERATOR_H)
+_STARKNET_PRIME_HEX = hex(STARKNET_PRIME)
+
+
+def _build_commitment_proof(
+    amount: float,
+    satoshis: int,
+    nonce: int,
+    commitment_value: int,
+    mode: str,
+    encoding: str
+) -> Dict[str, Any]:
+    """Build the proof structure returned alongside a commitment"""
+    return {
+        "commitment_type": COMMITMENT_TYPES[mode],
+        "encoding": encoding,
+        "amount_satoshis": satoshis,
+        "amount_btc": amount,
+        "nonce": hex(nonce),
+        "generators": {
+            "g": _GENERATOR_G_HEX,
+            "h": _GENERATOR_H_HEX
+        },
+        "prime_modulus": _STARKNET_PRIME_HEX,
+        "verification_data": {
+            "expected_commitment": hex(commitment_value),
+            "can_verify": True
+        }
+    }
+
+
+def copy_commitment_result(result: Tuple[str, Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    """Copy a (commitment_hex, proof) pair so the proof can be mutated safely"""
+    commitment, proof = result
+    proof = dict(proof)
+    for field, value in proof.items():
+        if isinstance(value, dict):
+            proof[field] = dict(value)
+    return commitment, proof
+
+
 def btc_to_satoshis(btc_amount: float) -> int:
     """Convert BTC amount to satoshis"""
     return int(btc_amount * 100_000_000)
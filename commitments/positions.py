@@ -0,0 +1,240 @@
+"""
+Durable Position Storage for ZenLendIntegration
+
+ZenLendIntegration keeps positions in a CommitmentStore, which is lost
+on restart. A PositionBackend persists each position (the commitment
+row plus the debt and health ratio derived from it) so the integration
+can reload its state instead of rebuilding it from the chain.
+
+SQLitePositionBackend stores the commitment columns as the same 32-byte
+big-endian cells CommitmentStore uses, so a cold start copies raw bytes
+into the store without converting through ints. That includes the
+commitment point's y-coordinate, so reloaded positions can still be
+audited with a combined batch check (see verify_openings_batch). Writes go straight to
+the database by default. With batch_size > 1 they are buffered and
+flushed in batches with executemany on constant SQL strings, which
+sqlite3 keeps prepared in its statement cache; a timer flushes a batch
+that stays open for flush_interval seconds, and buffered writes are
+flushed at interpreter exit.
+"""
+
+import atexit
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+try:
+    from .store import FELT_BYTES
+except ImportError:
+    from store import FELT_BYTES
+
+
+# Encoded commitment_y of a position without a known point
+ZERO_CELL = bytes(FELT_BYTES)
+
+
+class PositionRecord(NamedTuple):
+    """One persisted position; value / nonce / commitment / commitment_y are encoded cells"""
+    address: str
+    value: bytes
+    nonce: bytes
+    commitment: bytes
+    debt: int = 0
+    health_ratio: Optional[float] = None
+    commitment_y: bytes = ZERO_CELL
+
+
+def health_ratio(collateral: int, debt: int) -> Optional[float]:
+    """Collateral / debt in satoshis, or None for a position without debt"""
+    return collateral / debt if debt > 0 else None
+
+
+class PositionBackend(ABC):
+    """
+    Persistence interface used by ZenLendIntegration
+
+    Implementations may buffer writes; get() and iteration must still
+    observe every upsert and delete made so far.
+    """
+
+    @abstractmethod
+    def get(self, address: str) -> Optional[PositionRecord]:
+        """The stored position for address, or None"""
+
+    @abstractmethod
+    def upsert(self, record: PositionRecord) -> None:
+        """Insert or replace the position for record.address"""
+
+    @abstractmethod
+    def delete(self, address: str) -> None:
+        """Remove the position for address, if any"""
+
+    @abstractmethod
+    def iter_records(self) -> Iterator[PositionRecord]:
+        """Every stored position, for warming the in-memory cache"""
+
+    @abstractmethod
+    def below_health_ratio(self, ratio: float, limit: Optional[int] = None) -> List[PositionRecord]:
+        """Positions with debt whose health ratio is below ratio, worst first"""
+
+    def flush(self) -> None:
+        """Write out buffered changes"""
+
+    def close(self) -> None:
+        self.flush()
+
+
+class SQLitePositionBackend(PositionBackend):
+    """
+    SQLite position store in WAL mode
+
+    Args:
+        path: Database file (":memory:" for a throwaway store)
+        batch_size: Buffered writes that trigger a flush (1 writes through)
+        flush_interval: Seconds after the first buffered write at which a
+            timer flushes the batch (None leaves it to batch_size, flush()
+            and close())
+
+    With batching, up to batch_size writes (or flush_interval seconds of
+    them) can be lost on a crash; call flush() where a write must be
+    durable. Buffered writes are flushed on close() and at exit.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS positions ("
+        " address TEXT PRIMARY KEY,"
+        " value BLOB NOT NULL,"
+        " nonce BLOB NOT NULL,"
+        " commitment BLOB NOT NULL,"
+        " debt INTEGER NOT NULL DEFAULT 0,"
+        " health_ratio REAL,"
+        " commitment_y BLOB NOT NULL DEFAULT X'" + ZERO_CELL.hex() + "'"
+        ") WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS positions_health_ratio ON positions (health_ratio)"
+        " WHERE health_ratio IS NOT NULL",
+    )
+    # Databases created before commitment_y was stored
+    _ADD_COMMITMENT_Y = (
+        "ALTER TABLE positions ADD COLUMN commitment_y BLOB NOT NULL DEFAULT X'" + ZERO_CELL.hex() + "'"
+    )
+    _UPSERT = (
+        "INSERT OR REPLACE INTO positions (address, value, nonce, commitment, debt, health_ratio, commitment_y)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)"
+    )
+    _DELETE = "DELETE FROM positions WHERE address = ?"
+    _SELECT = "SELECT address, value, nonce, commitment, debt, health_ratio, commitment_y FROM positions"
+    _GET = _SELECT + " WHERE address = ?"
+    _BELOW = _SELECT + " WHERE health_ratio < ? ORDER BY health_ratio"
+
+    def __init__(self, path: str, batch_size: int = 1, flush_interval: Optional[float] = 1.0):
+        if batch_size < 1:
+            raise ValueError("Batch size must be positive")
+
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Connection is shared by the Flask worker threads under _lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in self._SCHEMA:
+            self._conn.execute(statement)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(positions)")}
+        if "commitment_y" not in columns:
+            self._conn.execute(self._ADD_COMMITMENT_Y)
+        self._lock = threading.RLock()
+        # address -> record to write, or None to delete
+        self._pending: Dict[str, Optional[PositionRecord]] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._closed = False
+        # The exit hook holds a reference to the backend, so it is only
+        # registered while buffered writes are waiting for a flush
+        self._exit_hook = False
+
+    def get(self, address: str) -> Optional[PositionRecord]:
+        with self._lock:
+            if address in self._pending:
+                return self._pending[address]
+            row = self._conn.execute(self._GET, (address,)).fetchone()
+        return PositionRecord(*row) if row else None
+
+    def upsert(self, record: PositionRecord) -> None:
+        cells = (record.value, record.nonce, record.commitment, record.commitment_y)
+        if any(len(cell) != FELT_BYTES for cell in cells):
+            raise ValueError(f"Position cells must be {FELT_BYTES} bytes wide")
+        with self._lock:
+            self._pending[record.address] = record
+            self._maybe_flush()
+
+    def delete(self, address: str) -> None:
+        with self._lock:
+            self._pending[address] = None
+            self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        # Called with the lock held, after a write was buffered
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+            return
+        if not self._exit_hook:
+            atexit.register(self.flush)
+            self._exit_hook = True
+        if self._timer is None and self.flush_interval is not None:
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending and not self._closed:
+                upserts = [record for record in self._pending.values() if record is not None]
+                deletes = [(address,) for address, record in self._pending.items() if record is None]
+                self._conn.execute("BEGIN")
+                try:
+                    if upserts:
+                        self._conn.executemany(self._UPSERT, upserts)
+                    if deletes:
+                        self._conn.executemany(self._DELETE, deletes)
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+                self._pending.clear()
+            if self._exit_hook and not self._pending:
+                atexit.unregister(self.flush)
+                self._exit_hook = False
+
+    def iter_records(self) -> Iterator[PositionRecord]:
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(self._SELECT).fetchall()
+        return map(PositionRecord._make, rows)
+
+    def below_health_ratio(self, ratio: float, limit: Optional[int] = None) -> List[PositionRecord]:
+        self.flush()
+        query, params = self._BELOW, (ratio,)
+        if limit is not None:
+            query, params = query + " LIMIT ?", (ratio, limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [PositionRecord(*row) for row in rows]
+
+    def __len__(self) -> int:
+        self.flush()
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self.flush()
+            self._closed = True
+            self._conn.close()
+
+    def __repr__(self) -> str:
+        return f"SQLitePositionBackend({self.path!r})"
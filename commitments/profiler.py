@@ -0,0 +1,142 @@
+"""
+On-Demand Sampling Profiler
+
+Samples the stacks of every thread in the process from a background
+thread via sys._current_frames(), for a fixed duration, and aggregates
+them as collapsed stacks ("frame;frame;frame count" lines), the input
+format of flamegraph.pl, speedscope and inferno.
+
+Nothing is hooked into the interpreter: while no profile is running
+there is no sampling thread and no cost. While running, the cost is one
+stack walk per thread per interval, paid by the sampler thread (which
+does hold the GIL while it walks).
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+# Upper bound on a single profile, so a request can't pin the sampler
+MAX_PROFILE_SECONDS = 60.0
+
+DEFAULT_INTERVAL = 0.005
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running"""
+
+
+_profile_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float = DEFAULT_INTERVAL) -> Dict[str, int]:
+    """
+    Sample all threads for a number of seconds
+
+    Args:
+        seconds: Profile duration (capped at MAX_PROFILE_SECONDS)
+        interval: Seconds between samples
+
+    Returns:
+        Mapping of collapsed stack (root first, prefixed with the thread
+        name) to the number of samples it was seen in
+
+    Raises:
+        ProfilerBusyError: If another profile is already running
+    """
+    if seconds <= 0 or interval <= 0:
+        raise ValueError("Profile duration and interval must be positive")
+    seconds = min(seconds, MAX_PROFILE_SECONDS)
+
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running")
+
+    try:
+        stacks: Counter = Counter()
+        sampler = threading.get_ident()
+        labels: Dict[object, str] = {}
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == sampler:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _frame_label(frame)
+                    frames.append(label)
+                    frame = frame.f_back
+                frames.append(names.get(ident, f"thread-{ident}"))
+                stacks[";".join(reversed(frames))] += 1
+            time.sleep(interval)
+        return dict(stacks)
+    finally:
+        _profile_lock.release()
+
+
+def format_collapsed(stacks: Dict[str, int]) -> str:
+    """Render sampled stacks as collapsed-stack text, heaviest first"""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items(), key=lambda item: -item[1]))
+
+
+def profile(seconds: float, interval: float = DEFAULT_INTERVAL) -> str:
+    """Sample all threads and return collapsed-stack text"""
+    return format_collapsed(sample_stacks(seconds, interval))
+
+
+def install_signal_handler(
+    output_dir: str,
+    seconds: float = 10.0,
+    signum: int = getattr(signal, "SIGUSR2", 0)
+) -> bool:
+    """
+    Profile for `seconds` whenever the process receives signum
+
+    Each profile is written to output_dir as profile-<pid>-<time>.collapsed
+    by a background thread. Must be called from the main thread.
+
+    Returns:
+        False if the platform has no such signal
+    """
+    if not signum:
+        return False
+
+    def write_profile():
+        try:
+            text = profile(seconds)
+        except ProfilerBusyError:
+            return
+        path = os.path.join(output_dir, f"profile-{os.getpid()}-{int(time.time())}.collapsed")
+        with open(path, "w") as f:
+            f.write(text)
+
+    def handler(signum, frame):
+        threading.Thread(target=write_profile, name="zenlend-profiler", daemon=True).start()
+
+    os.makedirs(output_dir, exist_ok=True)
+    signal.signal(signum, handler)
+    return True
+
+
+def parse_profile_params(seconds: Optional[str], interval: Optional[str]) -> Optional[tuple]:
+    """(seconds, interval) from request parameters, or None if invalid"""
+    try:
+        seconds_value = float(seconds) if seconds is not None else 10.0
+        interval_value = float(interval) if interval is not None else DEFAULT_INTERVAL
+    except ValueError:
+        return None
+    if not (0 < seconds_value <= MAX_PROFILE_SECONDS) or not (0.001 <= interval_value <= 1.0):
+        return None
+    return seconds_value, interval_value
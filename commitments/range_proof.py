@@ -0,0 +1,522 @@
+"""
+Aggregated Range Proofs on the Stark Curve
+
+Bulletproofs-style proof that each of m committed values lies in
+[0, 2^n), for commitments V_j = v_j*G + gamma_j*H. The proof holds
+4 points, 2*log2(n*m) inner-product points and 5 scalars, so it grows
+logarithmically in the number of aggregated values; verification is a
+single multi-scalar multiplication over 2*n*m + 2*log2(n*m) + m + 7
+points, and verify_batch folds several proofs into one such MSM with
+random weights.
+
+Protocol (Bunz et al., "Bulletproofs", section 4.3), made
+non-interactive with a SHA-256 Fiat-Shamir transcript:
+- A, S commit to the bit vectors and their blinding vectors -> y, z
+- T1, T2 commit to the coefficients of t(X) = <l(X), r(X)> -> x
+- tau_x, mu, t_hat open t(x) -> w, which binds t_hat into the
+  inner-product argument through Q = w*U
+- L_k, R_k per halving round -> u_k, leaving the final scalars a, b
+
+m is padded to a power of two with commitments to zero under a zero
+blinding, which are the point at infinity and are skipped by the
+verifier. The vector generators G_i, H_i and U come from hash_to_curve
+on domain-separated seeds, so nobody knows a discrete-log relation
+between them or with the commitment generators.
+"""
+
+import hashlib
+import secrets
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .curve import (
+        CURVE_ORDER,
+        FIELD_PRIME,
+        get_fixed_base_table,
+        hash_to_curve,
+        is_on_curve,
+        jacobian_add,
+        jacobian_add_affine,
+        lift_x,
+        multi_scalar_mul,
+        to_affine
+    )
+except ImportError:
+    from curve import (
+        CURVE_ORDER,
+        FIELD_PRIME,
+        get_fixed_base_table,
+        hash_to_curve,
+        is_on_curve,
+        jacobian_add,
+        jacobian_add_affine,
+        lift_x,
+        multi_scalar_mul,
+        to_affine
+    )
+
+# Bit width proven per value; satoshi amounts fit comfortably in 64 bits
+DEFAULT_RANGE_BITS = 64
+
+# Largest number of values a single proof aggregates
+MAX_AGGREGATION = 256
+
+_TRANSCRIPT_DOMAIN = b"zenlend/rangeproof/v1"
+_GENERATOR_DOMAIN = b"zenlend/rangeproof/generators/v1"
+
+Point = Optional[Tuple[int, int]]
+
+
+class _Transcript:
+    """Fiat-Shamir transcript: every challenge hashes everything absorbed so far"""
+
+    def __init__(self, bits: int, commitments: Sequence[Point]):
+        self._state = hashlib.sha256(_TRANSCRIPT_DOMAIN)
+        self._state.update(bits.to_bytes(4, 'big') + len(commitments).to_bytes(4, 'big'))
+        for point in commitments:
+            self.append_point(point)
+
+    def append_point(self, point: Point) -> None:
+        if point is None:
+            self._state.update(bytes(64))
+        else:
+            self._state.update(point[0].to_bytes(32, 'big') + point[1].to_bytes(32, 'big'))
+
+    def append_scalar(self, scalar: int) -> None:
+        self._state.update(scalar.to_bytes(32, 'big'))
+
+    def challenge(self) -> int:
+        """Next non-zero challenge scalar, absorbed back into the transcript"""
+        while True:
+            digest = self._state.copy().digest()
+            self._state.update(digest)
+            value = int.from_bytes(digest, 'big') % CURVE_ORDER
+            if value:
+                return value
+
+
+_generators: List[Tuple[int, int]] = []
+_generators_lock = threading.Lock()
+_point_u = None
+
+
+def _generator_seed(label: bytes, index: int) -> int:
+    digest = hashlib.sha256(_GENERATOR_DOMAIN + label + index.to_bytes(4, 'big')).digest()
+    return int.from_bytes(digest, 'big') % FIELD_PRIME
+
+
+def get_vector_generators(count: int) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]], Tuple[int, int]]:
+    """
+    Return the first count G_i and H_i vector generators and the point U
+
+    Generators are derived on first use and kept for the process, so the
+    first proof over a given size pays about 1ms per vector element.
+    """
+    global _point_u
+    if len(_generators) < count or _point_u is None:
+        with _generators_lock:
+            if _point_u is None:
+                _point_u = hash_to_curve(_generator_seed(b"U", 0))
+            for i in range(len(_generators), count):
+                _generators.append((hash_to_curve(_generator_seed(b"G", i)), hash_to_curve(_generator_seed(b"H", i))))
+    pairs = _generators[:count]
+    return [pair[0] for pair in pairs], [pair[1] for pair in pairs], _point_u
+
+
+def _next_power_of_two(count: int) -> int:
+    return 1 << (count - 1).bit_length()
+
+
+def _inner_product(a: Sequence[int], b: Sequence[int]) -> int:
+    return sum(x * y for x, y in zip(a, b)) % CURVE_ORDER
+
+
+def _powers(base: int, count: int) -> List[int]:
+    powers, value = [], 1
+    for _ in range(count):
+        powers.append(value)
+        value = value * base % CURVE_ORDER
+    return powers
+
+
+def _msm(points: Sequence[Point], scalars: Sequence[int]) -> Point:
+    """multi_scalar_mul over affine points, skipping infinity"""
+    pairs = [(point, scalar) for point, scalar in zip(points, scalars) if point is not None and scalar % CURVE_ORDER]
+    if not pairs:
+        return None
+    return to_affine(multi_scalar_mul([p for p, _ in pairs], [k for _, k in pairs]))
+
+
+def compress_point(point: Point) -> str:
+    """Hex of 2*x + (y & 1); "0x0" for infinity"""
+    if point is None:
+        return "0x0"
+    return hex(point[0] << 1 | point[1] & 1)
+
+
+def decompress_point(encoded: str) -> Point:
+    """Inverse of compress_point; ValueError if not a curve point"""
+    value = int(encoded, 16)
+    if value == 0:
+        return None
+    point = lift_x(value >> 1, bool(value & 1))
+    if point is None:
+        raise ValueError(f"Not a curve point: {encoded}")
+    return point
+
+
+@dataclass
+class RangeProof:
+    """Aggregated range proof; points are affine, scalars are mod CURVE_ORDER"""
+    A: Tuple[int, int]
+    S: Tuple[int, int]
+    T1: Tuple[int, int]
+    T2: Tuple[int, int]
+    tau_x: int
+    mu: int
+    t_hat: int
+    L: List[Tuple[int, int]]
+    R: List[Tuple[int, int]]
+    a: int
+    b: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly form with compressed points"""
+        return {
+            "A": compress_point(self.A),
+            "S": compress_point(self.S),
+            "T1": compress_point(self.T1),
+            "T2": compress_point(self.T2),
+            "tau_x": hex(self.tau_x),
+            "mu": hex(self.mu),
+            "t_hat": hex(self.t_hat),
+            "L": [compress_point(point) for point in self.L],
+            "R": [compress_point(point) for point in self.R],
+            "a": hex(self.a),
+            "b": hex(self.b)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RangeProof":
+        """Parse to_dict output; raises ValueError/KeyError/TypeError if malformed"""
+        scalars = {name: int(data[name], 16) for name in ("tau_x", "mu", "t_hat", "a", "b")}
+        if any(not 0 <= value < CURVE_ORDER for value in scalars.values()):
+            raise ValueError("Range proof scalar out of range")
+        if len(data["L"]) != len(data["R"]):
+            raise ValueError("Range proof has unequal L and R rounds")
+        return cls(
+            A=decompress_point(data["A"]),
+            S=decompress_point(data["S"]),
+            T1=decompress_point(data["T1"]),
+            T2=decompress_point(data["T2"]),
+            L=[decompress_point(point) for point in data["L"]],
+            R=[decompress_point(point) for point in data["R"]],
+            **scalars
+        )
+
+    def size_bytes(self) -> int:
+        """Serialized size with 32-byte compressed points and scalars"""
+        return 32 * (4 + 2 * len(self.L) + 5)
+
+
+def commit_value(value: int, blinding: int, bases: Tuple[Tuple[int, int], Tuple[int, int]]) -> Point:
+    """value*G + blinding*H for bases = (G, H)"""
+    table_g, table_h = get_fixed_base_table(bases[0]), get_fixed_base_table(bases[1])
+    return to_affine(jacobian_add(table_g.mul_jacobian(value), table_h.mul_jacobian(blinding)))
+
+
+def prove(
+    values: Sequence[int],
+    blindings: Sequence[int],
+    bases: Tuple[Tuple[int, int], Tuple[int, int]],
+    bits: int = DEFAULT_RANGE_BITS
+) -> Tuple[RangeProof, List[Point]]:
+    """
+    Prove that every value lies in [0, 2^bits)
+
+    Args:
+        values: Committed values
+        blindings: Their blinding factors
+        bases: (G, H), the value and blinding generators
+        bits: Range width, a power of two
+
+    Returns:
+        (proof, commitments): the commitments V_j the proof is checked against
+
+    Raises:
+        ValueError: If a value is out of range or the sizes are unsupported
+    """
+    m = len(values)
+    if m != len(blindings):
+        raise ValueError(f"Length mismatch: {m} values, {len(blindings)} blindings")
+    if not 0 < m <= MAX_AGGREGATION:
+        raise ValueError(f"Can aggregate 1 to {MAX_AGGREGATION} values, got {m}")
+    if bits <= 0 or bits & (bits - 1):
+        raise ValueError(f"Range bits must be a power of two, got {bits}")
+    for value in values:
+        if not 0 <= value < 1 << bits:
+            raise ValueError(f"Value out of range [0, 2^{bits})")
+
+    order = CURVE_ORDER
+    padded = _next_power_of_two(m)
+    values = list(values) + [0] * (padded - m)
+    blindings = [r % order for r in blindings] + [0] * (padded - m)
+    commitments = [commit_value(v, r, bases) if (v or r) else None for v, r in zip(values, blindings)]
+
+    n = padded * bits
+    gens_g, gens_h, point_u = get_vector_generators(n)
+    table_g, table_h = get_fixed_base_table(bases[0]), get_fixed_base_table(bases[1])
+    transcript = _Transcript(bits, commitments)
+
+    a_l = [(values[i // bits] >> (i % bits)) & 1 for i in range(n)]
+    a_r = [bit - 1 for bit in a_l]
+
+    # A = alpha*H + <a_L, G> + <a_R, H_vec>: the bits are 0/±1, so additions suffice
+    alpha = secrets.randbelow(order)
+    acc = table_h.mul_jacobian(alpha)
+    for i in range(n):
+        if a_l[i]:
+            acc = jacobian_add_affine(acc, gens_g[i])
+        else:
+            acc = jacobian_add_affine(acc, (gens_h[i][0], FIELD_PRIME - gens_h[i][1]))
+    point_a = to_affine(acc)
+
+    rho = secrets.randbelow(order)
+    s_l = [secrets.randbelow(order) for _ in range(n)]
+    s_r = [secrets.randbelow(order) for _ in range(n)]
+    point_s = to_affine(jacobian_add(
+        table_h.mul_jacobian(rho), multi_scalar_mul(gens_g + gens_h, s_l + s_r)
+    ))
+
+    transcript.append_point(point_a)
+    transcript.append_point(point_s)
+    y = transcript.challenge()
+    z = transcript.challenge()
+
+    y_pows = _powers(y, n)
+    two_pows = _powers(2, bits)
+    z_pows = _powers(z, padded + 2)
+
+    l0 = [(bit - z) % order for bit in a_l]
+    r0 = [(y_pows[i] * (a_r[i] + z) + z_pows[2 + i // bits] * two_pows[i % bits]) % order for i in range(n)]
+    r1 = [y_pows[i] * s_r[i] % order for i in range(n)]
+    t1 = (_inner_product(l0, r1) + _inner_product(s_l, r0)) % order
+    t2 = _inner_product(s_l, r1)
+
+    tau1 = secrets.randbelow(order)
+    tau2 = secrets.randbelow(order)
+    point_t1 = to_affine(jacobian_add(table_g.mul_jacobian(t1), table_h.mul_jacobian(tau1)))
+    point_t2 = to_affine(jacobian_add(table_g.mul_jacobian(t2), table_h.mul_jacobian(tau2)))
+
+    transcript.append_point(point_t1)
+    transcript.append_point(point_t2)
+    x = transcript.challenge()
+
+    l_vec = [(l0[i] + s_l[i] * x) % order for i in range(n)]
+    r_vec = [(r0[i] + r1[i] * x) % order for i in range(n)]
+    t_hat = _inner_product(l_vec, r_vec)
+    tau_x = (tau2 * x * x + tau1 * x + sum(z_pows[2 + j] * blindings[j] for j in range(padded))) % order
+    mu = (alpha + rho * x) % order
+
+    transcript.append_scalar(tau_x)
+    transcript.append_scalar(mu)
+    transcript.append_scalar(t_hat)
+    w = transcript.challenge()
+
+    # Inner-product argument on (G, H') with H'_i = y^-i * H_i. The folded
+    # generators are never materialised: coeff_g[i] and coeff_h[i] track
+    # the weight of original generator i in the folded generator i mod size
+    y_inv = pow(y, -1, order)
+    coeff_g = [1] * n
+    coeff_h = _powers(y_inv, n)
+    a, b = l_vec, r_vec
+    left, right = [], []
+    size = n
+    while size > 1:
+        half = size // 2
+        a_lo, a_hi, b_lo, b_hi = a[:half], a[half:], b[:half], b[half:]
+        c_l = _inner_product(a_lo, b_hi)
+        c_r = _inner_product(a_hi, b_lo)
+
+        # Each original generator feeds exactly one of L and R
+        points_l, scalars_l = [point_u], [c_l * w]
+        points_r, scalars_r = [point_u], [c_r * w]
+        for i in range(n):
+            k = i % size
+            if k < half:
+                points_r.append(gens_g[i])
+                scalars_r.append(a_hi[k] * coeff_g[i])
+                points_l.append(gens_h[i])
+                scalars_l.append(b_hi[k] * coeff_h[i])
+            else:
+                points_l.append(gens_g[i])
+                scalars_l.append(a_lo[k - half] * coeff_g[i])
+                points_r.append(gens_h[i])
+                scalars_r.append(b_lo[k - half] * coeff_h[i])
+        point_l = to_affine(multi_scalar_mul(points_l, scalars_l))
+        point_r = to_affine(multi_scalar_mul(points_r, scalars_r))
+        left.append(point_l)
+        right.append(point_r)
+
+        transcript.append_point(point_l)
+        transcript.append_point(point_r)
+        u = transcript.challenge()
+        u_inv = pow(u, -1, order)
+
+        a = [(a_lo[k] * u + a_hi[k] * u_inv) % order for k in range(half)]
+        b = [(b_lo[k] * u_inv + b_hi[k] * u) % order for k in range(half)]
+        for i in range(n):
+            if i % size < half:
+                coeff_g[i] = coeff_g[i] * u_inv % order
+                coeff_h[i] = coeff_h[i] * u % order
+            else:
+                coeff_g[i] = coeff_g[i] * u % order
+                coeff_h[i] = coeff_h[i] * u_inv % order
+        size = half
+
+    proof = RangeProof(
+        A=point_a, S=point_s, T1=point_t1, T2=point_t2,
+        tau_x=tau_x, mu=mu, t_hat=t_hat, L=left, R=right, a=a[0], b=b[0]
+    )
+    return proof, commitments[:m]
+
+
+def _verification_terms(
+    proof: RangeProof,
+    commitments: Sequence[Point],
+    bits: int,
+    weight: int
+) -> Optional[Tuple[List[int], List[int], int, int, int, List[Point], List[int]]]:
+    """
+    Scalars of weight * (the proof's verification equation), which must sum to zero
+
+    Returns:
+        (g_vec, h_vec, g, h, u, points, scalars) with the coefficients of the
+        shared generators and the proof's own points, or None if the proof
+        is structurally invalid for these commitments
+    """
+    m = len(commitments)
+    if not 0 < m <= MAX_AGGREGATION or bits <= 0 or bits & (bits - 1):
+        return None
+    padded = _next_power_of_two(m)
+    n = padded * bits
+    rounds = n.bit_length() - 1
+    if len(proof.L) != rounds or len(proof.R) != rounds:
+        return None
+    if any(point is None or not is_on_curve(point) for point in [proof.A, proof.S, proof.T1, proof.T2] + proof.L + proof.R):
+        return None
+    commitments = list(commitments) + [None] * (padded - m)
+
+    order = CURVE_ORDER
+    transcript = _Transcript(bits, commitments)
+    transcript.append_point(proof.A)
+    transcript.append_point(proof.S)
+    y = transcript.challenge()
+    z = transcript.challenge()
+    transcript.append_point(proof.T1)
+    transcript.append_point(proof.T2)
+    x = transcript.challenge()
+    transcript.append_scalar(proof.tau_x)
+    transcript.append_scalar(proof.mu)
+    transcript.append_scalar(proof.t_hat)
+    w = transcript.challenge()
+    challenges = []
+    for point_l, point_r in zip(proof.L, proof.R):
+        transcript.append_point(point_l)
+        transcript.append_point(point_r)
+        challenges.append(transcript.challenge())
+
+    # s_i = prod u_k^(+1 if bit k of i, counted from the top, is set else -1)
+    inverses = [pow(u, -1, order) for u in challenges]
+    s, s_inv = [1], [1]
+    for u, u_inv in zip(reversed(challenges), reversed(inverses)):
+        s = [v * u_inv % order for v in s] + [v * u % order for v in s]
+        s_inv = [v * u % order for v in s_inv] + [v * u_inv % order for v in s_inv]
+
+    y_inv_pows = _powers(pow(y, -1, order), n)
+    two_pows = _powers(2, bits)
+    z_pows = _powers(z, padded + 3)
+    sum_y = sum(_powers(y, n)) % order
+    delta = ((z - z * z) * sum_y - sum(z_pows[3 + j] for j in range(padded)) * ((1 << bits) - 1)) % order
+
+    # Random c combines the t_hat check with the inner-product check
+    c = secrets.randbelow(order - 1) + 1
+    a, b = proof.a, proof.b
+    g_vec = [(-z - a * s[i]) * weight % order for i in range(n)]
+    h_vec = [
+        (z + y_inv_pows[i] * (z_pows[2 + i // bits] * two_pows[i % bits] - b * s_inv[i])) * weight % order
+        for i in range(n)
+    ]
+    g_coeff = c * (proof.t_hat - delta) * weight % order
+    h_coeff = (c * proof.tau_x - proof.mu) * weight % order
+    u_coeff = w * (proof.t_hat - a * b) * weight % order
+
+    points = [proof.A, proof.S, proof.T1, proof.T2] + proof.L + proof.R + commitments
+    scalars = [weight, x * weight, -c * x * weight, -c * x * x * weight]
+    scalars += [u * u * weight for u in challenges]
+    scalars += [v * v * weight for v in inverses]
+    scalars += [-c * z_pows[2 + j] * weight for j in range(padded)]
+    return g_vec, h_vec, g_coeff, h_coeff, u_coeff, points, scalars
+
+
+def verify_batch(
+    items: Sequence[Tuple[RangeProof, Sequence[Point]]],
+    bases: Tuple[Tuple[int, int], Tuple[int, int]],
+    bits: int = DEFAULT_RANGE_BITS
+) -> bool:
+    """
+    Verify several range proofs with one multi-scalar multiplication
+
+    Each proof's equation is scaled by an independent random weight and
+    the shared generators' coefficients are summed, so a batch costs
+    little more than its largest proof. A False result does not say
+    which proof failed; verify the proofs individually for that.
+
+    Args:
+        items: (proof, commitments) pairs; commitments may be None for infinity
+        bases: (G, H), the value and blinding generators
+        bits: Range width every proof was made with
+    """
+    if not items:
+        return True
+    order = CURVE_ORDER
+    terms = []
+    for index, (proof, commitments) in enumerate(items):
+        weight = 1 if index == 0 else secrets.randbelow(order - 1) + 1
+        proof_terms = _verification_terms(proof, commitments, bits, weight)
+        if proof_terms is None:
+            return False
+        terms.append(proof_terms)
+
+    n = max(len(t[0]) for t in terms)
+    gens_g, gens_h, point_u = get_vector_generators(n)
+    g_vec, h_vec = [0] * n, [0] * n
+    g_coeff = h_coeff = u_coeff = 0
+    points: List[Point] = []
+    scalars: List[int] = []
+    for proof_g, proof_h, g, h, u, proof_points, proof_scalars in terms:
+        for i, coeff in enumerate(proof_g):
+            g_vec[i] += coeff
+        for i, coeff in enumerate(proof_h):
+            h_vec[i] += coeff
+        g_coeff += g
+        h_coeff += h
+        u_coeff += u
+        points.extend(proof_points)
+        scalars.extend(proof_scalars)
+
+    points = gens_g + gens_h + [bases[0], bases[1], point_u] + points
+    scalars = g_vec + h_vec + [g_coeff, h_coeff, u_coeff] + scalars
+    return _msm(points, scalars) is None
+
+
+def verify(
+    proof: RangeProof,
+    commitments: Sequence[Point],
+    bases: Tuple[Tuple[int, int], Tuple[int, int]],
+    bits: int = DEFAULT_RANGE_BITS
+) -> bool:
+    """Verify that every commitment hides a value in [0, 2^bits)"""
+    return verify_batch([(proof, commitments)], bases, bits)
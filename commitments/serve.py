@@ -0,0 +1,190 @@
+"""
+Pre-Fork Production Server for the Commitment API
+
+app.py run directly is a single development process. This entry point
+loads the app once in a master process and forks workers that accept
+on a shared listening socket, so imports and generator tables are paid
+for once rather than per worker.
+
+Fixed-base tables are published by share_tables() before the fork. The
+table file (ZENLEND_TABLES_PATH, or one built by `python -m
+commitments.tables` into /dev/shm) is mapped read-only and installed as
+MappedFixedBaseTable, so every worker reads the master's pages without
+copying them. Decoded tables inherited across fork would not stay
+shared: CPython's reference counting writes to every object a worker
+touches, and copy-on-write then gives that worker a private copy of
+each page. The master also calls gc.freeze() before forking so the
+collector does not do the same to the rest of the preloaded heap.
+
+Keep ZENLEND_WORKERS=0 under this server: the forked workers already
+run in parallel, and a commitment process pool in each would be
+created in the master before the fork.
+
+Usage (from commitments/):
+    python serve.py [--host H] [--port P] [--workers N] [--no-share-tables]
+    gunicorn --preload --workers 4 'serve:create_app()'
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+from typing import Dict, Optional
+
+try:
+    from .curve import TABLES_PATH_ENV, install_fixed_base_table, pedersen_hash
+    from .pedersen import get_generator_tables
+    from .tables import TableFile
+except ImportError:
+    from curve import TABLES_PATH_ENV, install_fixed_base_table, pedersen_hash
+    from pedersen import get_generator_tables
+    from tables import TableFile
+
+DEFAULT_WORKERS = 4
+
+# Mapped table file shared with the workers, kept open for the process lifetime
+_shared_tables: Optional[TableFile] = None
+
+
+def share_tables(path: str = None) -> TableFile:
+    """
+    Map a table file read-only and install its tables process-wide
+
+    Uses path, else ZENLEND_TABLES_PATH, else builds one in a child
+    process, so this process never holds decoded copies. A built file
+    is unlinked once mapped; the mapping outlives the name. Call it in
+    the master before any commitment work and before forking.
+    """
+    global _shared_tables
+    if _shared_tables is not None:
+        return _shared_tables
+
+    path = path or os.environ.get(TABLES_PATH_ENV)
+    built = path is None
+    if built:
+        directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        path = os.path.join(directory, f"zenlend-tables-{os.getpid()}.bin")
+        tables_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables.py")
+        subprocess.run([sys.executable, tables_script, path], check=True, stdout=subprocess.DEVNULL)
+
+    try:
+        table_file = TableFile(path)
+    finally:
+        if built:
+            os.unlink(path)
+    for base, window in table_file.keys():
+        install_fixed_base_table(table_file.load(base, window, copy=False))
+
+    # Resolve the lazily cached table tuples now, so workers inherit them
+    get_generator_tables()
+    pedersen_hash(0, 0)
+    _shared_tables = table_file
+    return table_file
+
+
+def create_app(share: bool = True):
+    """
+    App factory: publish the shared tables, then load the Flask app
+
+    Also applies ZENLEND_SWITCH_INTERVAL (api.apply_switch_interval), which
+    forked workers inherit.
+    """
+    if share:
+        share_tables()
+    try:
+        from .api import apply_switch_interval
+        from .app import app
+    except ImportError:
+        from api import apply_switch_interval
+        from app import app
+    apply_switch_interval()
+    return app
+
+
+def _run_worker(app, listener: socket.socket, host: str, port: int) -> None:
+    from werkzeug.serving import make_server
+
+    server = make_server(host, port, app, threaded=True, fd=listener.fileno())
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    server.serve_forever()
+
+
+def serve(app, host: str, port: int, workers: int = DEFAULT_WORKERS) -> None:
+    """
+    Fork workers sharing one listening socket and keep them running
+
+    A worker that exits is replaced. SIGTERM or SIGINT stops the workers
+    and returns once they have exited.
+    """
+    if workers < 1:
+        raise ValueError("Worker count must be positive")
+
+    listener = socket.create_server((host, port), backlog=1024)
+    listener.set_inheritable(True)
+    # Every worker wakes on a new connection; the losers of the accept race
+    # must get EAGAIN rather than block in accept(), where shutdown() could
+    # never reach them
+    listener.setblocking(False)
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(app, listener, host, port)
+            finally:
+                os._exit(0)
+        children[pid] = slot
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    # Everything loaded so far is shared with the workers; keep the
+    # collector from writing to it in each of them
+    gc.collect()
+    gc.freeze()
+    for slot in range(workers):
+        spawn(slot)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if slot is not None and not stopping:
+            spawn(slot)
+    listener.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("ZENLEND_SERVER_WORKERS", DEFAULT_WORKERS)))
+    parser.add_argument("--no-share-tables", action="store_true",
+                        help="let each worker build its own tables (for comparison)")
+    args = parser.parse_args()
+
+    app = create_app(share=not args.no_share_tables)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers", flush=True)
+    serve(app, args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
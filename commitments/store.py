@@ -0,0 +1,216 @@
+"""
+Columnar In-Memory Commitment Store
+
+A dict of Commitment dataclasses costs a Python object, its __dict__ and
+three arbitrary-precision ints per position. CommitmentStore instead
+keeps value, nonce, commitment and commitment_y as fixed-width 32-byte
+big-endian columns in bytearrays, plus a key -> row index. Lookups
+return a CommitmentView, a __slots__ object with the same attributes as
+Commitment that reads and writes the row.
+
+commitment_y keeps the y-coordinate of an "ec" commitment point, so a
+stored position can be verified as a point in a combined batch check
+without a square root to lift its x-coordinate. It is 0 in hash mode.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, MutableMapping, Tuple
+
+# Width of every column cell (one felt252 / scalar)
+FELT_BYTES = 32
+
+
+def _encode(value: int) -> bytes:
+    """Fixed-width big-endian encoding of a column cell"""
+    try:
+        return value.to_bytes(FELT_BYTES, byteorder='big')
+    except OverflowError:
+        raise ValueError(f"Value does not fit in {FELT_BYTES} bytes: {value}")
+
+
+class CommitmentView:
+    """
+    Live view of one row of a CommitmentStore
+
+    Behaves like a Commitment for attribute access. The view refers to
+    the row, not a copy, so it reflects later writes to the same key;
+    it must not be used after its key is deleted from the store.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "CommitmentStore", row: int):
+        self._store = store
+        self._row = row
+
+    @property
+    def value(self) -> int:
+        return self._store._read(self._store._values, self._row)
+
+    @value.setter
+    def value(self, value: int) -> None:
+        self._store._write(self._store._values, self._row, value)
+
+    @property
+    def nonce(self) -> int:
+        return self._store._read(self._store._nonces, self._row)
+
+    @nonce.setter
+    def nonce(self, nonce: int) -> None:
+        self._store._write(self._store._nonces, self._row, nonce)
+
+    @property
+    def commitment(self) -> int:
+        return self._store._read(self._store._commitments, self._row)
+
+    @commitment.setter
+    def commitment(self, commitment: int) -> None:
+        self._store._write(self._store._commitments, self._row, commitment)
+
+    @property
+    def commitment_y(self) -> int:
+        return self._store._read(self._store._commitment_ys, self._row)
+
+    @commitment_y.setter
+    def commitment_y(self, commitment_y: int) -> None:
+        self._store._write(self._store._commitment_ys, self._row, commitment_y)
+
+    def astuple(self) -> Tuple[int, int, int, int]:
+        """(value, nonce, commitment, commitment_y), e.g. for Commitment(*view.astuple())"""
+        return (self.value, self.nonce, self.commitment, self.commitment_y)
+
+    def __eq__(self, other) -> bool:
+        # Compares equal to a Commitment or another view with the same fields
+        try:
+            return self.astuple() == (
+                other.value, other.nonce, other.commitment, getattr(other, "commitment_y", 0)
+            )
+        except AttributeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (
+            f"CommitmentView(value={self.value}, nonce={self.nonce}, commitment={self.commitment},"
+            f" commitment_y={self.commitment_y})"
+        )
+
+
+class CommitmentStore(MutableMapping[str, CommitmentView]):
+    """
+    Mapping of key (user id / address) to commitment, stored column-wise
+
+    Rows freed by deletion are reused by later inserts.
+    """
+
+    def __init__(self):
+        self._values = bytearray()
+        self._nonces = bytearray()
+        self._commitments = bytearray()
+        self._commitment_ys = bytearray()
+        self._index: Dict[str, int] = {}
+        self._free_rows: List[int] = []
+
+    @staticmethod
+    def _read(column: bytearray, row: int) -> int:
+        offset = row * FELT_BYTES
+        return int.from_bytes(column[offset:offset + FELT_BYTES], byteorder='big')
+
+    @staticmethod
+    def _write(column: bytearray, row: int, value: int) -> None:
+        offset = row * FELT_BYTES
+        column[offset:offset + FELT_BYTES] = _encode(value)
+
+    def __getitem__(self, key: str) -> CommitmentView:
+        return CommitmentView(self, self._index[key])
+
+    def __setitem__(self, key: str, commitment: Any) -> None:
+        """Store anything with value / nonce / commitment (and optionally commitment_y) attributes"""
+        # Encode first so a bad value leaves the store untouched
+        cells = (
+            _encode(commitment.value),
+            _encode(commitment.nonce),
+            _encode(commitment.commitment),
+            _encode(getattr(commitment, "commitment_y", 0))
+        )
+
+        row = self._index.get(key)
+        if row is None:
+            if self._free_rows:
+                row = self._free_rows.pop()
+            else:
+                row = len(self._values) // FELT_BYTES
+                self._values.extend(bytes(FELT_BYTES))
+                self._nonces.extend(bytes(FELT_BYTES))
+                self._commitments.extend(bytes(FELT_BYTES))
+                self._commitment_ys.extend(bytes(FELT_BYTES))
+            self._index[key] = row
+
+        offset = row * FELT_BYTES
+        end = offset + FELT_BYTES
+        (
+            self._values[offset:end],
+            self._nonces[offset:end],
+            self._commitments[offset:end],
+            self._commitment_ys[offset:end]
+        ) = cells
+
+    def __delitem__(self, key: str) -> None:
+        row = self._index.pop(key)
+        self._free_rows.append(row)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def load_rows(self, rows: Iterable[Tuple[str, bytes, bytes, bytes, bytes]]) -> int:
+        """
+        Bulk-append pre-encoded rows without converting through ints
+
+        Args:
+            rows: (key, value, nonce, commitment, commitment_y) with
+                FELT_BYTES-wide cells; keys must not already be in the store
+
+        Returns:
+            Number of rows loaded
+        """
+        values, nonces = self._values, self._nonces
+        commitments, commitment_ys = self._commitments, self._commitment_ys
+        index = self._index
+        row = len(values) // FELT_BYTES
+        start = row
+        for key, value, nonce, commitment, commitment_y in rows:
+            if key in index:
+                raise KeyError(f"Duplicate key in bulk load: {key}")
+            if not len(value) == len(nonce) == len(commitment) == len(commitment_y) == FELT_BYTES:
+                raise ValueError(f"Cells for {key} must be {FELT_BYTES} bytes wide")
+            values += value
+            nonces += nonce
+            commitments += commitment
+            commitment_ys += commitment_y
+            index[key] = row
+            row += 1
+        return row - start
+
+    def row_bytes(self, key: str) -> Tuple[bytes, bytes, bytes, bytes]:
+        """Encoded (value, nonce, commitment, commitment_y) cells for a key"""
+        offset = self._index[key] * FELT_BYTES
+        end = offset + FELT_BYTES
+        return (
+            bytes(self._values[offset:end]),
+            bytes(self._nonces[offset:end]),
+            bytes(self._commitments[offset:end]),
+            bytes(self._commitment_ys[offset:end])
+        )
+
+    def nbytes(self) -> int:
+        """Bytes held by the four columns (excluding the key index)"""
+        return len(self._values) + len(self._nonces) + len(self._commitments) + len(self._commitment_ys)
+
+    def __repr__(self) -> str:
+        return f"CommitmentStore({len(self)} positions)"
@@ -0,0 +1,235 @@
+"""
+Precomputed Fixed-Base Tables on Disk
+
+Serverless cold starts rebuild the commitment generator tables and the
+Pedersen hash tables in every fresh process. This module writes the
+tables to one file that get_fixed_base_table maps with mmap when
+ZENLEND_TABLES_PATH names it. Opening the file reads only its
+directory. A table's points are decoded the first time it is asked for,
+so pages of tables a process never uses are never read.
+
+load(..., copy=False) skips the decoding and returns a
+MappedFixedBaseTable, which reads each point from the mapping when a
+multiplication needs it. Processes forked after the file is mapped then
+share its pages instead of each holding the tables as Python objects;
+serve.py relies on this for pre-forked workers.
+
+File layout, integers big-endian:
+
+    magic b"ZLTABLE1", u32 table count
+    per table: base x (32 bytes), base y (32 bytes), u32 window,
+               u64 offset of its points, u32 point count
+    points: x (32 bytes) || y (32 bytes), in FixedBaseTable.table order
+
+Usage:
+    python -m commitments.tables OUTPUT
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from .curve import (
+        CURVE_ORDER,
+        JACOBIAN_INFINITY,
+        SCALAR_BITS,
+        FixedBaseTable,
+        JacobianPoint,
+        cached_fixed_base_tables,
+        hash_to_curve,
+        jacobian_add_affine,
+        pedersen_hash
+    )
+except ImportError:
+    from curve import (
+        CURVE_ORDER,
+        JACOBIAN_INFINITY,
+        SCALAR_BITS,
+        FixedBaseTable,
+        JacobianPoint,
+        cached_fixed_base_tables,
+        hash_to_curve,
+        jacobian_add_affine,
+        pedersen_hash
+    )
+
+MAGIC = b"ZLTABLE1"
+_COORD = 32
+_HEADER = struct.Struct(">8sI")
+_ENTRY = struct.Struct(">32s32sIQI")
+
+
+def write_tables(path: str, tables: Iterable[FixedBaseTable]) -> int:
+    """Write tables to path atomically; returns the file size"""
+    tables = list(tables)
+    offset = _HEADER.size + _ENTRY.size * len(tables)
+    directory = []
+    for table in tables:
+        x, y = table.base
+        directory.append(_ENTRY.pack(x.to_bytes(_COORD, 'big'), y.to_bytes(_COORD, 'big'),
+                                     table.window, offset, len(table.table)))
+        offset += 2 * _COORD * len(table.table)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(tables)))
+        f.write(b"".join(directory))
+        for table in tables:
+            f.write(b"".join(x.to_bytes(_COORD, 'big') + y.to_bytes(_COORD, 'big') for x, y in table.table))
+    os.replace(tmp_path, path)
+    return offset
+
+
+class MappedPoints(Sequence):
+    """Read-only view of a table's points in a mapped table file"""
+
+    def __init__(self, data: mmap.mmap, offset: int, count: int):
+        self._data = data
+        self._offset = offset
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Tuple[int, int]:
+        if not -self._count <= index < self._count:
+            raise IndexError("table index out of range")
+        start = self._offset + (index % self._count) * 2 * _COORD
+        data = self._data
+        return (int.from_bytes(data[start:start + _COORD], 'big'),
+                int.from_bytes(data[start + _COORD:start + 2 * _COORD], 'big'))
+
+
+class MappedFixedBaseTable(FixedBaseTable):
+    """
+    FixedBaseTable whose points stay in a mapped table file
+
+    Each multiplication decodes the handful of points it adds, which
+    costs more per call than a decoded table but keeps the table out of
+    the process's private memory.
+    """
+
+    def __init__(self, base: Tuple[int, int], window: int, data: mmap.mmap, offset: int, count: int):
+        self.base = base
+        self.window = window
+        self.num_windows = -(-SCALAR_BITS // window)
+        self.digits = (1 << window) - 1
+        if count != self.num_windows * self.digits:
+            raise ValueError(f"Expected {self.num_windows * self.digits} table points, got {count}")
+        self.table = MappedPoints(data, offset, count)
+        self._data = data
+        self._offset = offset
+
+    def mul_jacobian(self, scalar: int) -> JacobianPoint:
+        """Multiply the base point by a scalar, returning Jacobian coordinates"""
+        scalar %= CURVE_ORDER
+        data = self._data
+        window = self.window
+        mask = self.digits
+        add = jacobian_add_affine
+        from_bytes = int.from_bytes
+        stride = 2 * _COORD
+
+        acc = JACOBIAN_INFINITY
+        start = self._offset - stride
+        while scalar:
+            digit = scalar & mask
+            if digit:
+                at = start + digit * stride
+                point = (from_bytes(data[at:at + _COORD], 'big'), from_bytes(data[at + _COORD:at + stride], 'big'))
+                acc = add(acc, point)
+            scalar >>= window
+            start += mask * stride
+        return acc
+
+
+class TableFile:
+    """
+    Read-only memory map of a table file
+
+    Raises:
+        ValueError: If the file is not a table file
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a table file: {path}")
+
+        self.path = path
+        self._index: Dict[Tuple[Tuple[int, int], int], Tuple[int, int]] = {}
+        for i in range(count):
+            x, y, window, offset, points = _ENTRY.unpack_from(self._map, _HEADER.size + i * _ENTRY.size)
+            base = (int.from_bytes(x, 'big'), int.from_bytes(y, 'big'))
+            self._index[(base, window)] = (offset, points)
+
+    def __contains__(self, key: Tuple[Tuple[int, int], int]) -> bool:
+        return key in self._index
+
+    def keys(self) -> List[Tuple[Tuple[int, int], int]]:
+        """(base, window) of every table in the file"""
+        return list(self._index)
+
+    def load(self, base: Tuple[int, int], window: int, copy: bool = True) -> Optional[FixedBaseTable]:
+        """
+        Table for (base, window), or None if the file lacks it
+
+        copy=True decodes the points into the process; copy=False returns
+        a MappedFixedBaseTable reading them from the mapping.
+        """
+        entry = self._index.get((base, window))
+        if entry is None:
+            return None
+        offset, count = entry
+        if not copy:
+            table = MappedFixedBaseTable(base, window, self._map, offset, count)
+            if table.table[0] != base:
+                raise ValueError(f"Corrupt table for base {hex(base[0])} in {self.path}")
+            return table
+        data = self._map[offset:offset + 2 * _COORD * count]
+        from_bytes = int.from_bytes
+        points = [
+            (from_bytes(data[i:i + _COORD], 'big'), from_bytes(data[i + _COORD:i + 2 * _COORD], 'big'))
+            for i in range(0, len(data), 2 * _COORD)
+        ]
+        # The first entry is 1 * base; a mismatch means a corrupt file
+        if not points or points[0] != base:
+            raise ValueError(f"Corrupt table for base {hex(base[0])} in {self.path}")
+        return FixedBaseTable.from_points(base, window, points)
+
+
+def build_default_tables() -> list:
+    """Build the commitment generator and Pedersen hash tables"""
+    try:
+        from .pedersen import GENERATOR_H, GENERATOR_POINT_H, get_generator_tables
+    except ImportError:
+        from pedersen import GENERATOR_H, GENERATOR_POINT_H, get_generator_tables
+
+    if hash_to_curve(GENERATOR_H) != GENERATOR_POINT_H:
+        raise ValueError("GENERATOR_POINT_H does not match hash_to_curve(GENERATOR_H)")
+    get_generator_tables()
+    pedersen_hash(0, 0)
+    return cached_fixed_base_tables()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", help="table file to write")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tables = build_default_tables()
+    built = time.perf_counter() - start
+    size = write_tables(args.output, tables)
+    points = sum(len(table.table) for table in tables)
+    print(f"{len(tables)} tables, {points} points built in {built:.2f}s; wrote {size / 1e6:.1f} MB to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
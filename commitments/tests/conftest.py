@@ -0,0 +1,56 @@
+"""
+Shared pytest setup for the commitments package
+
+Makes `commitments` importable however pytest is started (from the repo
+root or from commitments/), and restores the process-wide commitment
+mode and hash encoding after every test. The asgi_request fixture runs
+one request through the ASGI app.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from commitments.pedersen import (  # noqa: E402
+    get_commitment_mode,
+    get_hash_encoding,
+    set_commitment_mode,
+    set_hash_encoding
+)
+
+
+@pytest.fixture(autouse=True)
+def restore_pedersen_settings():
+    mode, encoding = get_commitment_mode(), get_hash_encoding()
+    yield
+    set_commitment_mode(mode)
+    set_hash_encoding(encoding)
+
+
+def _asgi_request(path, method="GET", body=b"", query=b"", headers=()):
+    """Run one request through the ASGI app; returns (status, headers, body)"""
+    from commitments import asgi
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": query, "headers": list(headers)}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi.app(scope, receive, send))
+    start, *chunks = messages
+    return start["status"], dict(start["headers"]), b"".join(chunk.get("body", b"") for chunk in chunks)
+
+
+@pytest.fixture
+def asgi_request():
+    return _asgi_request
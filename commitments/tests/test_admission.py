@@ -0,0 +1,57 @@
+"""Admission control: shedding with Retry-After, and bounded latency under overload"""
+
+import threading
+import time
+
+import pytest
+
+from commitments.admission import AdmissionController, AdmissionRejected
+from commitments.benchmarks.admission import run
+
+# The overload test runs the Flask app in a server process
+pytest.importorskip("flask")
+
+# Admitted /generate-commitments p99 allowed at 2x overload, in milliseconds
+P99_BUDGET_MS = 1000.0
+
+
+def test_full_queue_is_shed_with_retry_after():
+    controller = AdmissionController(initial_limit=1, queue_size=0, adaptive=False)
+    ticket = controller.acquire()
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire()
+    assert rejected.value.retry_after >= 1
+    ticket.release()
+    controller.acquire().release()
+    assert controller.rejected == 1
+
+
+def test_queued_request_times_out():
+    controller = AdmissionController(initial_limit=1, queue_size=1, queue_timeout=0.05, adaptive=False)
+    with controller.acquire():
+        with pytest.raises(AdmissionRejected):
+            controller.acquire()
+    assert controller.queued == 0 and controller.in_flight == 0
+
+
+def test_released_slot_goes_to_queued_request():
+    controller = AdmissionController(initial_limit=1, queue_size=1, queue_timeout=5, adaptive=False)
+    ticket = controller.acquire()
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(controller.acquire()))
+    waiter.start()
+    while controller.queued == 0:
+        time.sleep(0.001)
+    ticket.release()
+    waiter.join(5)
+    assert len(admitted) == 1 and controller.in_flight == 1
+    admitted[0].release()
+
+
+def test_overload_keeps_admitted_p99_bounded():
+    result = run(admission=True, items=100, overload=2.0, duration=3.0, queue_timeout=0.25)
+    assert result["shed"] > 0, "2x overload should shed some requests"
+    assert result["failed"] == 0
+    assert result["p99"] * 1e3 <= P99_BUDGET_MS, f"admitted p99 {result['p99'] * 1e3:.0f}ms"
+    # /health is on the priority lane and is never shed
+    assert result["health_probes"] > 0 and result["health_ok"] == result["health_probes"]
@@ -0,0 +1,44 @@
+"""
+/admin/profile on the ASGI app
+
+The route must behave like app.py's: hidden without a token, 401 for a
+wrong one, 400 for bad parameters, collapsed stacks otherwise.
+"""
+
+import pytest
+
+from commitments import api
+
+
+def test_profile_is_hidden_without_token(monkeypatch, asgi_request):
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "")
+    assert asgi_request("/admin/profile")[0] == 404
+
+
+def test_profile_requires_the_token(monkeypatch, asgi_request):
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    assert asgi_request("/admin/profile")[0] == 401
+    assert asgi_request("/admin/profile", headers=[(b"authorization", b"Bearer wrong")])[0] == 401
+
+
+@pytest.mark.parametrize("query", [b"seconds=0", b"seconds=abc", b"seconds=1&interval=5"])
+def test_profile_rejects_bad_parameters(monkeypatch, query, asgi_request):
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    status = asgi_request("/admin/profile", query=query, headers=[(b"authorization", b"Bearer secret")])[0]
+    assert status == 400
+
+
+def test_profile_returns_collapsed_stacks(monkeypatch, asgi_request):
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    status, headers, body = asgi_request(
+        "/admin/profile", query=b"seconds=0.1&interval=0.01", headers=[(b"authorization", b"Bearer secret")]
+    )
+    assert status == 200
+    assert headers[b"content-type"] == b"text/plain; charset=utf-8"
+    lines = body.decode().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_profile_is_get_only(monkeypatch, asgi_request):
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    assert asgi_request("/admin/profile", method="POST", headers=[(b"authorization", b"Bearer secret")])[0] == 405
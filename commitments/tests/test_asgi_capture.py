@@ -0,0 +1,53 @@
+"""
+Request capture on the ASGI app
+
+asgi.py must record the same entries as app.py's before_request hook, so a
+capture taken behind either server replays with loadtest.
+"""
+
+import json
+
+import pytest
+
+from commitments import asgi
+from commitments.capture import RequestCapture, read_capture
+
+
+@pytest.fixture
+def capture(tmp_path, monkeypatch):
+    recorder = RequestCapture(str(tmp_path / "capture.jsonl"))
+    monkeypatch.setattr(asgi, "capture", recorder)
+    yield recorder
+    recorder.close()
+
+
+def test_requests_are_captured(capture, asgi_request):
+    body = json.dumps({"amount": 0.5, "private_key": "0x12345678"}).encode()
+    headers = [(b"content-type", b"application/json"), (b"accept", b"application/cbor")]
+    assert asgi_request("/generate-commitment", "POST", body, headers=headers)[0] == 200
+    assert asgi_request("/health", query=b"probe=1")[0] == 200
+    assert asgi_request("/missing")[0] == 404
+    assert asgi_request("/health", "OPTIONS")[0] == 204
+    assert asgi_request("/metrics")[0] == 200
+
+    entries = list(read_capture(capture.path))
+    assert [(e["method"], e["path"]) for e in entries] == [
+        ("POST", "/generate-commitment"),
+        ("GET", "/health?probe=1"),
+        ("GET", "/missing"),
+    ]
+    assert entries[0]["body"] == body
+    assert entries[0]["content_type"] == "application/json"
+    assert entries[0]["accept"] == "application/cbor"
+    assert entries[1]["body"] == b""
+
+
+def test_shed_requests_are_captured(capture, monkeypatch, asgi_request):
+    class Saturated:
+        async def acquire_async(self):
+            raise asgi.AdmissionRejected("Overloaded", 2)
+
+    monkeypatch.setattr(asgi, "admission", Saturated())
+    body = json.dumps({"amount": 0.5, "private_key": "0x12345678"}).encode()
+    assert asgi_request("/generate-commitment", "POST", body)[0] == 503
+    assert [e["path"] for e in read_capture(capture.path)] == ["/generate-commitment"]
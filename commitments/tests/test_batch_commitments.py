@@ -0,0 +1,92 @@
+"""Batch commitment generation: commit_many and the /generate-commitments route"""
+
+import json
+
+import pytest
+
+from commitments import asgi
+from commitments.api import batch_response, split_batch_items
+from commitments.benchmarks.cold_start import COMMITMENTS_DIR
+from commitments.pedersen import (
+    COMMITMENT_MODE_EC,
+    COMMITMENT_MODE_HASH,
+    PedersenCommitmentSystem,
+    set_commitment_mode,
+)
+
+AMOUNTS = [0.5, 1.0, 0.00000001, 20.99999999]
+KEYS = ["0x12345678", "0xabcdef0123", "private-key-3", "0x" + "ab" * 32]
+
+
+@pytest.mark.parametrize("mode", [COMMITMENT_MODE_HASH, COMMITMENT_MODE_EC])
+def test_commit_many_matches_generate_commitment_with_proof(mode):
+    set_commitment_mode(mode)
+    system = PedersenCommitmentSystem()
+    expected = [system.generate_commitment_with_proof(amount, key) for amount, key in zip(AMOUNTS, KEYS)]
+    assert system.commit_many(AMOUNTS, KEYS) == expected
+    assert system.commit_many([], []) == []
+    with pytest.raises(ValueError):
+        system.commit_many(AMOUNTS, KEYS[:2])
+
+
+def test_item_errors_are_merged_in_order():
+    items = [
+        {"amount": 0.5, "private_key": "0x12345678"},
+        {"amount": -1, "private_key": "0x12345678"},
+        {"private_key": "0x12345678"},
+        "not an item",
+        {"amount": 1.0, "private_key": "short"},
+        {"amount": 1.0, "private_key": "0xabcdef0123"},
+    ]
+    results, indices, amounts, private_keys = split_batch_items(items)
+    assert indices == [0, 5]
+    assert amounts == [0.5, 1.0] and private_keys == ["0x12345678", "0xabcdef0123"]
+
+    batch = PedersenCommitmentSystem().commit_many(amounts, private_keys)
+    response = batch_response(results, indices, batch)
+    assert (response["count"], response["succeeded"], response["failed"]) == (6, 2, 4)
+    assert [result["index"] for result in response["results"]] == list(range(6))
+    assert [("error" in result) for result in response["results"]] == [False, True, True, True, True, False]
+    assert response["results"][5]["commitment"] == batch[1][0]
+
+
+def post_batch(asgi_request, items):
+    body = json.dumps({"items": items}).encode()
+    status, _, payload = asgi_request(
+        "/generate-commitments", "POST", body, headers=[(b"content-type", b"application/json")]
+    )
+    return status, json.loads(payload)
+
+
+def test_asgi_route_commits_a_batch(asgi_request):
+    items = [{"amount": amount, "private_key": key} for amount, key in zip(AMOUNTS, KEYS)]
+    status, response = post_batch(asgi_request, items + [{"amount": 0}])
+    assert status == 200
+    assert response["succeeded"] == len(items) and response["failed"] == 1
+
+    system = PedersenCommitmentSystem()
+    for result, amount, key in zip(response["results"], AMOUNTS, KEYS):
+        assert result["commitment"] == system.generate_commitment_with_proof(amount, key)[0]
+
+
+def test_asgi_route_rejects_oversized_batches(asgi_request, monkeypatch):
+    monkeypatch.setattr(asgi, "MAX_BATCH_SIZE", 2)
+    item = {"amount": 0.5, "private_key": "0x12345678"}
+    assert post_batch(asgi_request, [item] * 2)[0] == 200
+    status, response = post_batch(asgi_request, [item] * 3)
+    assert status == 400 and "at most 2" in response["error"]
+    assert post_batch(asgi_request, None)[0] == 400
+
+
+def test_flask_route_rejects_oversized_batches(monkeypatch):
+    pytest.importorskip("flask")
+    # app.py imports its siblings as top-level modules, as when run from commitments/
+    monkeypatch.syspath_prepend(COMMITMENTS_DIR)
+    import app
+
+    monkeypatch.setattr(app, "MAX_BATCH_SIZE", 2)
+    client = app.app.test_client()
+    item = {"amount": 0.5, "private_key": "0x12345678"}
+    response = client.post("/generate-commitments", json={"items": [item, {"amount": 0}]})
+    assert response.status_code == 200 and response.get_json()["succeeded"] == 1
+    assert client.post("/generate-commitments", json={"items": [item] * 3}).status_code == 400
@@ -0,0 +1,149 @@
+"""
+verify_openings_batch checks
+
+A batch containing one bad opening must report exactly that opening as
+invalid, whether commitments are given as x-coordinates, as points (the
+combined random-linear-combination check, bisected when it fails) or in
+hash mode.
+"""
+
+import sqlite3
+
+import pytest
+
+from commitments.curve import lift_x
+from commitments.integration import ZenLendIntegration
+from commitments.positions import PositionRecord, SQLitePositionBackend
+from commitments.pedersen import (
+    BATCH_VERIFY_MIN_SIZE,
+    COMMITMENT_MODE_EC,
+    COMMITMENT_MODE_HASH,
+    PedersenCommitmentSystem,
+    set_commitment_mode,
+)
+
+# Large enough for the combined check and two levels of bisection
+BATCH_SIZE = 4 * BATCH_VERIFY_MIN_SIZE + 5
+
+
+def make_openings(mode, count=BATCH_SIZE, as_points=False):
+    set_commitment_mode(mode)
+    system = PedersenCommitmentSystem()
+    openings = []
+    for i in range(count):
+        commitment = system.commit_btc_amount(0.01 * (i + 1))
+        value = (commitment.commitment, commitment.commitment_y) if as_points else commitment.commitment
+        openings.append((value, commitment.value, commitment.nonce))
+    return system, openings
+
+
+@pytest.mark.parametrize("mode, as_points", [
+    (COMMITMENT_MODE_EC, False),
+    (COMMITMENT_MODE_EC, True),
+    (COMMITMENT_MODE_HASH, False),
+])
+def test_valid_batch_passes(mode, as_points):
+    system, openings = make_openings(mode, as_points=as_points)
+    assert system.verify_openings_batch(openings, mode) == [True] * len(openings)
+
+
+@pytest.mark.parametrize("mode, as_points", [
+    (COMMITMENT_MODE_EC, False),
+    (COMMITMENT_MODE_EC, True),
+    (COMMITMENT_MODE_HASH, False),
+])
+@pytest.mark.parametrize("field", [1, 2])
+def test_one_bad_opening_is_singled_out(mode, as_points, field):
+    system, openings = make_openings(mode, as_points=as_points)
+    bad = 5
+    opening = list(openings[bad])
+    opening[field] += 1
+    openings[bad] = tuple(opening)
+
+    results = system.verify_openings_batch(openings, mode)
+    assert results == [i != bad for i in range(len(openings))]
+
+
+def test_invalid_commitments_fail_without_spoiling_the_batch():
+    system, openings = make_openings(COMMITMENT_MODE_EC, as_points=True)
+    x, y = openings[0][0]
+    openings[0] = ((x, y + 1),) + openings[0][1:]
+    openings[1] = (0,) + openings[1][1:]
+
+    results = system.verify_openings_batch(openings, COMMITMENT_MODE_EC)
+    assert results == [False, False] + [True] * (len(openings) - 2)
+
+
+def test_mixed_points_and_x_coordinates():
+    system, openings = make_openings(COMMITMENT_MODE_EC, as_points=True)
+    mixed = [(c[0] if i % 2 else c, v, n) for i, (c, v, n) in enumerate(openings)]
+    assert system.verify_openings_batch(mixed, COMMITMENT_MODE_EC) == [True] * len(mixed)
+
+
+@pytest.mark.parametrize("bad", [[0], [3, 40], [1, 2, 30, 31, BATCH_SIZE - 1]])
+def test_bisection_finds_every_bad_point_opening(bad):
+    system, openings = make_openings(COMMITMENT_MODE_EC, as_points=True)
+    for index in bad:
+        point, value, nonce = openings[index]
+        openings[index] = (point, value, nonce + 1)
+
+    results = system.verify_openings_batch(openings, COMMITMENT_MODE_EC)
+    assert results == [i not in bad for i in range(len(openings))]
+
+
+def test_stored_points_match_lifted_commitments():
+    system, openings = make_openings(COMMITMENT_MODE_EC, count=4, as_points=True)
+    assert all(point == lift_x(point[0]) for point, _, _ in openings)
+
+
+def test_audit_positions_uses_stored_points():
+    set_commitment_mode(COMMITMENT_MODE_EC)
+    integration = ZenLendIntegration()
+    addresses = [hex(i + 1) for i in range(BATCH_VERIFY_MIN_SIZE + 4)]
+    for i, address in enumerate(addresses):
+        integration.prepare_deposit_transaction(address, 0.1 * (i + 1))
+    assert all(integration.user_commitments[address].commitment_y for address in addresses)
+    assert integration.audit_positions() == dict.fromkeys(addresses, True)
+
+    integration.user_commitments[addresses[2]].value += 1
+    results = integration.audit_positions()
+    assert [address for address, valid in results.items() if not valid] == [addresses[2]]
+    with pytest.raises(ValueError):
+        integration.audit_positions(["0xdead"])
+
+
+def test_reloaded_positions_keep_their_points(tmp_path):
+    set_commitment_mode(COMMITMENT_MODE_EC)
+    path = str(tmp_path / "positions.db")
+    with ZenLendIntegration(SQLitePositionBackend(path)) as integration:
+        integration.prepare_deposit_transaction("0x1", 1.0)
+        stored = integration.user_commitments["0x1"].astuple()
+
+    with ZenLendIntegration(SQLitePositionBackend(path), preload=True) as integration:
+        assert integration.user_commitments["0x1"].astuple() == stored
+        assert integration.audit_positions() == {"0x1": True}
+
+
+def test_backend_adds_commitment_y_to_old_databases(tmp_path):
+    path = str(tmp_path / "positions.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE positions (address TEXT PRIMARY KEY, value BLOB NOT NULL, nonce BLOB NOT NULL,"
+        " commitment BLOB NOT NULL, debt INTEGER NOT NULL DEFAULT 0, health_ratio REAL) WITHOUT ROWID"
+    )
+    cell = (1).to_bytes(32, "big")
+    conn.execute("INSERT INTO positions VALUES ('0x1', ?, ?, ?, 0, NULL)", (cell, cell, cell))
+    conn.commit()
+    conn.close()
+
+    backend = SQLitePositionBackend(path)
+    assert backend.get("0x1") == PositionRecord("0x1", cell, cell, cell)
+    backend.close()
+
+
+def test_small_and_empty_batches():
+    system, openings = make_openings(COMMITMENT_MODE_EC, count=2, as_points=True)
+    assert system.verify_openings_batch([], COMMITMENT_MODE_EC) == []
+    assert system.verify_openings_batch(openings, COMMITMENT_MODE_EC) == [True, True]
+    openings[1] = (openings[1][0], openings[1][1] + 1, openings[1][2])
+    assert system.verify_openings_batch(openings, COMMITMENT_MODE_EC) == [True, False]
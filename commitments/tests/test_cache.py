@@ -0,0 +1,85 @@
+"""Commitment cache: LRU and TTL eviction, counters and reuse by generate_commitment_with_proof"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from commitments import cache as cache_module
+from commitments.cache import CommitmentCache, commitment_cache_key
+from commitments.pedersen import (
+    COMMITMENT_MODE_EC,
+    COMMITMENT_MODE_HASH,
+    ENCODING_V1,
+    ENCODING_V2,
+    PedersenCommitmentSystem,
+    set_commitment_mode,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = CommitmentCache(maxsize=2, ttl=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (3, 1, 1, 0)
+    assert stats["hit_ratio"] == 0.75
+    with pytest.raises(ValueError):
+        CommitmentCache(maxsize=0)
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = CommitmentCache(maxsize=4, ttl=10.0)
+    cache.put("a", 1)
+    clock.now += 5
+    cache.put("b", 2)
+    clock.now += 5
+    # A hit does not extend the entry's lifetime
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    clock.now += 5
+    assert cache.get("b") is None
+    assert len(cache) == 0
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["evictions"]) == (1, 2, 2, 0)
+
+    cache.clear()
+    assert cache.stats()["hits"] == 1
+
+
+def test_keys_cover_every_input():
+    key = commitment_cache_key(COMMITMENT_MODE_HASH, ENCODING_V2, 1.5, "0x1234")
+    assert len(key) == 16 and b"0x1234" not in key
+    assert key == commitment_cache_key(COMMITMENT_MODE_HASH, ENCODING_V2, 1.5, "0x1234")
+    others = [
+        commitment_cache_key(COMMITMENT_MODE_EC, ENCODING_V2, 1.5, "0x1234"),
+        commitment_cache_key(COMMITMENT_MODE_HASH, ENCODING_V1, 1.5, "0x1234"),
+        commitment_cache_key(COMMITMENT_MODE_HASH, ENCODING_V2, 1.25, "0x1234"),
+        commitment_cache_key(COMMITMENT_MODE_HASH, ENCODING_V2, 1.5, "0x1235"),
+    ]
+    assert key not in others
+
+
+@pytest.mark.parametrize("mode", [COMMITMENT_MODE_HASH, COMMITMENT_MODE_EC])
+def test_cached_results_match_and_are_copies(mode):
+    set_commitment_mode(mode)
+    cache = CommitmentCache()
+    system = PedersenCommitmentSystem(cache=cache)
+    expected = PedersenCommitmentSystem().generate_commitment_with_proof(1.5, "0x1234")
+
+    first = system.generate_commitment_with_proof(1.5, "0x1234")
+    first[1]["verification_data"]["can_verify"] = False
+    assert system.generate_commitment_with_proof(1.5, "0x1234") == expected
+    assert (cache.hits, cache.misses) == (1, 1)
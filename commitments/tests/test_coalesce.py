@@ -0,0 +1,50 @@
+"""Single-flight coalescing: followers share the leader's result and survive its cancellation"""
+
+import asyncio
+
+from commitments.coalesce import SingleFlight
+
+
+def test_followers_share_one_computation():
+    flights = SingleFlight("test")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 42}
+
+    async def main():
+        return await asyncio.gather(*(flights.do_async("key", compute) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert [shared for _, shared in results] == [False, True, True]
+    assert all(result == {"value": 42} for result, _ in results)
+    assert flights.in_flight == 0
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flights = SingleFlight("test")
+    release = None
+
+    async def compute():
+        await release.wait()
+        return "done"
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        leader = asyncio.ensure_future(flights.do_async("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do_async("key", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return leader, await follower
+
+    leader, (result, shared) = asyncio.run(main())
+    assert leader.cancelled()
+    assert result == "done" and shared
+    assert flights.in_flight == 0
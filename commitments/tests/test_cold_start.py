@@ -0,0 +1,61 @@
+"""Import-time budget: a fresh process imports app and serves its first request"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+import pytest
+
+from commitments.benchmarks.cold_start import COMMITMENTS_DIR, run_once
+
+# Every test imports the Flask app in a fresh process
+pytest.importorskip("flask")
+
+# Median of import plus first /generate-commitment, in milliseconds
+BUDGET_MS = 200.0
+RUNS = 3
+
+# Modules an inline (ZENLEND_WORKERS=0) cold start must not import
+DEFERRED_MODULES = ("multiprocessing", "concurrent.futures", "asyncio", "flask_cors")
+
+
+def _median_total_ms(env):
+    runs = [run_once(env) for _ in range(RUNS)]
+    return statistics.median(run["import"] + run["first_request"] for run in runs) * 1e3
+
+
+def _env(mode):
+    env = dict(os.environ, ZENLEND_COMMITMENT_MODE=mode, ZENLEND_WORKERS="0")
+    env.pop("ZENLEND_TABLES_PATH", None)
+    return env
+
+
+def test_hash_mode_within_budget():
+    total = _median_total_ms(_env("hash"))
+    assert total <= BUDGET_MS, f"cold start took {total:.1f}ms, budget {BUDGET_MS:.0f}ms"
+
+
+def test_ec_mode_with_table_file_within_budget(tmp_path):
+    path = str(tmp_path / "tables.bin")
+    subprocess.run([sys.executable, "-m", "commitments.tables", path],
+                   cwd=os.path.dirname(COMMITMENTS_DIR), check=True, capture_output=True)
+    env = _env("ec")
+    env["ZENLEND_TABLES_PATH"] = path
+    total = _median_total_ms(env)
+    assert total <= BUDGET_MS, f"cold start took {total:.1f}ms, budget {BUDGET_MS:.0f}ms"
+
+
+@pytest.mark.parametrize("module", DEFERRED_MODULES)
+def test_inline_app_import_defers(module):
+    code = f"import sys, app; print({module!r} in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=COMMITMENTS_DIR, env=_env("hash"),
+                            capture_output=True, text=True, check=True)
+    assert output.stdout.strip().splitlines()[-1] == "False"
+
+
+def test_package_import_is_lazy():
+    code = "import sys, commitments; print('commitments.pedersen' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(COMMITMENTS_DIR),
+                            capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "False"
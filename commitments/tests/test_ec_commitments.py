@@ -0,0 +1,139 @@
+"""
+Stark curve arithmetic and "ec" mode commitment checks
+
+Fixed-base tables and multi-scalar multiplication are compared with plain
+double-and-add, and commitments with value*G + nonce*H computed the same way.
+"""
+
+import random
+
+import pytest
+
+from commitments.curve import (
+    CURVE_ORDER,
+    EC_GENERATOR,
+    FIELD_PRIME,
+    FixedBaseTable,
+    is_on_curve,
+    lift_x,
+    multi_scalar_mul,
+    point_add,
+    scalar_mul_naive,
+    to_affine,
+)
+from commitments.pedersen import (
+    COMMITMENT_MODE_EC,
+    GENERATOR_POINT_H,
+    PedersenCommitmentSystem,
+    get_generator_tables,
+    pedersen_commit,
+    set_commitment_mode,
+)
+
+
+def naive_commit_point(value, nonce):
+    return point_add(scalar_mul_naive(EC_GENERATOR, value), scalar_mul_naive(GENERATOR_POINT_H, nonce))
+
+
+def test_generators_are_on_curve():
+    assert is_on_curve(EC_GENERATOR)
+    assert is_on_curve(GENERATOR_POINT_H)
+    assert scalar_mul_naive(EC_GENERATOR, CURVE_ORDER) is None
+
+
+@pytest.mark.parametrize("window", [1, 4, 5])
+def test_fixed_base_table_matches_double_and_add(window):
+    rng = random.Random(window)
+    table = FixedBaseTable(GENERATOR_POINT_H, window)
+    scalars = [0, 1, 2, CURVE_ORDER - 1, CURVE_ORDER, CURVE_ORDER + 5]
+    scalars += [rng.randrange(CURVE_ORDER) for _ in range(5)]
+    for scalar in scalars:
+        assert table.mul(scalar) == scalar_mul_naive(GENERATOR_POINT_H, scalar % CURVE_ORDER)
+
+
+def test_fixed_base_table_rejects_bad_arguments():
+    x, y = EC_GENERATOR
+    with pytest.raises(ValueError):
+        FixedBaseTable((x, y + 1))
+    with pytest.raises(ValueError):
+        FixedBaseTable(EC_GENERATOR, 0)
+
+
+def test_multi_scalar_mul_matches_sum_of_products():
+    rng = random.Random(7)
+    points = [scalar_mul_naive(EC_GENERATOR, rng.randrange(1, CURVE_ORDER)) for _ in range(6)]
+    scalars = [rng.randrange(CURVE_ORDER) for _ in points]
+    expected = None
+    for point, scalar in zip(points, scalars):
+        expected = point_add(expected, scalar_mul_naive(point, scalar))
+    assert to_affine(multi_scalar_mul(points, scalars)) == expected
+
+
+def test_lift_x_recovers_both_points():
+    point = scalar_mul_naive(EC_GENERATOR, 12345)
+    x, y = point
+    assert lift_x(x, odd=bool(y & 1)) == point
+    assert lift_x(x, odd=not y & 1) == (x, FIELD_PRIME - y)
+
+
+def test_pedersen_commit_ec_is_value_g_plus_nonce_h():
+    rng = random.Random(11)
+    for _ in range(5):
+        value = rng.randrange(21_000_000 * 100_000_000)
+        nonce = rng.randrange(CURVE_ORDER)
+        assert pedersen_commit(value, nonce, COMMITMENT_MODE_EC) == naive_commit_point(value, nonce)[0]
+
+
+def test_generator_tables_use_g_and_h():
+    table_g, table_h = get_generator_tables()
+    assert table_g.base == EC_GENERATOR
+    assert table_h.base == GENERATOR_POINT_H
+
+
+def test_ec_commitment_opens_only_to_its_value_and_nonce():
+    set_commitment_mode(COMMITMENT_MODE_EC)
+    system = PedersenCommitmentSystem()
+    commitment = system.commit_btc_amount(1.5)
+
+    assert commitment.value == 150_000_000
+    # Canonical commitments have an even y-coordinate
+    point = naive_commit_point(commitment.value, commitment.nonce)
+    assert point == (commitment.commitment, point[1]) and point[1] % 2 == 0
+
+    verify = system.verify_commitment_opening
+    assert verify(commitment.commitment, commitment.value, commitment.nonce)
+    assert not verify(commitment.commitment, commitment.value + 1, commitment.nonce)
+    assert not verify(commitment.commitment, commitment.value, commitment.nonce + 1)
+
+
+def test_ec_generate_and_verify_proof():
+    set_commitment_mode(COMMITMENT_MODE_EC)
+    system = PedersenCommitmentSystem()
+    commitment, proof = system.generate_commitment_with_proof(0.25, "0xabc123")
+
+    assert proof["commitment_type"] == "pedersen_ec"
+    assert proof["verification_data"]["expected_commitment"] == commitment
+    assert system.verify_proof(commitment, proof, 0.25)
+    assert not system.verify_proof(commitment, proof, 0.26)
+    assert not system.verify_proof(commitment, dict(proof, nonce=hex(int(proof["nonce"], 16) + 1)), 0.25)
+    # The same key and amount always give the same commitment
+    assert system.generate_commitment_with_proof(0.25, "0xabc123")[0] == commitment
+
+
+def test_ec_negated_opening_is_rejected():
+    set_commitment_mode(COMMITMENT_MODE_EC)
+    system = PedersenCommitmentSystem()
+    commitment = system.commit_btc_amount(1.5)
+    value, nonce = CURVE_ORDER - commitment.value, CURVE_ORDER - commitment.nonce
+    # The negated opening reaches -C, which shares C's x-coordinate
+    assert naive_commit_point(value, nonce)[0] == commitment.commitment
+
+    point = lift_x(commitment.commitment)
+    assert not system.verify_commitment_opening(commitment.commitment, value, nonce)
+    assert not system.verify_commitment_opening(point, value, nonce)
+    assert system.verify_commitment_opening(point, commitment.value, commitment.nonce)
+    assert not system.verify_commitment_opening(
+        commitment.commitment, commitment.value + CURVE_ORDER, commitment.nonce
+    )
+    assert system.verify_openings_batch([(commitment.commitment, value, nonce)]) == [False]
+    assert system.verify_openings_batch([(point, value, nonce)] * 4) == [False] * 4
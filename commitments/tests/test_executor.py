@@ -0,0 +1,84 @@
+"""Commitment executor with workers=0: inline calls, saturation and call_async timeouts"""
+
+import asyncio
+import threading
+
+import pytest
+
+from commitments.executor import CommitmentExecutor, ExecutorSaturatedError, ExecutorTimeoutError
+from commitments.pedersen import PedersenCommitmentSystem
+
+
+@pytest.fixture
+def blocked(monkeypatch):
+    """A system whose verify_proof blocks until release is set"""
+    system = PedersenCommitmentSystem()
+    started, release = threading.Event(), threading.Event()
+
+    def verify_proof(*args):
+        started.set()
+        assert release.wait(5)
+        return True
+
+    monkeypatch.setattr(system, "verify_proof", verify_proof)
+    yield system, started, release
+    release.set()
+
+
+def test_inline_calls_use_the_callers_system():
+    system = PedersenCommitmentSystem()
+    executor = CommitmentExecutor(system, workers=0)
+    executor.start()
+    expected = system.generate_commitment_with_proof(1.5, "0x1234")
+    assert executor.call("generate_commitment_with_proof", 1.5, "0x1234") == expected
+    assert asyncio.run(executor.call_async("generate_commitment_with_proof", 1.5, "0x1234")) == expected
+    executor.shutdown()
+
+    with pytest.raises(ValueError):
+        CommitmentExecutor(system, workers=-1)
+    with pytest.raises(ValueError):
+        CommitmentExecutor(system, max_pending=0)
+
+
+def test_calls_beyond_max_pending_are_rejected(blocked):
+    system, started, release = blocked
+    executor = CommitmentExecutor(system, workers=0, max_pending=1)
+    results = []
+    thread = threading.Thread(target=lambda: results.append(executor.call("verify_proof")))
+    thread.start()
+    assert started.wait(5)
+
+    with pytest.raises(ExecutorSaturatedError):
+        executor.call("verify_proof")
+    with pytest.raises(ExecutorSaturatedError):
+        asyncio.run(executor.call_async("verify_proof"))
+
+    release.set()
+    thread.join()
+    assert results == [True]
+    # Errors release their slot too
+    with pytest.raises(AttributeError):
+        executor.call("no_such_method")
+    assert executor.call("generate_commitment_with_proof", 0.5, "0x1234")
+
+
+def test_async_inline_calls_time_out_but_keep_their_slot(blocked):
+    system, started, release = blocked
+    executor = CommitmentExecutor(system, workers=0, max_pending=1, timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(ExecutorTimeoutError):
+            await executor.call_async("verify_proof")
+        # The abandoned call is still running, so it still holds the only slot
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.call_async("verify_proof")
+
+        release.set()
+        for _ in range(100):
+            if executor._slots.acquire(blocking=False):
+                executor._slots.release()
+                break
+            await asyncio.sleep(0.01)
+        return await executor.call_async("verify_proof")
+
+    assert asyncio.run(scenario()) is True
@@ -0,0 +1,106 @@
+"""
+Hash-mode input encodings
+
+v1 must stay byte-identical to the original decimal-string construction,
+reproduced here, so commitments and proofs issued before v2 still verify.
+"""
+
+import hashlib
+
+import pytest
+
+from commitments.pedersen import (
+    COMMITMENT_MODE_HASH,
+    ENCODING_V1,
+    ENCODING_V2,
+    GENERATOR_G,
+    GENERATOR_H,
+    STARKNET_PRIME,
+    Commitment,
+    PedersenCommitmentSystem,
+    pedersen_commit,
+    set_commitment_mode,
+    set_hash_encoding,
+)
+
+PRIVATE_KEY = "0x" + "ab" * 32
+
+
+def baseline_commit(value, nonce):
+    data = f"{GENERATOR_G}^{value % STARKNET_PRIME}*{GENERATOR_H}^{nonce % STARKNET_PRIME}".encode()
+    return int.from_bytes(hashlib.sha256(data).digest()[:31], "big") % STARKNET_PRIME
+
+
+def baseline_proof_hash(commitment, debt, ratio):
+    return int.from_bytes(hashlib.sha256(f"{commitment}:{debt}:{ratio}".encode()).digest()[:31], "big")
+
+
+def baseline_commitment_with_proof(amount, private_key):
+    nonce = int.from_bytes(hashlib.sha256(private_key.encode()).digest()[:31], "big") % STARKNET_PRIME
+    satoshis = int(amount * 100_000_000)
+    commitment = baseline_commit(satoshis, nonce)
+    return hex(commitment), {
+        "commitment_type": "pedersen",
+        "amount_satoshis": satoshis,
+        "amount_btc": amount,
+        "nonce": hex(nonce),
+        "generators": {"g": hex(GENERATOR_G), "h": hex(GENERATOR_H)},
+        "prime_modulus": hex(STARKNET_PRIME),
+        "verification_data": {"expected_commitment": hex(commitment), "can_verify": True},
+    }
+
+
+@pytest.fixture
+def system():
+    set_commitment_mode(COMMITMENT_MODE_HASH)
+    return PedersenCommitmentSystem()
+
+
+@pytest.mark.parametrize("value, nonce", [(0, 0), (150_000_000, 12345), (1, STARKNET_PRIME + 7)])
+def test_v1_commitment_matches_baseline(value, nonce):
+    assert pedersen_commit(value, nonce, COMMITMENT_MODE_HASH, ENCODING_V1) == baseline_commit(value, nonce)
+    assert pedersen_commit(value, nonce, COMMITMENT_MODE_HASH, ENCODING_V2) != baseline_commit(value, nonce)
+
+
+def test_v1_proofs_match_baseline(system):
+    set_hash_encoding(ENCODING_V1)
+    commitment, proof = system.generate_commitment_with_proof(1.5, PRIVATE_KEY)
+    assert proof.pop("encoding") == ENCODING_V1
+    assert (commitment, proof) == baseline_commitment_with_proof(1.5, PRIVATE_KEY)
+
+    collateral = Commitment(300_000_000, 42, 0)
+    solvency = system.generate_solvency_proof(collateral, 1.0, 1.5)
+    assert solvency["encoding"] == ENCODING_V1
+    assert solvency["proof_elements"][1] == hex(baseline_proof_hash(collateral.commitment, 100_000_000, 1.5))
+    liquidation = system.generate_liquidation_proof(collateral, 3.0, 1.2)
+    assert liquidation["proof_elements"][1] == hex(baseline_proof_hash(collateral.commitment, 300_000_000, 1.2))
+
+
+def test_v2_proofs_carry_their_encoding_and_verify(system):
+    set_hash_encoding(ENCODING_V2)
+    commitment, proof = system.generate_commitment_with_proof(1.5, PRIVATE_KEY)
+    assert proof["encoding"] == ENCODING_V2
+    assert commitment != baseline_commitment_with_proof(1.5, PRIVATE_KEY)[0]
+    assert system.verify_proof(commitment, proof, 1.5)
+    assert not system.verify_proof(commitment, proof, 1.6)
+    # The tag, not the active encoding, decides how a proof is checked
+    set_hash_encoding(ENCODING_V1)
+    assert system.verify_proof(commitment, proof, 1.5)
+    assert not system.verify_proof(commitment, dict(proof, encoding=ENCODING_V1), 1.5)
+
+
+def test_untagged_proof_is_v1(system):
+    set_hash_encoding(ENCODING_V2)
+    commitment, proof = baseline_commitment_with_proof(0.25, PRIVATE_KEY)
+    assert system.verify_proof(commitment, proof, 0.25)
+
+
+def test_unknown_encoding_and_negative_debt_are_rejected(system):
+    with pytest.raises(ValueError):
+        set_hash_encoding("v3")
+    with pytest.raises(ValueError):
+        pedersen_commit(1, 2, COMMITMENT_MODE_HASH, "v3")
+    with pytest.raises(ValueError):
+        system._generate_proof_hash(1, -1, 1.5)
+    commitment, proof = system.generate_commitment_with_proof(0.25, PRIVATE_KEY)
+    assert not system.verify_proof(commitment, dict(proof, encoding="v3"), 0.25)
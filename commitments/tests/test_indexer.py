@@ -0,0 +1,67 @@
+"""Event indexer: position state from events, checkpointed resume and the commitment tree"""
+
+import json
+
+from commitments.indexer import (
+    DEPOSITED,
+    EVENT_SELECTORS,
+    LIQUIDATED,
+    MINTED,
+    REPAID,
+    EventIndexer,
+    IndexedPosition,
+    SQLiteIndexStore,
+)
+from commitments.merkle import MerkleTree
+
+SELECTORS = {kind: selector for selector, kind in EVENT_SELECTORS.items()}
+
+
+def event_line(block_number, kind, address, value):
+    return json.dumps({
+        "from_address": "0x1",
+        "keys": [hex(SELECTORS[kind]), hex(address)],
+        "data": [hex(value), "0x0"],
+        "block_number": block_number,
+    })
+
+
+def make_stream():
+    lines = []
+    for block in range(6):
+        for address in range(1, 5):
+            lines.append(event_line(block, DEPOSITED, address, 1000 * block + address))
+            lines.append(event_line(block, MINTED, address, 10 * (block + 1)))
+        lines.append(event_line(block, REPAID, 1, 5))
+    lines.append(event_line(6, LIQUIDATED, 2, 0))
+    return lines
+
+
+def test_events_build_positions():
+    indexer = EventIndexer(batch_size=4)
+    assert indexer.run(make_stream()) == len(make_stream())
+    assert indexer.position(1) == IndexedPosition(5001, sum(10 * (b + 1) for b in range(6)) - 30, 0)
+    assert indexer.position("0x2") is None
+
+
+def test_restart_rebuilds_the_commitment_tree(tmp_path):
+    lines = make_stream()
+    reference = EventIndexer(commitment_tree=MerkleTree())
+    reference.run(lines)
+
+    path = str(tmp_path / "index.db")
+    store = SQLiteIndexStore(path)
+    first = EventIndexer(store, MerkleTree(), batch_size=5, checkpoint_interval=5)
+    first.run(lines[:23])
+    store.close()
+
+    store = SQLiteIndexStore(path)
+    tree = MerkleTree()
+    resumed = EventIndexer(store, tree, batch_size=5, checkpoint_interval=5)
+    # The restored positions are in the tree before any event is replayed
+    assert tree.root == first.commitment_tree.root != 0
+    resumed.run(lines)
+    store.close()
+
+    assert resumed.positions == reference.positions
+    assert tree.root == reference.commitment_tree.root
@@ -0,0 +1,71 @@
+"""Batch liquidation: candidate filtering, ordering, streamed transactions and confirmation"""
+
+import pytest
+
+from commitments.integration import ZenLendIntegration
+from commitments.liquidation import BatchLiquidator
+
+# address -> (collateral BTC, debt PUSD); at price 1.0 the threshold is 1.2
+POSITIONS = {
+    "0x1": (1.0, 0.9),    # ratio 1.11, liquidatable
+    "0x2": (1.0, 0.95),   # ratio 1.05, liquidatable, worst
+    "0x3": (2.0, 1.0),    # ratio 2.0, healthy at 1.0
+    "0x4": (1.0, 0.0),    # no debt
+}
+
+
+@pytest.fixture
+def integration():
+    integration = ZenLendIntegration()
+    for address, (collateral, debt) in POSITIONS.items():
+        integration.prepare_deposit_transaction(address, collateral)
+        if debt:
+            integration.confirm_mint(address, debt)
+    return integration
+
+
+def test_candidates_are_filtered_and_ordered_by_collateral_ratio(integration):
+    liquidator = BatchLiquidator(integration)
+    jobs = liquidator.candidates(1.0, ["0x3", "0x1", "0x4", "0x2", "0x1", "0x9"])
+    assert [job[0] for job in jobs] == ["0x2", "0x1"]
+    assert liquidator.skipped == ["0x3", "0x4", "0x9"]
+
+    # From the index; a lower price makes the healthy position liquidatable too
+    assert [job[0] for job in liquidator.candidates(1.0)] == ["0x2", "0x1"]
+    assert [job[0] for job in liquidator.candidates(0.5)] == ["0x2", "0x1", "0x3"]
+    with pytest.raises(ValueError):
+        liquidator.candidates(0)
+
+
+def test_streamed_transactions_match_prepare_liquidation_transaction(integration):
+    price = 0.5
+    transactions = list(integration.prepare_batch_liquidation(price))
+    assert [tx["calldata"][0] for tx in transactions] == ["0x2", "0x1", "0x3"]
+
+    for tx in transactions:
+        address = tx["calldata"][0]
+        debt = integration.user_debts[address] / price / 100_000_000
+        expected = integration.prepare_liquidation_transaction("0xkeeper", address, debt)
+        assert tx == expected
+
+
+def test_positions_survive_until_confirmed(integration):
+    transactions = list(integration.prepare_batch_liquidation(1.0))
+    assert len(transactions) == 2
+    assert all(integration.has_position(address) for address in POSITIONS)
+
+    integration.confirm_liquidation(transactions[0]["calldata"][0])
+    assert not integration.has_position("0x2")
+    assert [tx["calldata"][0] for tx in integration.prepare_batch_liquidation(1.0)] == ["0x1"]
+
+
+def test_worker_processes_stream_the_same_transactions(integration):
+    inline = sorted(integration.prepare_batch_liquidation(0.5), key=lambda tx: tx["calldata"][0])
+    with BatchLiquidator(integration, workers=1, chunk_size=2) as liquidator:
+        streamed = list(integration.prepare_batch_liquidation(0.5, liquidator=liquidator))
+    assert sorted(streamed, key=lambda tx: tx["calldata"][0]) == inline
+
+
+def test_liquidator_must_belong_to_the_integration(integration):
+    with pytest.raises(ValueError):
+        list(integration.prepare_batch_liquidation(1.0, liquidator=BatchLiquidator(ZenLendIntegration())))
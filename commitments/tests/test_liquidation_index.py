@@ -0,0 +1,119 @@
+"""Liquidation-price index ordering and the prepare -> confirm debt flow of ZenLendIntegration"""
+
+import pytest
+
+from commitments.indexer import EVENT_SELECTORS, LIQUIDATED, MINTED, REPAID
+from commitments.integration import ZenLendIntegration
+from commitments.liquidation_index import LIQUIDATION_THRESHOLD, LiquidationIndex
+
+SELECTORS = {kind: selector for selector, kind in EVENT_SELECTORS.items()}
+
+# Wei per BTC-denominated PUSD (18 decimals)
+PUSD = 10 ** 18
+
+
+def rpc_event(kind, address, amount):
+    return {"keys": [hex(SELECTORS[kind]), address], "data": [hex(amount), "0x0"], "block_number": 1}
+
+
+def test_index_orders_by_liquidation_price_and_health_ratio():
+    index = LiquidationIndex(threshold=1.2)
+    index.update("a", 300, 100)   # ratio 3.0, price 0.4
+    index.update("b", 150, 100)   # ratio 1.5, price 0.8
+    index.update("c", 110, 100)   # ratio 1.1, price ~1.09
+    index.update("d", 500, 0)     # no debt: not indexed
+
+    assert len(index) == 3 and "d" not in index
+    assert index.get("b") == (pytest.approx(0.8), 1.5)
+    assert index.liquidatable_at(1.0) == ["c"]
+    assert index.liquidatable_at(0.5) == ["c", "b"]
+    assert index.count_liquidatable_at(0.1) == 3
+    assert index.worst(2) == [("c", 1.1), ("b", 1.5)]
+
+
+def test_index_update_and_remove_reorder():
+    index = LiquidationIndex(threshold=1.2)
+    for address, collateral in [("a", 300), ("b", 150), ("c", 110)]:
+        index.update(address, collateral, 100)
+
+    index.update("c", 1000, 100)
+    index.remove("b")
+    index.remove("missing")
+    assert index.worst(3) == [("a", 3.0), ("c", 10.0)]
+    assert index.liquidatable_at(0.5) == []
+
+    # Many stale heap entries are compacted away without losing the live ones
+    for i in range(200):
+        index.update("a", 300 + i, 100)
+    assert index.worst(1) == [("a", 4.99)]
+    assert len(index._heap) <= 2 * len(index) + 64
+
+
+def test_mint_is_proven_for_total_debt_and_recorded_on_confirm():
+    integration = ZenLendIntegration()
+    integration.prepare_deposit_transaction("0x1", 3.0)
+
+    tx = integration.prepare_mint_transaction("0x1", 1.0)
+    assert tx["proof_data"]["debt_amount"] == 100_000_000
+    # Preparing records nothing
+    assert "0x1" not in integration.user_debts and "0x1" not in integration.liquidation_index
+
+    assert integration.confirm_mint("0x1", 1.0) == 100_000_000
+    # The next mint proves solvency for both: 1.9 PUSD needs 2.85 BTC, 2.1 needs 3.15
+    assert integration.prepare_mint_transaction("0x1", 0.9)["proof_data"]["debt_amount"] == 190_000_000
+    with pytest.raises(ValueError):
+        integration.prepare_mint_transaction("0x1", 1.1)
+    with pytest.raises(ValueError):
+        integration.confirm_mint("0x2", 1.0)
+
+
+def test_repay_is_recorded_on_confirm_and_never_goes_negative():
+    integration = ZenLendIntegration()
+    integration.prepare_deposit_transaction("0x1", 3.0)
+    integration.confirm_mint("0x1", 1.0)
+
+    tx = integration.prepare_repay_transaction("0x1", 0.25)
+    assert tx["remaining_debt"] == 75_000_000
+    assert integration.user_debts["0x1"] == 100_000_000
+    with pytest.raises(ValueError):
+        integration.prepare_repay_transaction("0x1", 2.0)
+
+    assert integration.confirm_repay("0x1", 0.25) == 75_000_000
+    assert integration.confirm_repay("0x1", 5.0) == 0
+    assert "0x1" not in integration.liquidation_index
+
+
+def test_liquidation_keeps_the_position_until_confirmed():
+    integration = ZenLendIntegration()
+    integration.prepare_deposit_transaction("0x1", 1.0)
+    integration.confirm_mint("0x1", 0.9)
+
+    assert integration.liquidatable_positions(btc_price=1.0) == ["0x1"]
+    worst = integration.worst_positions(1)[0]
+    assert worst["user_address"] == "0x1"
+    assert worst["liquidation_price"] == pytest.approx(LIQUIDATION_THRESHOLD * 0.9)
+
+    tx = integration.prepare_liquidation_transaction("0xliquidator", "0x1", 0.9)
+    assert tx["function_name"] == "liquidate_position"
+    assert integration.has_position("0x1") and "0x1" in integration.liquidation_index
+
+    assert integration.confirm_liquidation("0x1")
+    assert not integration.has_position("0x1")
+    assert integration.liquidatable_positions(btc_price=1.0) == []
+    assert not integration.confirm_liquidation("0x1")
+
+
+def test_events_change_debt_and_drop_liquidated_positions():
+    integration = ZenLendIntegration()
+    integration.prepare_deposit_transaction("0x1", 3.0)
+
+    assert integration.apply_debt_event(rpc_event(MINTED, "0x1", PUSD))
+    assert integration.apply_debt_event(rpc_event(REPAID, "0x1", PUSD // 4))
+    assert integration.user_debts["0x1"] == 75_000_000
+    # Unknown users and other events are ignored
+    assert not integration.apply_debt_event(rpc_event(MINTED, "0x2", PUSD))
+    assert not integration.apply_debt_event(rpc_event(LIQUIDATED, "0x1", 0))
+    assert not integration.apply_liquidation_event(rpc_event(MINTED, "0x1", PUSD))
+
+    assert integration.apply_liquidation_event(rpc_event(LIQUIDATED, "0x1", 0))
+    assert not integration.has_position("0x1")
@@ -0,0 +1,233 @@
+"""
+Pedersen hash and sparse Merkle tree checks
+
+pedersen_hash is compared with published Starknet test vectors and the
+tree's roots and proofs with a direct recursive model of the layout
+described in merkle.py.
+"""
+
+import random
+
+import pytest
+
+from commitments.curve import FIELD_PRIME, PEDERSEN_POINTS, pedersen_hash
+from commitments.integration import ZenLendIntegration
+from commitments.merkle import (
+    TREE_HEIGHT,
+    MemoryNodeStore,
+    MerkleTree,
+    SQLiteNodeStore,
+    address_key,
+    verify_proof,
+)
+
+
+# (a, b, pedersen(a, b)) from Starknet's crypto test vectors
+PEDERSEN_VECTORS = [
+    (
+        0x3d937c035c878245caf64531a5756109c53068da139362728feb561405371cb,
+        0x208a0a10250e382e1e4bbe2880906c2791bf6275695e02fbbc6aeff9cd8b31a,
+        0x30e480bed5fe53fa909cc0f8c4d99b8f9f2c016be4c41e13a4848797979c662,
+    ),
+    (
+        0x58f580910a6ca59b28927c08fe6c43e2e303ca384badc365795fc645d479d45,
+        0x78734f65a067be9bdb39de18434d71e79f7b6466a4b66bbd979ab9e7515fe0b,
+        0x68cc0b76cddd1dd4ed2301ada9b7c872b23875d5ff837b3a87993e0d9996b87,
+    ),
+]
+
+
+def cheap_hash(a: int, b: int) -> int:
+    """Order-sensitive stand-in for pedersen_hash, so the model tests stay fast"""
+    return (a * 0x1000003 + b * 0x3b9aca07 + 1) % FIELD_PRIME
+
+
+def model_node(items, height, hash_function):
+    """
+    ("leaf", value) | ("binary", hash) | ("edge", child_hash, path, length)
+    for items keyed by their low `height` bits, or None when empty
+    """
+    if not items:
+        return None
+    if height == 0:
+        return ("leaf", items[0][1])
+    bit = height - 1
+    mask = (1 << bit) - 1
+    left = [(k & mask, v) for k, v in items if not (k >> bit) & 1]
+    right = [(k & mask, v) for k, v in items if (k >> bit) & 1]
+    if left and right:
+        return ("binary", hash_function(
+            model_hash(model_node(left, bit, hash_function), hash_function),
+            model_hash(model_node(right, bit, hash_function), hash_function),
+        ))
+    side = 1 if right else 0
+    child = model_node(left or right, bit, hash_function)
+    if child[0] == "edge":
+        return ("edge", child[1], side << child[3] | child[2], child[3] + 1)
+    return ("edge", model_hash(child, hash_function), side, 1)
+
+
+def model_hash(node, hash_function):
+    if node[0] == "edge":
+        _, child, path, length = node
+        return (hash_function(child, path) + length) % FIELD_PRIME
+    return node[1]
+
+
+def model_root(values, hash_function=cheap_hash):
+    node = model_node(sorted(values.items()), TREE_HEIGHT, hash_function)
+    return model_hash(node, hash_function) if node is not None else 0
+
+
+@pytest.mark.parametrize("a, b, expected", PEDERSEN_VECTORS)
+def test_pedersen_hash_known_vectors(a, b, expected):
+    assert pedersen_hash(a, b) == expected
+
+
+def test_pedersen_hash_of_zeros_is_shift_point():
+    assert pedersen_hash(0, 0) == PEDERSEN_POINTS[0][0]
+
+
+def test_pedersen_hash_rejects_out_of_range_inputs():
+    with pytest.raises(ValueError):
+        pedersen_hash(FIELD_PRIME, 0)
+    with pytest.raises(ValueError):
+        pedersen_hash(0, -1)
+
+
+def test_empty_tree():
+    tree = MerkleTree(hash_function=cheap_hash)
+    key = address_key("0x123")
+    assert tree.root == 0
+    assert tree.get(key) == 0
+    assert tree.get_proof(key) == []
+    assert verify_proof(0, key, 0, [], cheap_hash)
+    assert not verify_proof(0, key, 1, [], cheap_hash)
+
+
+def test_single_leaf_root_with_pedersen():
+    key, value = 0x5, 0x1234
+    tree = MerkleTree()
+    root = tree.update(key, value)
+    # One edge of length 251 from the root straight down to the leaf
+    assert root == (pedersen_hash(value, key) + TREE_HEIGHT) % FIELD_PRIME
+    assert root == model_root({key: value}, pedersen_hash)
+
+
+def test_root_matches_model_with_pedersen():
+    rng = random.Random(1)
+    values = {rng.getrandbits(TREE_HEIGHT): rng.getrandbits(250) + 1 for _ in range(6)}
+    tree = MerkleTree()
+    assert tree.update_many(values.items()) == model_root(values, pedersen_hash)
+
+
+def test_roots_and_proofs_match_model_through_updates():
+    rng = random.Random(2)
+    tree = MerkleTree(hash_function=cheap_hash)
+    values = {}
+    # Keys sharing long prefixes exercise edge splits and merges
+    base = rng.getrandbits(TREE_HEIGHT)
+    keys = [rng.getrandbits(TREE_HEIGHT) for _ in range(40)]
+    keys += [base ^ (1 << bit) for bit in range(0, TREE_HEIGHT, 25)] + [base]
+
+    for round_number in range(6):
+        batch = {}
+        for key in rng.sample(keys, 15):
+            # Later rounds also delete keys (value 0)
+            batch[key] = 0 if round_number and rng.random() < 0.3 else rng.getrandbits(250) + 1
+        for key, value in batch.items():
+            if value:
+                values[key] = value
+            else:
+                values.pop(key, None)
+
+        root = tree.update_many(batch.items())
+        assert root == tree.root == model_root(values)
+
+        for key in keys:
+            value = values.get(key, 0)
+            assert tree.get(key) == value
+            proof = tree.get_proof(key)
+            assert verify_proof(root, key, value, proof, cheap_hash)
+            assert not verify_proof(root, key, value + 1, proof, cheap_hash)
+
+
+def test_update_matches_update_many():
+    rng = random.Random(3)
+    items = [(rng.getrandbits(TREE_HEIGHT), rng.getrandbits(250) + 1) for _ in range(20)]
+    one_by_one = MerkleTree(hash_function=cheap_hash)
+    for key, value in items:
+        one_by_one.update(key, value)
+    batched = MerkleTree(hash_function=cheap_hash)
+    assert batched.update_many(items) == one_by_one.root == model_root(dict(items))
+
+
+def test_removing_every_key_empties_the_tree():
+    rng = random.Random(4)
+    keys = [rng.getrandbits(TREE_HEIGHT) for _ in range(10)]
+    store = MemoryNodeStore()
+    tree = MerkleTree(store, hash_function=cheap_hash)
+    tree.update_many((key, 7) for key in keys)
+    assert tree.update_many((key, 0) for key in keys) == 0
+    assert len(store) == 0
+
+
+def test_tampered_proofs_are_rejected():
+    rng = random.Random(5)
+    values = {rng.getrandbits(TREE_HEIGHT): rng.getrandbits(250) + 1 for _ in range(12)}
+    tree = MerkleTree(hash_function=cheap_hash)
+    root = tree.update_many(values.items())
+    key, value = next(iter(values.items()))
+    proof = tree.get_proof(key)
+
+    assert verify_proof(root, key, value, proof, cheap_hash)
+    assert not verify_proof(root + 1, key, value, proof, cheap_hash)
+    assert not verify_proof(root, key, value, proof[:-1], cheap_hash)
+    assert not verify_proof(root, key, 0, proof, cheap_hash)
+
+    tampered = [dict(entry) for entry in proof]
+    entry = tampered[0]
+    if "binary" in entry:
+        entry["binary"] = {"left": entry["binary"]["right"], "right": entry["binary"]["left"]}
+    else:
+        entry["edge"] = dict(entry["edge"], child=hex(int(entry["edge"]["child"], 16) + 1))
+    assert not verify_proof(root, key, value, tampered, cheap_hash)
+
+
+def test_sqlite_store_persists_root(tmp_path):
+    path = str(tmp_path / "tree.db")
+    rng = random.Random(6)
+    values = {rng.getrandbits(TREE_HEIGHT): rng.getrandbits(250) + 1 for _ in range(15)}
+
+    store = SQLiteNodeStore(path)
+    root = MerkleTree(store, hash_function=cheap_hash).update_many(values.items())
+    store.close()
+
+    store = SQLiteNodeStore(path)
+    try:
+        reopened = MerkleTree(store, cache_size=0, hash_function=cheap_hash)
+        assert reopened.root == root == model_root(values)
+        for key, value in values.items():
+            assert verify_proof(root, key, value, reopened.get_proof(key), cheap_hash)
+    finally:
+        store.close()
+
+
+def test_address_key_range():
+    assert address_key("0x0") == 0
+    assert address_key(hex((1 << TREE_HEIGHT) - 1)) == (1 << TREE_HEIGHT) - 1
+    with pytest.raises(ValueError):
+        address_key(hex(1 << TREE_HEIGHT))
+
+
+@pytest.mark.parametrize("address", ["not-hex", hex(1 << TREE_HEIGHT)])
+def test_bad_address_leaves_integration_untouched(address):
+    integration = ZenLendIntegration(commitment_tree=MerkleTree(hash_function=cheap_hash))
+    integration.prepare_deposit_transaction("0x1", 1.0)
+    root = integration.commitment_tree.root
+
+    with pytest.raises(ValueError):
+        integration.prepare_deposit_transaction(address, 1.0)
+    assert address not in integration.user_commitments
+    assert integration.liquidation_index.get(address) is None
+    assert integration.commitment_tree.root == root
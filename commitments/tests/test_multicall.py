@@ -0,0 +1,97 @@
+"""Multicall batching: calldata layout, repeated liquidations and the calldata budget"""
+
+import pytest
+
+from commitments.integration import ZenLendIntegration
+from commitments.multicall import (
+    FUNCTION_SELECTORS,
+    Call,
+    MulticallBuilder,
+    call_from_prepared,
+    encode_execute_calldata,
+    encode_felt_array,
+    to_felt,
+)
+
+CONTRACT = 0x123
+
+
+@pytest.fixture
+def integration():
+    integration = ZenLendIntegration()
+    integration.prepare_deposit_transaction("0xb1", 3.0)
+    integration.prepare_deposit_transaction("0xb2", 1.0)
+    integration.confirm_mint("0xb2", 0.9)
+    return integration
+
+
+def test_felt_arrays_are_length_prefixed():
+    assert encode_felt_array([]) == ["0"]
+    assert encode_felt_array([1, "0x2", "3"]) == ["3", "0x1", "0x2", "0x3"]
+    with pytest.raises(ValueError):
+        to_felt(-1)
+
+
+def test_prepared_proofs_are_passed_as_felt_arrays(integration):
+    mint = integration.prepare_mint_transaction("0xb1", 1.0)
+    elements = mint["proof_data"]["proof_elements"]
+    assert mint["calldata"] == [str(10 ** 18), "3", *elements]
+
+    liquidation = integration.prepare_liquidation_transaction("0xkeeper", "0xb2", 0.9)
+    elements = liquidation["proof_data"]["proof_elements"]
+    assert liquidation["calldata"] == ["0xb2", "3", *elements]
+
+    call = call_from_prepared(CONTRACT, liquidation)
+    assert call.selector == FUNCTION_SELECTORS["liquidate_position"]
+    assert call.calldata == (0xb2, 3, *(int(element, 16) for element in elements))
+
+
+def test_execute_calldata_layout():
+    calls = [Call(1, 2, (3, 4)), Call(5, 6, ())]
+    assert encode_execute_calldata(calls) == [2, 1, 2, 2, 3, 4, 5, 6, 0]
+
+
+def test_repeated_liquidations_are_dropped_but_other_repeats_kept(integration):
+    liquidation = integration.prepare_liquidation_transaction("0xkeeper", "0xb2", 0.9)
+    mint = integration.prepare_mint_transaction("0xb1", 0.5)
+
+    builder = MulticallBuilder()
+    assert builder.add_prepared(CONTRACT, [liquidation, mint, liquidation, mint]) == 3
+    assert len(builder.skipped) == 1
+    assert [call.selector for call in builder.calls] == [
+        FUNCTION_SELECTORS["liquidate_position"], FUNCTION_SELECTORS["mint_stable"], FUNCTION_SELECTORS["mint_stable"]
+    ]
+
+    # The same borrower on another contract is a different position
+    assert builder.add(call_from_prepared(CONTRACT + 1, liquidation))
+    with pytest.raises(ValueError):
+        builder.add_prepared(CONTRACT, [{"function_name": "unknown", "calldata": []}])
+
+
+def test_batches_split_at_the_calldata_budget():
+    calls = [Call(1, 2, tuple(range(n))) for n in (3, 3, 1, 5, 0)]
+    # Call sizes are 6, 6, 4, 8 and 3 felts, plus one felt for the call count
+    builder = MulticallBuilder(max_calldata_felts=13)
+    for call in calls:
+        builder.add(call)
+    assert builder.batches() == [calls[:2], calls[2:4], calls[4:]]
+    calldata = builder.build()
+    assert all(len(transaction) <= 13 for transaction in calldata)
+    assert calldata[0] == encode_execute_calldata(calls[:2])
+
+    with pytest.raises(ValueError):
+        builder.add(Call(1, 2, tuple(range(10))))
+    with pytest.raises(ValueError):
+        MulticallBuilder(max_calldata_felts=3)
+
+
+def test_prepare_multicall(integration):
+    transactions = [
+        integration.prepare_liquidation_transaction("0xkeeper", "0xb2", 0.9),
+        integration.prepare_repay_transaction("0xb2", 0.1),
+    ]
+    transactions.append(transactions[0])
+    result = integration.prepare_multicall(hex(CONTRACT), transactions)
+    assert result["skipped_calls"] == 1
+    assert [transaction["calls"] for transaction in result["transactions"]] == [2]
+    assert result["transactions"][0]["calldata"][0] == "0x2"
@@ -0,0 +1,89 @@
+"""Nonce pool: filling, single hand-out, mode changes and pooled commitments"""
+
+import time
+
+import pytest
+
+from commitments.nonce_pool import NoncePool
+from commitments.pedersen import (
+    COMMITMENT_MODE_EC,
+    COMMITMENT_MODE_HASH,
+    PedersenCommitmentSystem,
+    get_generator_tables,
+    set_commitment_mode,
+)
+
+
+def test_fill_stops_at_size():
+    set_commitment_mode(COMMITMENT_MODE_HASH)
+    pool = NoncePool(size=5, refill_batch=2, background=False)
+    assert pool.fill(count=3) == 3 and len(pool) == 3
+    assert pool.fill() == 2 and len(pool) == 5
+    assert pool.fill() == 0
+    assert pool.refilled == 5
+
+    pool.stop()
+    assert len(pool) == 0
+    with pytest.raises(ValueError):
+        NoncePool(size=0, background=False)
+    with pytest.raises(ValueError):
+        NoncePool(size=4, low_water=4, background=False)
+
+
+def test_each_entry_is_handed_out_once():
+    set_commitment_mode(COMMITMENT_MODE_EC)
+    pool = NoncePool(size=4, background=False)
+    pool.fill()
+    entries = [pool.take() for _ in range(4)]
+    assert len({entry.nonce for entry in entries}) == 4
+    _, table_h = get_generator_tables()
+    assert all(entry.nonce_point == table_h.mul(entry.nonce) for entry in entries)
+
+    assert pool.take() is None
+    assert pool.misses == 1
+
+
+def test_entries_for_another_mode_are_discarded():
+    set_commitment_mode(COMMITMENT_MODE_HASH)
+    pool = NoncePool(size=3, background=False)
+    pool.fill()
+    assert pool.take(COMMITMENT_MODE_HASH).nonce_point is None
+
+    set_commitment_mode(COMMITMENT_MODE_EC)
+    assert pool.take() is None
+    assert len(pool) == 0 and pool.misses == 1
+    pool.fill(count=1)
+    assert pool.take().mode == COMMITMENT_MODE_EC
+
+
+@pytest.mark.parametrize("mode", [COMMITMENT_MODE_HASH, COMMITMENT_MODE_EC])
+def test_pooled_commitments_open(mode):
+    set_commitment_mode(mode)
+    pool = NoncePool(size=2, background=False)
+    pool.fill()
+    system = PedersenCommitmentSystem(nonce_pool=pool)
+    for _ in range(3):
+        commitment = system.commit_btc_amount(1.5)
+        assert system.verify_commitment_opening(commitment.commitment, commitment.value, commitment.nonce)
+    assert pool.misses == 1
+
+
+def test_background_thread_refills_below_low_water():
+    set_commitment_mode(COMMITMENT_MODE_HASH)
+    pool = NoncePool(size=4, low_water=2, refill_batch=1)
+
+    def wait_until_full():
+        for _ in range(200):
+            if len(pool) == 4:
+                return True
+            time.sleep(0.01)
+        return False
+
+    try:
+        assert wait_until_full()
+        assert all(pool.take() is not None for _ in range(3))
+        assert wait_until_full()
+        assert pool.refilled == 7 and pool.misses == 0
+    finally:
+        pool.stop()
+    assert len(pool) == 0
@@ -0,0 +1,115 @@
+"""SQLite position backend: write-through, batching, read-through and reloading positions"""
+
+import gc
+import sqlite3
+import weakref
+
+import pytest
+
+from commitments.integration import ZenLendIntegration
+from commitments.positions import PositionRecord, SQLitePositionBackend, health_ratio
+from commitments.store import FELT_BYTES
+
+
+def cell(value):
+    return value.to_bytes(FELT_BYTES, "big")
+
+
+def record(address, collateral, debt=0):
+    return PositionRecord(address, cell(collateral), cell(7), cell(11), debt, health_ratio(collateral, debt))
+
+
+def stored_count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_writes_go_through_by_default(tmp_path):
+    path = str(tmp_path / "positions.db")
+    backend = SQLitePositionBackend(path)
+    backend.upsert(record("0x1", 100))
+    assert stored_count(path) == 1
+    backend.delete("0x1")
+    assert stored_count(path) == 0
+    assert backend.get("0x1") is None
+    backend.close()
+
+
+def test_batched_writes_are_visible_before_the_flush(tmp_path):
+    path = str(tmp_path / "positions.db")
+    backend = SQLitePositionBackend(path, batch_size=3, flush_interval=None)
+    backend.upsert(record("0x1", 100))
+    backend.upsert(record("0x2", 200))
+    backend.delete("0x1")
+    assert stored_count(path) == 0
+    assert backend.get("0x1") is None and backend.get("0x2") == record("0x2", 200)
+
+    # The third buffered write flushes the batch
+    backend.upsert(record("0x3", 300))
+    assert stored_count(path) == 2
+    backend.upsert(record("0x4", 400))
+    backend.close()
+    assert stored_count(path) == 3
+
+
+def test_cells_must_be_felt_wide():
+    backend = SQLitePositionBackend(":memory:")
+    with pytest.raises(ValueError):
+        backend.upsert(PositionRecord("0x1", b"\x01", cell(7), cell(11)))
+    backend.close()
+
+
+def test_below_health_ratio_is_worst_first():
+    backend = SQLitePositionBackend(":memory:")
+    for address, collateral, debt in [("0x1", 300, 100), ("0x2", 110, 100), ("0x3", 150, 100), ("0x4", 500, 0)]:
+        backend.upsert(record(address, collateral, debt))
+    assert [r.address for r in backend.below_health_ratio(2.0)] == ["0x2", "0x3"]
+    assert [r.address for r in backend.below_health_ratio(5.0, limit=1)] == ["0x2"]
+    backend.close()
+
+
+def test_positions_round_trip_through_preload(tmp_path):
+    path = str(tmp_path / "positions.db")
+    with ZenLendIntegration(SQLitePositionBackend(path)) as integration:
+        integration.prepare_deposit_transaction("0x1", 2.0)
+        integration.prepare_deposit_transaction("0x2", 1.0)
+        integration.confirm_mint("0x2", 0.9)
+        expected = {address: integration.user_commitments[address].astuple() for address in ("0x1", "0x2")}
+
+    with ZenLendIntegration(SQLitePositionBackend(path), preload=True) as integration:
+        assert {address: view.astuple() for address, view in integration.user_commitments.items()} == expected
+        assert integration.user_debts == {"0x2": 90_000_000}
+        assert integration.liquidatable_positions(1.0) == ["0x2"]
+        # Loading again skips what is already cached
+        assert integration.load_positions() == 0
+
+
+def test_has_position_reads_through(tmp_path):
+    path = str(tmp_path / "positions.db")
+    with ZenLendIntegration(SQLitePositionBackend(path)) as integration:
+        integration.prepare_deposit_transaction("0x1", 1.0)
+        integration.confirm_mint("0x1", 0.5)
+
+    with ZenLendIntegration(SQLitePositionBackend(path)) as integration:
+        assert len(integration.user_commitments) == 0
+        assert integration.has_position("0x1")
+        assert integration.user_debts["0x1"] == 50_000_000
+        assert "0x1" in integration.liquidation_index
+        assert not integration.has_position("0x2")
+
+
+def test_exit_hook_only_holds_backends_with_pending_writes():
+    backend = SQLitePositionBackend(":memory:", batch_size=10, flush_interval=None)
+    backend.upsert(record("0x1", 100))
+    assert backend._exit_hook
+    backend.flush()
+    assert not backend._exit_hook
+
+    # A backend that is never closed can still be collected
+    ref = weakref.ref(backend)
+    del backend
+    gc.collect()
+    assert ref() is None
@@ -0,0 +1,119 @@
+"""Shared generator tables for the pre-fork server, and serve.py worker lifecycle"""
+
+import json
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from commitments.benchmarks.asgi_load import _free_port, _wait_for_port
+from commitments.benchmarks.prefork_memory import COMMITMENTS_DIR, children_of
+from commitments.curve import CURVE_ORDER, EC_GENERATOR, FixedBaseTable
+from commitments.tables import MappedFixedBaseTable, TableFile, write_tables
+
+# serve.py runs the Flask app under werkzeug
+pytest.importorskip("flask")
+pytest.importorskip("werkzeug")
+
+
+@pytest.fixture(scope="module")
+def table_file(tmp_path_factory):
+    table = FixedBaseTable(EC_GENERATOR, 4)
+    path = str(tmp_path_factory.mktemp("tables") / "tables.bin")
+    write_tables(path, [table])
+    return table, TableFile(path)
+
+
+def test_mapped_table_matches_decoded_table(table_file):
+    table, tables = table_file
+    mapped = tables.load(EC_GENERATOR, 4, copy=False)
+    decoded = tables.load(EC_GENERATOR, 4, copy=True)
+    assert isinstance(mapped, MappedFixedBaseTable)
+    assert list(mapped.table) == decoded.table == table.table
+
+    scalars = [0, 1, 2, CURVE_ORDER - 1, CURVE_ORDER, 1 << 251] + [secrets.randbelow(CURVE_ORDER) for _ in range(20)]
+    for scalar in scalars:
+        assert mapped.mul(scalar) == decoded.mul(scalar) == table.mul(scalar)
+
+
+def test_table_file_rejects_other_files(tmp_path):
+    path = tmp_path / "not-tables.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        TableFile(str(path))
+
+
+def _post_commitment(port, index):
+    body = json.dumps({"amount": 1.5, "private_key": f"prefork-test-key-{index:08d}"}).encode()
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/generate-commitment", body, {"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.status, json.loads(response.read())
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inspects workers through /proc")
+def test_serve_workers_start_and_stop_on_sigterm():
+    port = _free_port()
+    env = dict(os.environ, ZENLEND_COMMITMENT_MODE="ec", ZENLEND_WORKERS="0", ZENLEND_ADMISSION_LIMIT="0")
+    env.pop("ZENLEND_TABLES_PATH", None)
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "3"],
+        cwd=COMMITMENTS_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_for_port(port, timeout=30)
+        workers = children_of(server.pid)
+        assert len(workers) == 3
+
+        # A connection wakes every worker; the ones losing the accept race
+        # must get EAGAIN instead of blocking where shutdown cannot reach them
+        for pid in workers:
+            assert _listener_flags(pid, port) & os.O_NONBLOCK
+
+        with ThreadPoolExecutor(8) as pool:
+            for status, payload in pool.map(lambda index: _post_commitment(port, index), range(24)):
+                assert status == 200 and payload["success"]
+
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=15) == 0
+        for pid in workers:
+            assert not os.path.exists(f"/proc/{pid}") or _is_zombie(pid)
+    finally:
+        if server.poll() is None:
+            server.kill()
+            server.wait()
+
+
+def _is_zombie(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] == "Z"
+    except FileNotFoundError:
+        return True
+
+
+def _listener_flags(pid, port):
+    """open() flags of the process's listening socket on port, from /proc"""
+    inodes = set()
+    with open(f"/proc/{pid}/net/tcp") as f:
+        for line in f.readlines()[1:]:
+            fields = line.split()
+            if int(fields[1].rsplit(":", 1)[1], 16) == port and fields[3] == "0A":
+                inodes.add(fields[9])
+    for fd in os.listdir(f"/proc/{pid}/fd"):
+        try:
+            target = os.readlink(f"/proc/{pid}/fd/{fd}")
+        except FileNotFoundError:
+            continue
+        if target.startswith("socket:[") and target[8:-1] in inodes:
+            with open(f"/proc/{pid}/fdinfo/{fd}") as f:
+                for line in f:
+                    if line.startswith("flags:"):
+                        return int(line.split()[1], 8)
+    raise AssertionError(f"no listening socket on port {port} in process {pid}")
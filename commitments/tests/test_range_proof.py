@@ -0,0 +1,149 @@
+"""
+Aggregated range proof checks
+
+Low-level proofs use 8-bit ranges to stay fast; the solvency/liquidation
+proofs go through PedersenCommitmentSystem with the default 64 bits.
+"""
+
+import copy
+import dataclasses
+
+import pytest
+
+from commitments import range_proof
+from commitments.curve import CURVE_ORDER, EC_GENERATOR, scalar_mul_naive
+from commitments.pedersen import (
+    COMMITMENT_MODE_EC,
+    COMMITMENT_MODE_HASH,
+    PedersenCommitmentSystem,
+    get_generator_tables,
+    set_commitment_mode,
+)
+
+BITS = 8
+
+
+@pytest.fixture(scope="module")
+def bases():
+    table_g, table_h = get_generator_tables()
+    return table_g.base, table_h.base
+
+
+@pytest.fixture(scope="module")
+def proven(bases):
+    # Three values are padded to four
+    return range_proof.prove([0, 200, (1 << BITS) - 1], [11, 22, 33], bases, BITS)
+
+
+@pytest.fixture
+def ec_system():
+    set_commitment_mode(COMMITMENT_MODE_EC)
+    return PedersenCommitmentSystem()
+
+
+def test_prove_and_verify(bases, proven):
+    proof, commitments = proven
+    assert commitments == [range_proof.commit_value(v, r, bases) for v, r in [(0, 11), (200, 22), (255, 33)]]
+    assert range_proof.verify(proof, commitments, bases, BITS)
+    assert len(proof.L) == len(proof.R) == 5  # log2(8 bits * 4 values)
+
+
+def test_out_of_range_values_are_refused(bases):
+    with pytest.raises(ValueError):
+        range_proof.prove([1 << BITS], [1], bases, BITS)
+    with pytest.raises(ValueError):
+        range_proof.prove([-1], [1], bases, BITS)
+    with pytest.raises(ValueError):
+        range_proof.prove([1], [1], bases, 6)
+
+
+def test_dict_round_trip(bases, proven):
+    proof, commitments = proven
+    parsed = range_proof.RangeProof.from_dict(proof.to_dict())
+    assert parsed == proof
+    assert range_proof.verify(parsed, commitments, bases, BITS)
+
+
+@pytest.mark.parametrize("field", ["tau_x", "mu", "t_hat", "a", "b"])
+def test_tampered_scalar_is_rejected(bases, proven, field):
+    proof, commitments = proven
+    tampered = dataclasses.replace(proof, **{field: (getattr(proof, field) + 1) % CURVE_ORDER})
+    assert not range_proof.verify(tampered, commitments, bases, BITS)
+
+
+@pytest.mark.parametrize("field", ["A", "S", "T1", "T2"])
+def test_tampered_point_is_rejected(bases, proven, field):
+    proof, commitments = proven
+    tampered = dataclasses.replace(proof, **{field: EC_GENERATOR})
+    assert not range_proof.verify(tampered, commitments, bases, BITS)
+
+
+def test_tampered_rounds_are_rejected(bases, proven):
+    proof, commitments = proven
+    swapped = dataclasses.replace(proof, L=proof.R, R=proof.L)
+    assert not range_proof.verify(swapped, commitments, bases, BITS)
+    truncated = dataclasses.replace(proof, L=proof.L[:-1], R=proof.R[:-1])
+    assert not range_proof.verify(truncated, commitments, bases, BITS)
+
+
+def test_other_commitments_are_rejected(bases, proven):
+    proof, commitments = proven
+    assert not range_proof.verify(proof, commitments[::-1], bases, BITS)
+    assert not range_proof.verify(proof, [commitments[0], commitments[1], scalar_mul_naive(EC_GENERATOR, 5)], bases, BITS)
+    assert not range_proof.verify(proof, commitments, bases, 2 * BITS)
+
+
+def test_malformed_dicts_are_refused(proven):
+    data = proven[0].to_dict()
+    with pytest.raises(ValueError):
+        range_proof.RangeProof.from_dict(dict(data, mu=hex(CURVE_ORDER)))
+    with pytest.raises(ValueError):
+        range_proof.RangeProof.from_dict(dict(data, L=data["L"][:-1]))
+
+
+def test_batch_fails_if_any_proof_fails(bases, proven):
+    proof, commitments = proven
+    other, other_commitments = range_proof.prove([7], [8], bases, BITS)
+    assert range_proof.verify_batch([(proof, commitments), (other, other_commitments)], bases, BITS)
+    tampered = dataclasses.replace(other, t_hat=other.t_hat + 1)
+    assert not range_proof.verify_batch([(proof, commitments), (tampered, other_commitments)], bases, BITS)
+
+
+def test_aggregated_solvency_and_liquidation_proofs(ec_system):
+    collateral = [ec_system.commit_btc_amount(amount) for amount in (1.0, 0.5, 2.0)]
+    solvency = ec_system.generate_aggregated_solvency_proof(collateral, [0.5, 0.3, 1.0])
+    liquidation = ec_system.generate_aggregated_liquidation_proof(collateral[:2], [0.9, 0.45])
+
+    assert ec_system.verify_aggregated_proofs([solvency])
+    assert ec_system.verify_aggregated_proofs([solvency, liquidation])
+
+    # Lowering a bound changes the statement the proof was made for
+    tampered = copy.deepcopy(solvency)
+    tampered["bounds"][1] -= 1
+    assert not ec_system.verify_aggregated_proofs([tampered, liquidation])
+
+    tampered = copy.deepcopy(liquidation)
+    tampered["statement"] = "solvency"
+    assert not ec_system.verify_aggregated_proofs([tampered])
+
+    tampered = copy.deepcopy(solvency)
+    tampered["commitments"] = tampered["commitments"][::-1]
+    assert not ec_system.verify_aggregated_proofs([tampered])
+
+    assert not ec_system.verify_aggregated_proofs([dict(solvency, range_bits=32)])
+
+
+def test_aggregated_proofs_refuse_false_statements(ec_system):
+    collateral = [ec_system.commit_btc_amount(1.0)]
+    with pytest.raises(ValueError, match="Insufficient collateral"):
+        ec_system.generate_aggregated_solvency_proof(collateral, [0.7])
+    with pytest.raises(ValueError, match="not liquidatable"):
+        ec_system.generate_aggregated_liquidation_proof(collateral, [0.5])
+
+
+def test_aggregated_proofs_require_ec_commitments():
+    set_commitment_mode(COMMITMENT_MODE_HASH)
+    system = PedersenCommitmentSystem()
+    collateral = [system.commit_btc_amount(1.0)]
+    with pytest.raises(ValueError):
+        system.generate_aggregated_solvency_proof(collateral, [0.5])
@@ -0,0 +1,65 @@
+"""Columnar commitment store: live views, row reuse, bulk loads and encoding errors"""
+
+import pytest
+
+from commitments.pedersen import Commitment
+from commitments.store import FELT_BYTES, CommitmentStore
+
+
+def test_views_are_live():
+    store = CommitmentStore()
+    store["0x1"] = Commitment(100, 7, 11, 13)
+    view = store["0x1"]
+    assert view == Commitment(100, 7, 11, 13)
+    assert view.astuple() == (100, 7, 11, 13)
+
+    store["0x1"] = Commitment(200, 8, 12)
+    assert view.astuple() == (200, 8, 12, 0)
+    view.value = 300
+    assert store["0x1"].value == 300
+    assert store.nbytes() == 4 * FELT_BYTES
+
+
+def test_deleted_rows_are_reused():
+    store = CommitmentStore()
+    for i in range(3):
+        store[f"0x{i}"] = Commitment(i, i, i)
+    del store["0x1"]
+    assert "0x1" not in store and len(store) == 2
+    with pytest.raises(KeyError):
+        store["0x1"]
+
+    store["0x9"] = Commitment(9, 9, 9, 9)
+    assert store.nbytes() == 3 * 4 * FELT_BYTES
+    assert store["0x9"].astuple() == (9, 9, 9, 9)
+    assert [store[key].value for key in ("0x0", "0x2")] == [0, 2]
+    assert list(store) == ["0x0", "0x2", "0x9"]
+
+
+def test_bad_values_leave_the_store_untouched():
+    store = CommitmentStore()
+    store["0x1"] = Commitment(1, 2, 3)
+    with pytest.raises(ValueError):
+        store["0x1"] = Commitment(1, 1 << (8 * FELT_BYTES), 3)
+    with pytest.raises(ValueError):
+        store["0x2"] = Commitment(-1, 2, 3)
+    assert store["0x1"].astuple() == (1, 2, 3, 0)
+    assert "0x2" not in store and store.nbytes() == 4 * FELT_BYTES
+
+
+def test_bulk_load_round_trips_row_bytes():
+    source = CommitmentStore()
+    source["0x1"] = Commitment(100, 7, 11, 13)
+    source["0x2"] = Commitment(200, 8, 12, 14)
+
+    store = CommitmentStore()
+    store["0x0"] = Commitment(1, 2, 3)
+    assert store.load_rows((key, *source.row_bytes(key)) for key in source) == 2
+    assert {key: store[key].astuple() for key in ("0x1", "0x2")} == {
+        "0x1": (100, 7, 11, 13), "0x2": (200, 8, 12, 14)
+    }
+
+    with pytest.raises(KeyError):
+        store.load_rows([("0x1", *source.row_bytes("0x1"))])
+    with pytest.raises(ValueError):
+        store.load_rows([("0x3", b"\x01", *source.row_bytes("0x1")[1:])])
@@ -0,0 +1,175 @@
+"""
+CBOR wire format checks
+
+Encoding is compared with examples from RFC 8949 appendix A, and API
+responses must survive encode_response/decode_response unchanged.
+"""
+
+import io
+
+import pytest
+
+from commitments.pedersen import PedersenCommitmentSystem
+from commitments.wire import (
+    FELT_BYTES,
+    WireFormatError,
+    decode_response,
+    dumps,
+    encode_response,
+    iter_batch_results,
+    iter_decode,
+    loads,
+    prefers_cbor,
+)
+
+# (value, encoding) from RFC 8949 appendix A
+RFC_EXAMPLES = [
+    (0, "00"),
+    (1, "01"),
+    (10, "0a"),
+    (23, "17"),
+    (24, "1818"),
+    (100, "1864"),
+    (1000, "1903e8"),
+    (1000000, "1a000f4240"),
+    (1000000000000, "1b000000e8d4a51000"),
+    (18446744073709551615, "1bffffffffffffffff"),
+    (-1, "20"),
+    (-10, "29"),
+    (-100, "3863"),
+    (-1000, "3903e7"),
+    (1.1, "fb3ff199999999999a"),
+    (-4.1, "fbc010666666666666"),
+    (False, "f4"),
+    (True, "f5"),
+    (None, "f6"),
+    (b"", "40"),
+    (b"\x01\x02\x03\x04", "4401020304"),
+    ("", "60"),
+    ("a", "6161"),
+    ("IETF", "6449455446"),
+    ("ü", "62c3bc"),
+    ("水", "63e6b0b4"),
+    ([], "80"),
+    ([1, 2, 3], "83010203"),
+    ([1, [2, 3], [4, 5]], "8301820203820405"),
+    ({}, "a0"),
+    ({1: 2, 3: 4}, "a201020304"),
+    ({"a": 1, "b": [2, 3]}, "a26161016162820203"),
+    (["a", {"b": "c"}], "826161a161626163"),
+]
+
+# Encodings this codec never produces but must read
+RFC_DECODE_ONLY = [
+    ("f93c00", 1.0),
+    ("f97bff", 65504.0),
+    ("fa47c35000", 100000.0),
+    ("f7", None),
+]
+
+
+@pytest.mark.parametrize("value, encoded", RFC_EXAMPLES)
+def test_rfc_examples(value, encoded):
+    assert dumps(value).hex() == encoded
+    assert loads(bytes.fromhex(encoded)) == value
+
+
+@pytest.mark.parametrize("encoded, value", RFC_DECODE_ONLY)
+def test_rfc_decode_only_examples(encoded, value):
+    assert loads(bytes.fromhex(encoded)) == value
+
+
+def test_nested_round_trip():
+    value = {
+        "results": [{"index": i, "felt": (i * 0x1234567).to_bytes(FELT_BYTES, "big"), "ok": i % 2 == 0}
+                    for i in range(30)],
+        "count": 30,
+        "ratio": 1.5,
+        "note": "x" * 300,
+        "missing": None,
+    }
+    assert loads(dumps(value)) == value
+
+
+@pytest.mark.parametrize("encoded", [
+    "",  # empty
+    "19",  # head argument missing
+    "6449",  # string shorter than its length
+    "8301",  # array missing items
+    "0001",  # trailing data
+    "5f",  # indefinite-length byte string
+    "9f",  # indefinite-length array
+    "f8",  # one-byte simple value
+    "c0",  # tag
+])
+def test_malformed_input_is_refused(encoded):
+    with pytest.raises(WireFormatError):
+        loads(bytes.fromhex(encoded))
+
+
+def test_unencodable_values_are_refused():
+    with pytest.raises(WireFormatError):
+        dumps(object())
+    with pytest.raises(WireFormatError):
+        dumps(1 << 64)
+
+
+def test_iter_decode_reads_a_sequence():
+    items = [1, "two", [3], {"four": 4.0}, None]
+    stream = io.BufferedReader(io.BytesIO(b"".join(dumps(item) for item in items)))
+    assert list(iter_decode(stream)) == items
+
+
+def test_iter_decode_refuses_truncated_item():
+    stream = io.BytesIO(dumps([1, 2, 3])[:-1])
+    with pytest.raises(WireFormatError):
+        list(iter_decode(stream))
+
+
+def test_iter_batch_results():
+    body = {"count": 3, "results": [{"index": i} for i in range(3)], "errors": []}
+    assert list(iter_batch_results(io.BytesIO(dumps(body)))) == body["results"]
+
+
+def test_response_round_trip_keeps_proofs_verifiable():
+    system = PedersenCommitmentSystem()
+    commitment, proof = system.generate_commitment_with_proof(1.25, "0xfeed")
+    payload = {"success": True, "commitment": commitment, "proof": proof}
+
+    encoded = encode_response(payload)
+    compact = loads(encoded)
+    # Felts travel as raw bytes and the constants as a parameter-set ID
+    assert compact["commitment"] == int(commitment, 16).to_bytes(FELT_BYTES, "big")
+    assert "generators" not in compact["proof"] and "params" in compact["proof"]
+
+    decoded = decode_response(encoded)
+    assert decoded == payload
+    assert system.verify_proof(decoded["commitment"], decoded["proof"], 1.25)
+
+
+def test_batch_response_round_trip():
+    system = PedersenCommitmentSystem()
+    results = system.commit_many([0.1, 0.2], ["0x1", "0x2"])
+    payload = {
+        "success": True,
+        "results": [{"index": i, "commitment": c, "proof": p} for i, (c, p) in enumerate(results)],
+        "errors": [],
+    }
+    assert decode_response(encode_response(payload)) == payload
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, False),
+    ("", False),
+    ("*/*", False),
+    ("application/json", False),
+    ("application/cbor", True),
+    ("application/cbor, */*", True),
+    ("application/json, application/cbor", False),
+    ("application/json;q=0.5, application/cbor", True),
+    ("application/cbor;q=0.5, application/json", False),
+    ("application/cbor;q=0.5, */*", False),
+    ("application/cbor;q=0", False),
+])
+def test_prefers_cbor(accept, expected):
+    assert prefers_cbor(accept) is expected
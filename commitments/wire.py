@@ -0,0 +1,459 @@
+"""
+Compact Binary Wire Format for Commitment and Proof Responses
+
+JSON responses carry every felt as a hex string and repeat the constant
+generators and prime modulus in every proof. Clients that send
+``Accept: application/cbor`` instead receive CBOR (RFC 8949) where:
+
+- felts (commitment, nonce, expected commitment) are raw 32-byte
+  big-endian byte strings
+- the constant generators / prime modulus are replaced by a
+  parameter-set ID ("params"), resolved through PARAMETER_SETS
+- the proof's verification_data is flattened into the proof
+
+expand_response() restores the JSON-shaped structure, so
+PedersenCommitmentSystem.verify_proof accepts decoded proofs unchanged.
+
+Only the CBOR subset these payloads need is implemented: unsigned and
+negative integers, byte and text strings, arrays, maps, float64, booleans
+and null, all definite-length. Decoding also works incrementally from a
+binary stream (iter_decode), e.g. a CBOR sequence (RFC 8742) of batch
+results.
+"""
+
+import struct
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+try:
+    from .pedersen import GENERATOR_G, GENERATOR_H, STARKNET_PRIME
+except ImportError:
+    from pedersen import GENERATOR_G, GENERATOR_H, STARKNET_PRIME
+
+CBOR_MEDIA_TYPE = "application/cbor"
+JSON_MEDIA_TYPE = "application/json"
+
+FELT_BYTES = 32
+
+# Parameter sets referenced by compact proofs instead of repeating the constants
+PARAMETER_SET_STARKNET = 1
+PARAMETER_SETS: Dict[int, Dict[str, Any]] = {
+    PARAMETER_SET_STARKNET: {
+        "generators": {"g": hex(GENERATOR_G), "h": hex(GENERATOR_H)},
+        "prime_modulus": hex(STARKNET_PRIME)
+    }
+}
+_PARAMETER_SET_IDS = {
+    (params["generators"]["g"], params["generators"]["h"], params["prime_modulus"]): set_id
+    for set_id, params in PARAMETER_SETS.items()
+}
+
+
+class WireFormatError(ValueError):
+    """Raised for malformed or unsupported CBOR input"""
+
+
+# --- CBOR encoding -------------------------------------------------------
+
+_pack_float = struct.Struct(">Bd").pack
+
+
+def _head(major: int, length: int) -> bytes:
+    major <<= 5
+    if length < 24:
+        return bytes((major | length,))
+    if length < 0x100:
+        return bytes((major | 24, length))
+    if length < 0x10000:
+        return bytes((major | 25,)) + length.to_bytes(2, "big")
+    if length < 0x100000000:
+        return bytes((major | 26,)) + length.to_bytes(4, "big")
+    if length < 0x10000000000000000:
+        return bytes((major | 27,)) + length.to_bytes(8, "big")
+    raise WireFormatError(f"Integer too large for CBOR: {length}")
+
+
+# Encoded map keys; API payloads reuse a small set of field names
+_key_cache: Dict[str, bytes] = {}
+_KEY_CACHE_SIZE = 1024
+
+
+def _encode_key(key: Any, out: list) -> None:
+    if type(key) is str:
+        encoded = _key_cache.get(key)
+        if encoded is None:
+            data = key.encode()
+            encoded = _head(3, len(data)) + data
+            if len(_key_cache) < _KEY_CACHE_SIZE:
+                _key_cache[key] = encoded
+        out.append(encoded)
+    else:
+        _encode(key, out)
+
+
+def _encode(value: Any, out: list) -> None:
+    kind = type(value)
+    if kind is str:
+        data = value.encode()
+        out.append(_head(3, len(data)))
+        out.append(data)
+    elif kind is int:
+        out.append(_head(0, value) if value >= 0 else _head(1, -1 - value))
+    elif kind is dict:
+        out.append(_head(5, len(value)))
+        for key, item in value.items():
+            _encode_key(key, out)
+            _encode(item, out)
+    elif kind is bytes:
+        out.append(_head(2, len(value)))
+        out.append(value)
+    elif kind is float:
+        out.append(_pack_float(0xFB, value))
+    elif kind is list or kind is tuple:
+        out.append(_head(4, len(value)))
+        for item in value:
+            _encode(item, out)
+    elif value is None:
+        out.append(b"\xf6")
+    elif value is True:
+        out.append(b"\xf5")
+    elif value is False:
+        out.append(b"\xf4")
+    elif isinstance(value, int):
+        out.append(_head(0, value) if value >= 0 else _head(1, -1 - value))
+    elif isinstance(value, float):
+        out.append(_pack_float(0xFB, float(value)))
+    elif isinstance(value, str):
+        _encode(str(value), out)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        _encode(bytes(value), out)
+    elif isinstance(value, (list, tuple)):
+        _encode(list(value), out)
+    elif isinstance(value, dict):
+        _encode(dict(value), out)
+    else:
+        raise WireFormatError(f"Cannot encode {type(value).__name__} as CBOR")
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a value as CBOR"""
+    out: list = []
+    _encode(value, out)
+    return b"".join(out)
+
+
+# --- CBOR decoding -------------------------------------------------------
+
+class _Reader:
+    """Reads exact byte counts from a buffer or a binary stream"""
+
+    __slots__ = ("_read",)
+
+    def __init__(self, read):
+        self._read = read
+
+    def take(self, size: int) -> bytes:
+        data = self._read(size)
+        if len(data) != size:
+            raise WireFormatError("Truncated CBOR input")
+        return data
+
+
+def _read_head(reader: _Reader, initial: int, expected_major: int) -> int:
+    """Argument of a definite-length head of the expected major type"""
+    major, info = initial >> 5, initial & 0x1F
+    if major != expected_major:
+        raise WireFormatError(f"Expected CBOR major type {expected_major}, got {major}")
+    if info < 24:
+        return info
+    if info <= 27:
+        return int.from_bytes(reader.take(1 << (info - 24)), "big")
+    raise WireFormatError("Indefinite-length CBOR items are not supported")
+
+
+def _decode(reader: _Reader, initial: Optional[int] = None) -> Any:
+    if initial is None:
+        initial = reader.take(1)[0]
+    major, info = initial >> 5, initial & 0x1F
+
+    if major == 7:
+        if info == 20:
+            return False
+        if info == 21:
+            return True
+        if info in (22, 23):
+            return None
+        if info == 27:
+            return struct.unpack(">d", reader.take(8))[0]
+        if info == 26:
+            return struct.unpack(">f", reader.take(4))[0]
+        if info == 25:
+            return struct.unpack(">e", reader.take(2))[0]
+        raise WireFormatError(f"Unsupported CBOR simple value: {info}")
+
+    if info < 24:
+        argument = info
+    elif info <= 27:
+        argument = int.from_bytes(reader.take(1 << (info - 24)), "big")
+    else:
+        raise WireFormatError("Indefinite-length CBOR items are not supported")
+
+    if major == 0:
+        return argument
+    if major == 1:
+        return -1 - argument
+    if major == 2:
+        return reader.take(argument)
+    if major == 3:
+        return reader.take(argument).decode()
+    if major == 4:
+        return [_decode(reader) for _ in range(argument)]
+    if major == 5:
+        result = {}
+        for _ in range(argument):
+            key = _decode(reader)
+            result[key] = _decode(reader)
+        return result
+    raise WireFormatError(f"Unsupported CBOR major type: {major}")
+
+
+_unpack_double = struct.Struct(">d").unpack_from
+_unpack_single = struct.Struct(">f").unpack_from
+_unpack_half = struct.Struct(">e").unpack_from
+
+
+def _decode_buffer(data: bytes, position: int) -> Tuple[Any, int]:
+    """Decode one item from an in-memory buffer; returns (value, next position)"""
+    initial = data[position]
+    position += 1
+    major, info = initial >> 5, initial & 0x1F
+
+    if major == 7:
+        if info == 20:
+            return False, position
+        if info == 21:
+            return True, position
+        if info in (22, 23):
+            return None, position
+        if info == 27:
+            return _unpack_double(data, position)[0], position + 8
+        if info == 26:
+            return _unpack_single(data, position)[0], position + 4
+        if info == 25:
+            return _unpack_half(data, position)[0], position + 2
+        raise WireFormatError(f"Unsupported CBOR simple value: {info}")
+
+    if info < 24:
+        argument = info
+    elif info <= 27:
+        size = 1 << (info - 24)
+        argument = int.from_bytes(data[position:position + size], "big")
+        position += size
+    else:
+        raise WireFormatError("Indefinite-length CBOR items are not supported")
+
+    if major == 0:
+        return argument, position
+    if major == 1:
+        return -1 - argument, position
+    if major == 2 or major == 3:
+        end = position + argument
+        if end > len(data):
+            raise WireFormatError("Truncated CBOR input")
+        chunk = data[position:end]
+        return (chunk if major == 2 else chunk.decode()), end
+    if major == 4:
+        items = []
+        append = items.append
+        for _ in range(argument):
+            item, position = _decode_buffer(data, position)
+            append(item)
+        return items, position
+    if major == 5:
+        result = {}
+        for _ in range(argument):
+            key, position = _decode_buffer(data, position)
+            result[key], position = _decode_buffer(data, position)
+        return result, position
+    raise WireFormatError(f"Unsupported CBOR major type: {major}")
+
+
+def loads(data: bytes) -> Any:
+    """Decode a single CBOR item that must span the whole buffer"""
+    data = bytes(data)
+    try:
+        value, position = _decode_buffer(data, 0)
+    except (IndexError, struct.error):
+        raise WireFormatError("Truncated CBOR input")
+    if position != len(data):
+        raise WireFormatError("Trailing data after CBOR item")
+    return value
+
+
+def iter_decode(stream: BinaryIO) -> Iterator[Any]:
+    """
+    Decode successive CBOR items from a binary stream as they arrive
+
+    Reads only as many bytes as each item needs, so it can consume a
+    socket or HTTP response body incrementally. The stream must be
+    buffered (read(n) returns n bytes unless at EOF), e.g. an
+    io.BufferedReader or socket.makefile("rb").
+    """
+    reader = _Reader(stream.read)
+    while True:
+        first = stream.read(1)
+        if not first:
+            return
+        yield _decode(reader, first[0])
+
+
+def iter_batch_results(stream: BinaryIO) -> Iterator[Any]:
+    """
+    Decode a /generate-commitments CBOR body from a stream, yielding each
+    entry of its "results" array as soon as it has been read
+
+    Other top-level fields are decoded and discarded.
+    """
+    reader = _Reader(stream.read)
+    for _ in range(_read_head(reader, reader.take(1)[0], 5)):
+        key = _decode(reader)
+        if key != "results":
+            _decode(reader)
+            continue
+        for _ in range(_read_head(reader, reader.take(1)[0], 4)):
+            yield _decode(reader)
+
+
+# --- Compact commitment / proof representation ---------------------------
+
+def _felt_bytes(value: Any) -> Any:
+    if isinstance(value, str) and value.startswith("0x"):
+        return int(value, 16).to_bytes(FELT_BYTES, "big")
+    return value
+
+
+def _felt_hex(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return hex(int.from_bytes(value, "big"))
+    return value
+
+
+def compact_proof(proof: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact form of a proof from generate_commitment_with_proof"""
+    compact = {}
+    generators = proof.get("generators") or {}
+    set_id = _PARAMETER_SET_IDS.get((generators.get("g"), generators.get("h"), proof.get("prime_modulus")))
+    for field, value in proof.items():
+        if field in ("generators", "prime_modulus") and set_id is not None:
+            continue
+        if field == "verification_data" and isinstance(value, dict):
+            for inner, inner_value in value.items():
+                compact[inner] = _felt_bytes(inner_value)
+            continue
+        compact[field] = _felt_bytes(value) if field == "nonce" else value
+    if set_id is not None:
+        compact["params"] = set_id
+    return compact
+
+
+def expand_proof(compact: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of compact_proof"""
+    proof = {}
+    verification_data = {}
+    for field, value in compact.items():
+        if field == "params":
+            if value not in PARAMETER_SETS:
+                raise WireFormatError(f"Unknown parameter set: {value}")
+            params = PARAMETER_SETS[value]
+            proof["generators"] = dict(params["generators"])
+            proof["prime_modulus"] = params["prime_modulus"]
+        elif field in ("expected_commitment", "can_verify"):
+            verification_data[field] = _felt_hex(value)
+        else:
+            proof[field] = _felt_hex(value) if field == "nonce" else value
+    if verification_data:
+        proof["verification_data"] = verification_data
+    return proof
+
+
+def compact_response(payload: Any) -> Any:
+    """Compact every commitment / proof in an API response body"""
+    if isinstance(payload, list):
+        return [compact_response(item) for item in payload]
+    if not isinstance(payload, dict):
+        return payload
+    compact = {}
+    for field, value in payload.items():
+        if field == "commitment":
+            compact[field] = _felt_bytes(value)
+        elif field == "proof" and isinstance(value, dict):
+            compact[field] = compact_proof(value)
+        elif isinstance(value, (dict, list)):
+            compact[field] = compact_response(value)
+        else:
+            compact[field] = value
+    return compact
+
+
+def expand_response(payload: Any) -> Any:
+    """Inverse of compact_response: the body the JSON API would have sent"""
+    if isinstance(payload, list):
+        return [expand_response(item) for item in payload]
+    if not isinstance(payload, dict):
+        return payload
+    expanded = {}
+    for field, value in payload.items():
+        if field == "commitment":
+            expanded[field] = _felt_hex(value)
+        elif field == "proof" and isinstance(value, dict):
+            expanded[field] = expand_proof(value)
+        elif isinstance(value, (dict, list)):
+            expanded[field] = expand_response(value)
+        else:
+            expanded[field] = value
+    return expanded
+
+
+def encode_response(payload: Any) -> bytes:
+    """CBOR body for an API response"""
+    return dumps(compact_response(payload))
+
+
+def decode_response(data: bytes) -> Any:
+    """JSON-shaped API response from a CBOR body"""
+    return expand_response(loads(data))
+
+
+def prefers_cbor(accept: Optional[str]) -> bool:
+    """
+    Whether an Accept header asks for CBOR over JSON
+
+    CBOR must be listed explicitly. It wins over wildcards at equal
+    quality, but an explicit application/json at equal quality keeps
+    JSON, as does a missing or wildcard-only header.
+    """
+    if not accept:
+        return False
+    cbor_q = json_q = None
+    wildcard_q = 0.0
+    for item in accept.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_type = media_type.lower()
+        if media_type == CBOR_MEDIA_TYPE:
+            cbor_q = max(cbor_q or 0.0, quality)
+        elif media_type == JSON_MEDIA_TYPE:
+            json_q = max(json_q or 0.0, quality)
+        elif media_type in ("application/*", "*/*"):
+            wildcard_q = max(wildcard_q, quality)
+    if not cbor_q:
+        return False
+    if json_q is not None:
+        return cbor_q > json_q
+    return cbor_q >= wildcard_q